@@ -18,11 +18,12 @@ def _(me, mo):
             mo.nav_menu(
                 {
                     "/index.html": f"{mo.icon('lucide:home')} Home",
-                    f"{mo.icon('lucide:book')} Notebooks": me.index_csv_to_nav_dict(),
                     "#about": f"{mo.icon('lucide:user')} About",
                 },
                 orientation="vertical",
             ),
+            mo.md(f"{mo.icon('lucide:book')} Notebooks"),
+            me.ui.nav_tree_menu(me.index_csv_to_nav_tree()),
         ]
     )
     return
@@ -55,8 +56,8 @@ def _(mo):
 
 
 @app.cell
-def _(mo, pd):
-    pd.read_csv(str(mo.notebook_location() / "public" / "penguins.csv"))
+def _(me):
+    me.read_public("penguins.csv", library="pandas")
     return
 
 
@@ -67,8 +68,8 @@ def _(mo):
 
 
 @app.cell
-def _(mo, pd):
-    pd.read_csv(str(mo.notebook_location() / "notebooks" / "public" / "penguins.csv"))
+def _(me, mo):
+    me.read_public("penguins.csv", home_dir=mo.notebook_location() / "notebooks", library="pandas")
     return
 
 
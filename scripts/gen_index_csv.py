@@ -8,7 +8,7 @@ def gen_index_csv():
     index_csv_path = os.path.join("public", "index.csv")
     index_csv = me.record_csv(["notebooks", "apps"], output_csv=index_csv_path, replace=True, output=True)
 
-    index_csv.loc[index_csv['Name'] == 'Penguins', 'Type'] = 'edit'
+    index_csv.loc[index_csv['NB_Path'] == os.path.join('notebooks', 'penguins.py'), 'Type'] = 'edit'
 
     index_csv = me.add_row_csv(
         index_csv, 
@@ -1,21 +1,14 @@
-import os
-import shutil
 import marimo_extra as me
 
-def _fresh_web_build(output_dir):
-    if os.path.exists(output_dir): 
-        shutil.rmtree(output_dir)
-        me.rich_print(f"Removed [blue]{output_dir}[end] folder")
 
-
-def build_website(fresh_build=False):
+def build_website(fresh_build=False, **options):
     output_dir = "_site"
 
-    if fresh_build:
-        _fresh_web_build(output_dir)
-
-    me.auto_export_notebooks_web()
+    # Builds into a staging directory and swaps it in when done. Unchanged
+    # notebooks are reused from the previous build unless `fresh_build` is set.
+    # The pipeline passes its export options, e.g. `shard` or `externalize`.
+    return me.publish_site(output_dir=output_dir, incremental=not fresh_build, **options)
 
 
 if __name__ == "__main__":
-    build_website(fresh_build=True)
\ No newline at end of file
+    build_website(fresh_build=True)
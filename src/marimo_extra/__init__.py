@@ -1,28 +1,87 @@
-import marimo_extra.ui as ui
+import importlib
 
-from marimo_extra.marimo_web import _add_row_csv, _save_record_csv
-from marimo_extra.marimo_web import auto_export_notebooks_web
-from marimo_extra.marimo_web import export_notebook
-from marimo_extra.marimo_web import generate_index
-from marimo_extra.marimo_web import record_csv
-from marimo_extra.marimo_web import collect_notebooks_info
+# Runtime part: used by notebooks, also in the browser (Pyodide).
+# It must not import pandas, requests (only `marimo_extra.transport` may, lazily)
+# or any of the build modules below.
+import marimo_extra.ui as ui
 
-from marimo_extra.marimo_export import export
-from marimo_extra.marimo_export import export_app
-from marimo_extra.marimo_export import export_editable
-from marimo_extra.marimo_export import export_executable
-from marimo_extra.marimo_export import export_html
+from marimo_extra.log import get_logger
+from marimo_extra.log import setup_logging
 
 from marimo_extra.utils import rich_print
 from marimo_extra.utils import add_row_csv
 from marimo_extra.utils import index_csv_to_dict
 from marimo_extra.utils import alter_dict_key_value
 from marimo_extra.utils import index_csv_to_nav_dict
+from marimo_extra.utils import index_csv_to_nav_tree
 from marimo_extra.utils import is_available
 from marimo_extra.utils import running_in_server
+from marimo_extra.utils import prefetch_site_files
+
+from marimo_extra.index_model import IndexRecord
+from marimo_extra.index_model import NotebookIndex
+from marimo_extra.index_model import load_index
+
+from marimo_extra.public_data import read_public
+
+from marimo_extra.search import SearchIndex
+from marimo_extra.search import load_search_index
+
+# Build part: exporting and publishing notebooks. Requires the `build` extra
+# (`pip install marimo-extra[build]`) and is only imported on first access.
+_build_exports = {
+    "_add_row_csv": "marimo_extra.marimo_web",
+    "_save_record_csv": "marimo_extra.marimo_web",
+    "auto_export_notebooks_web": "marimo_extra.marimo_web",
+    "export_notebook": "marimo_extra.marimo_web",
+    "generate_index": "marimo_extra.marimo_web",
+    "record_csv": "marimo_extra.marimo_web",
+    "collect_notebooks_info": "marimo_extra.marimo_web",
+    "read_index_rows": "marimo_extra.marimo_web",
+
+    "publish_site": "marimo_extra.marimo_publish",
+    "load_manifest": "marimo_extra.marimo_publish",
+    "load_build_report": "marimo_extra.marimo_publish",
+    "merge_shards": "marimo_extra.marimo_publish",
+
+    "notebook_data_dependencies": "marimo_extra.dependencies",
+    "notebook_metadata": "marimo_extra.nb_metadata",
+    "collect_metadata": "marimo_extra.nb_metadata",
+    "convert_public_assets": "marimo_extra.public_data",
+    "build_search_index": "marimo_extra.search_index",
+    "write_nav_tree": "marimo_extra.nav",
+    "write_gallery_html": "marimo_extra.gallery",
+
+    "run_pipeline": "marimo_extra.pipeline",
+    "register_post_process": "marimo_extra.pipeline",
+
+    "export": "marimo_extra.marimo_export",
+    "export_multi": "marimo_extra.marimo_export",
+    "export_app": "marimo_extra.marimo_export",
+    "export_editable": "marimo_extra.marimo_export",
+    "export_executable": "marimo_extra.marimo_export",
+    "export_html": "marimo_extra.marimo_export",
+    "is_saved_html_fresh": "marimo_extra.marimo_export",
+    "export_logs": "marimo_extra.marimo_export",
+
+    "cache_stats": "marimo_extra.export_cache",
 
+    "run_exports": "marimo_extra.resources",
+    "plan_build": "marimo_extra.plan",
+    "shard_rows": "marimo_extra.shard",
+    "verify_site": "marimo_extra.verify",
+    "externalize_outputs": "marimo_extra.externalize",
+}
 
+def __getattr__(name):
+    if name in _build_exports:
+        value = getattr(importlib.import_module(_build_exports[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'marimo_extra' has no attribute '{name}'")
 
+def __dir__():
+    return sorted(list(globals()) + list(_build_exports))
 
 
 def hello() -> str:
@@ -0,0 +1,246 @@
+import os
+import shutil
+import uuid
+import hashlib
+from pathlib import Path
+
+_size_units = {
+    "": 1,
+    "B": 1,
+    "K": 1024,
+    "M": 1024 ** 2,
+    "G": 1024 ** 3,
+    "T": 1024 ** 4,
+}
+
+_last_used_marker = ".last_used"
+
+def default_cache_dir(name: str, env_var: str=None) -> str:
+    """
+    Returns the cache directory used by Marimo Extra for the given cache name.
+
+    The directory is taken from `env_var` if it is set, otherwise it is placed
+    under `$XDG_CACHE_HOME/marimo_extra/<name>` (or `~/.cache/marimo_extra/<name>`).
+
+    Args:
+        name (str): The name of the cache (e.g. "sandbox").
+        env_var (str, optional): An environment variable that overrides the
+            directory. Defaults to None.
+
+    Returns:
+        str: The path to the cache directory.
+    """
+    if env_var is not None and os.environ.get(env_var):
+        return os.environ[env_var]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "marimo_extra", name)
+
+def parse_size(size) -> int:
+    """
+    Converts a human readable size into bytes.
+
+    Args:
+        size (int | str): A size in bytes or a string like "512M", "5G" or "1.5GB".
+
+    Returns:
+        int: The size in bytes.
+    """
+    if isinstance(size, (int, float)):
+        return int(size)
+    value = str(size).strip().upper().removesuffix("IB").removesuffix("B")
+    unit = value[-1] if value and value[-1] in _size_units else ""
+    number = value[:-1] if unit else value
+    return int(float(number) * _size_units[unit])
+
+def file_hash(path: str, chunk_size: int=1 << 20) -> str:
+    """
+    Computes the SHA-256 hash of a file without loading it into memory at once.
+
+    Args:
+        path (str): The path to the file.
+        chunk_size (int, optional): The read size in bytes. Defaults to 1 MiB.
+
+    Returns:
+        str: The hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def text_hash(*parts: str) -> str:
+    """
+    Computes a SHA-256 hash over the given strings.
+
+    Args:
+        *parts (str): The strings to hash, in order.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def dir_size(path: str) -> int:
+    """
+    Returns the total size in bytes of all files below `path`.
+
+    Args:
+        path (str): A file or directory path.
+
+    Returns:
+        int: The size in bytes, 0 if the path does not exist.
+    """
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+def touch_entry(path: str):
+    """
+    Marks a cache entry as used now, so LRU eviction keeps it.
+
+    Directories get a `.last_used` marker file, files get their mtime updated.
+
+    Args:
+        path (str): The path to the cache entry.
+    """
+    marker = os.path.join(path, _last_used_marker) if os.path.isdir(path) else path
+    try:
+        Path(marker).touch()
+    except OSError:
+        pass
+
+def _last_used(path: str) -> float:
+    marker = os.path.join(path, _last_used_marker) if os.path.isdir(path) else path
+    try:
+        return os.stat(marker).st_mtime
+    except OSError:
+        return 0.0
+
+def lru_evict(cache_dir: str, max_bytes: int, keep: list[str]=()) -> list[str]:
+    """
+    Evicts the least recently used entries of a cache directory until its
+    total size fits under `max_bytes`.
+
+    Every direct child of `cache_dir` is an entry. Entries whose name starts
+    with "." or is listed in `keep` are never evicted.
+
+    Args:
+        cache_dir (str): The cache directory.
+        max_bytes (int): The size cap in bytes.
+        keep (list[str], optional): Entry names that must not be evicted.
+
+    Returns:
+        list[str]: The paths of the evicted entries.
+    """
+    if not os.path.isdir(cache_dir):
+        return []
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.startswith("."):
+            continue
+        path = os.path.join(cache_dir, name)
+        entries.append((_last_used(path), path, dir_size(path), name in keep))
+
+    total = sum(size for _, _, size, _ in entries)
+    evicted = []
+    for _, path, size, pinned in sorted(entries):
+        if total <= max_bytes:
+            break
+        if pinned:
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+        total -= size
+        evicted.append(path)
+    return evicted
+
+_FICLONE = 0x40049409
+
+def _reflink(src: str, dst: str) -> bool:
+    """
+    Clones `src` into the new file `dst`, which must not exist yet.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, "rb") as s, open(dst, "xb") as d:
+            try:
+                fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+                return True
+            except OSError:
+                pass
+    except OSError:
+        return False
+    # Only reached when the clone failed, `dst` is the empty file created above
+    os.remove(dst)
+    return False
+
+def _tmp_path(dst: str) -> str:
+    # Unique per call, several threads may place the same file at once
+    return f"{dst}.{uuid.uuid4().hex}.tmp"
+
+def link_or_copy(src: str, dst: str, hardlink: bool=True) -> str:
+    """
+    Places `src` at `dst` without copying bytes when the filesystem allows it.
+
+    Tries a hardlink first, then a reflink (copy-on-write clone), and only
+    falls back to a byte copy if neither is supported. The file is placed
+    under a temporary name next to `dst` and renamed over it, so an existing
+    `dst` is replaced atomically and never opened for writing: it may be a
+    hardlink sharing its contents with a cache entry or a previous site.
+
+    Since a hardlinked `dst` shares its contents with `src`, files placed this
+    way must be rewritten with a new file and `os.replace`, never in place.
+
+    Args:
+        src (str): The source file.
+        dst (str): The destination path.
+        hardlink (bool, optional): Whether a hardlink may be used. Defaults to True.
+
+    Returns:
+        str: How the file was placed: "hardlink", "reflink" or "copy".
+    """
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        return "hardlink"
+
+    tmp = _tmp_path(dst)
+    try:
+        how = None
+        if hardlink:
+            try:
+                os.link(src, tmp)
+                how = "hardlink"
+            except OSError:
+                pass
+        if how is None and _reflink(src, tmp):
+            how = "reflink"
+        if how is None:
+            shutil.copyfile(src, tmp)
+            how = "copy"
+        os.replace(tmp, dst)
+    finally:
+        # Also left by `os.replace` when another thread linked `dst` to `src` meanwhile
+        if os.path.lexists(tmp):
+            os.remove(tmp)
+    return how
@@ -0,0 +1,159 @@
+import os
+import re
+import sys
+import pickle
+import tempfile
+from marimo_extra.cache import default_cache_dir, parse_size, text_hash, touch_entry, lru_evict
+
+CELL_CACHE_DIR_ENV = "MARIMO_EXTRA_CELL_CACHE_DIR"
+CELL_CACHE_SIZE_ENV = "MARIMO_EXTRA_CELL_CACHE_SIZE"
+default_cell_cache_size = "1G"
+
+# Cells running faster than this are not worth storing
+min_cell_seconds = 0.1
+
+# The marimo versions (from, up to excluding) whose cell executors the cache
+# wraps were checked against; it relies on marimo's private runtime API
+supported_marimo_versions = ("0.11.0", "0.12.0")
+
+# Cells whose effects are not their definitions and output: printing,
+# writing outputs imperatively, UI elements and state
+_uncacheable = re.compile(
+    r"\bprint\s*\(|\bmo\.(output|ui|state|status|stop|redirect_stdout|redirect_stderr|capture_stdout|capture_stderr)\b"
+)
+
+_entry_suffix = ".pkl"
+
+def cell_cache_dir() -> str:
+    """
+    Returns the directory of the cell output cache.
+
+    Defaults to `~/.cache/marimo_extra/cells`, overridden by the
+    `MARIMO_EXTRA_CELL_CACHE_DIR` environment variable.
+    """
+    return default_cache_dir("cells", CELL_CACHE_DIR_ENV)
+
+def cell_cache_size() -> int:
+    """
+    Returns the size cap of the cell output cache in bytes, set with the
+    `MARIMO_EXTRA_CELL_CACHE_SIZE` environment variable. Defaults to 1G.
+    """
+    return parse_size(os.environ.get(CELL_CACHE_SIZE_ENV) or default_cell_cache_size)
+
+def _version_tuple(version: str) -> tuple[int, ...]:
+    match = re.match(r"\d+(\.\d+)*", version)
+    return tuple(int(part) for part in match.group(0).split(".")) if match else ()
+
+def marimo_supported(version: str=None) -> bool:
+    """
+    Checks whether the cell cache supports a marimo version (see
+    `supported_marimo_versions`).
+
+    Args:
+        version (str, optional): The marimo version. Defaults to the installed one.
+
+    Returns:
+        bool: True if the version is supported, False otherwise.
+    """
+    if version is None:
+        import marimo
+        version = marimo.__version__
+    low, high = supported_marimo_versions
+    return _version_tuple(low) <= _version_tuple(version) < _version_tuple(high)
+
+def notebook_salt(notebook_path: str) -> str:
+    """
+    Hashes what every cell of a notebook depends on besides its own code and
+    its upstream cells: the marimo and Python versions and the notebook's data files.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+
+    Returns:
+        str: The salt of the notebook's cell keys.
+    """
+    import marimo
+    from marimo_extra.dependencies import data_dependency_hashes
+
+    parts = [marimo.__version__, sys.version.split()[0]]
+    for path, digest in data_dependency_hashes(notebook_path):
+        parts += [path, digest]
+    return text_hash(*parts)
+
+def is_cacheable(code: str) -> bool:
+    """
+    Checks whether a cell's effects are fully captured by its definitions and output.
+    """
+    return _uncacheable.search(code) is None
+
+def cell_key(salt: str, code: str, parent_keys: list[str]) -> str:
+    """
+    Computes the key of a cell's outputs.
+
+    Args:
+        salt (str): The notebook's salt (see `notebook_salt`).
+        code (str): The cell's code.
+        parent_keys (list[str]): The keys of the cells it references.
+
+    Returns:
+        str: The cell key.
+    """
+    return text_hash(salt, code, *sorted(parent_keys))
+
+try:
+    from marimo._plugins.ui._core.ui_element import UIElement as _ui_element
+except ImportError:
+    _ui_element = None
+
+class _Pickler(pickle.Pickler):
+    """
+    Refuses objects that only make sense in the kernel that created them.
+    """
+    def persistent_id(self, obj):
+        if _ui_element is not None and isinstance(obj, _ui_element):
+            raise pickle.PicklingError("UI elements are not cached")
+        return None
+
+def load(cache_dir: str, key: str):
+    """
+    Loads the stored definitions and output of a cell.
+
+    Returns:
+        tuple[dict, object] | None: The definitions by name and the output, or
+            None if the cell is not stored.
+    """
+    path = os.path.join(cache_dir, key + _entry_suffix)
+    try:
+        with open(path, "rb") as f:
+            defs, output = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    touch_entry(path)
+    return defs, output
+
+def store(cache_dir: str, key: str, defs: dict, output) -> bool:
+    """
+    Stores the definitions and output of a cell, unless one of them cannot be pickled.
+
+    Returns:
+        bool: True if the cell was stored, False otherwise.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=cache_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            _Pickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump((defs, output))
+        os.replace(tmp_path, os.path.join(cache_dir, key + _entry_suffix))
+        return True
+    except Exception:
+        os.remove(tmp_path)
+        return False
+
+def evict(cache_dir: str=None) -> list[str]:
+    """
+    Evicts the least recently used cell outputs above the size cap.
+
+    Returns:
+        list[str]: The paths of the evicted entries.
+    """
+    return lru_evict(cache_dir or cell_cache_dir(), cell_cache_size())
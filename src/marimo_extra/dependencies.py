@@ -0,0 +1,217 @@
+import os
+import re
+import ast
+from marimo_extra.cache import file_hash
+from marimo_extra.public_data import columnar_path
+
+# Marks a path part that is only known at runtime
+_dynamic = object()
+
+_path_constructors = ["Path", "PurePath", "PosixPath", "WindowsPath"]
+
+# `public/` paths mentioned inside longer strings, e.g. `<img src="public/logo.png">`
+_embedded_public_path = re.compile(r"[\w.\-/]*\bpublic/[\w.\-/]*[\w\-]")
+
+def _is_location_call(node) -> bool:
+    """
+    Checks for a `mo.notebook_location()` (or `notebook_location()`) call.
+    """
+    if not isinstance(node, ast.Call):
+        return False
+    func = node.func
+    return (isinstance(func, ast.Attribute) and func.attr == "notebook_location") or \
+        (isinstance(func, ast.Name) and func.id == "notebook_location")
+
+def _call_name(node) -> str:
+    func = node.func
+    if isinstance(func, ast.Attribute):
+        prefix = _call_name(ast.Call(func=func.value)) if isinstance(func.value, (ast.Attribute, ast.Name)) else ""
+        return f"{prefix}.{func.attr}" if prefix else func.attr
+    if isinstance(func, ast.Name):
+        return func.id
+    return ""
+
+def _split(value: str) -> list[str]:
+    return [part for part in value.replace("\\", "/").split("/") if part not in ["", "."]]
+
+def _path_expr(node):
+    """
+    Evaluates an expression that builds a file path, as far as it is statically known.
+
+    Returns:
+        tuple[str, list] | None: ("location", parts) for paths relative to the
+            notebook location, ("literal", parts) for plain string paths, or
+            None if the expression is not a path. Parts only known at runtime
+            are `_dynamic`.
+    """
+    if _is_location_call(node):
+        return "location", []
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        if re.search(r"\s", node.value):
+            return None
+        return "literal", _split(node.value)
+
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Div):
+        left = _path_expr(node.left)
+        if left is None:
+            return None
+        right = node.right
+        if isinstance(right, ast.Constant) and isinstance(right.value, str):
+            return left[0], left[1] + _split(right.value)
+        return left[0], left[1] + [_dynamic]
+
+    if isinstance(node, ast.JoinedStr) and node.values:
+        first = node.values[0]
+        if isinstance(first, ast.FormattedValue) and _is_location_call(first.value):
+            parts = []
+            for value in node.values[1:]:
+                if isinstance(value, ast.Constant):
+                    parts += _split(value.value)
+                else:
+                    parts.append(_dynamic)
+            return "location", parts
+        return None
+
+    if isinstance(node, ast.Call):
+        name = _call_name(node)
+        if name in ["str", "os.fspath"] or name.split(".")[-1] in _path_constructors:
+            if len(node.args) == 1:
+                return _path_expr(node.args[0])
+            return None
+        if name in ["os.path.join", "path.join", "join"] and node.args:
+            base = _path_expr(node.args[0])
+            if base is None:
+                return None
+            parts = list(base[1])
+            for arg in node.args[1:]:
+                if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                    parts += _split(arg.value)
+                else:
+                    parts.append(_dynamic)
+            return base[0], parts
+    return None
+
+def _read_public_paths(node):
+    """
+    Evaluates a `read_public("name", home_dir)` call as the files it may read.
+
+    Returns:
+        list[tuple[str, list]] | None: The paths as returned by `_path_expr`,
+            or None if the node is not such a call.
+    """
+    if not isinstance(node, ast.Call) or _call_name(node).split(".")[-1] != "read_public":
+        return None
+    if not node.args or not (isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str)):
+        return []
+    home = node.args[1] if len(node.args) > 1 else next((keyword.value for keyword in node.keywords if keyword.arg == "home_dir"), None)
+    home = ("location", []) if home is None else _path_expr(home)
+    if home is None:
+        return []
+    stem = node.args[0].value.removesuffix(".csv")
+    return [(home[0], home[1] + ["public", stem + ext]) for ext in [".csv", ".parquet"]]
+
+def _files_below(path: str) -> list[str]:
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for root, _, names in os.walk(path):
+        files += [os.path.join(root, name) for name in names]
+    return files
+
+def _resolve(kind: str, parts: list, notebook_dir: str, include_dynamic: bool=True) -> list[str]:
+    """
+    Resolves a statically evaluated path to the existing files it may refer to.
+    """
+    known = []
+    for part in parts:
+        if part is _dynamic:
+            break
+        known.append(part)
+    dynamic = len(known) < len(parts)
+    if dynamic and not include_dynamic:
+        return []
+
+    if kind == "literal" and "public" not in known:
+        return []
+    if dynamic and not known:
+        # Only the notebook location is known, don't depend on everything next to it
+        return []
+
+    candidates = [os.path.join(notebook_dir, *known)]
+    if kind == "literal":
+        candidates.append(os.path.join(*known))
+
+    for candidate in candidates:
+        candidate = os.path.normpath(candidate)
+        if os.path.isfile(candidate) and not dynamic:
+            return [candidate]
+        if os.path.isdir(candidate) and (dynamic or candidate != os.path.normpath(notebook_dir)):
+            return _files_below(candidate)
+    return []
+
+def notebook_data_dependencies(notebook_path: str, include_dynamic: bool=True) -> list[str]:
+    """
+    Finds the data files a notebook reads, without running it.
+
+    The notebook source is parsed and every expression that builds a file path
+    is evaluated statically: `mo.notebook_location()` path joins (with `/`,
+    `os.path.join` or f-strings) and string literals pointing into a `public/`
+    directory. `read_public("name")` calls depend on the CSV file and its
+    Parquet copy, next to it or in the build directory (see `columnar_path`).
+    If part of a path is only known at runtime, all files below the
+    statically known directory are dependencies.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+        include_dynamic (bool): Whether paths only partly known statically
+            count, as all files below their known directory. Defaults to True.
+
+    Returns:
+        list[str]: The sorted paths of the existing files the notebook depends on.
+    """
+    with open(notebook_path, encoding="utf-8") as f:
+        try:
+            tree = ast.parse(f.read(), filename=notebook_path)
+        except SyntaxError:
+            return []
+
+    notebook_dir = os.path.dirname(notebook_path) or "."
+    dependencies = set()
+    inner = set()
+    for node in ast.walk(tree):
+        if id(node) in inner:
+            continue
+        reads = _read_public_paths(node)
+        if reads is not None:
+            inner.update(id(child) for child in ast.walk(node) if child is not node)
+            for kind, parts in reads:
+                for path in _resolve(kind, parts, notebook_dir, include_dynamic):
+                    dependencies.add(path)
+                    if path.endswith(".csv") and os.path.isfile(columnar_path(path)):
+                        dependencies.add(columnar_path(path))
+            continue
+        path = _path_expr(node)
+        if path is None:
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                for match in _embedded_public_path.findall(node.value):
+                    dependencies.update(_resolve("literal", _split(match), notebook_dir, include_dynamic))
+            continue
+        # Sub-expressions of a path (e.g. `loc / "public"`) are not paths of their own
+        inner.update(id(child) for child in ast.walk(node) if child is not node)
+        dependencies.update(_resolve(path[0], path[1], notebook_dir, include_dynamic))
+
+    notebook = os.path.normpath(notebook_path)
+    return sorted(path for path in dependencies if path != notebook)
+
+def data_dependency_hashes(notebook_path: str) -> list[tuple[str, str]]:
+    """
+    Hashes the data files a notebook depends on.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+
+    Returns:
+        list[tuple[str, str]]: The (path, SHA-256) of every dependency, sorted by path.
+    """
+    return [(path, file_hash(path)) for path in notebook_data_dependencies(notebook_path)]
@@ -0,0 +1,283 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from marimo_extra.cache import default_cache_dir, parse_size, file_hash, text_hash, dir_size, touch_entry, lru_evict, link_or_copy
+from marimo_extra.dependencies import data_dependency_hashes
+
+EXPORT_CACHE_DIR_ENV = "MARIMO_EXTRA_CACHE_DIR"
+EXPORT_CACHE_SIZE_ENV = "MARIMO_EXTRA_CACHE_SIZE"
+default_export_cache_size = "2G"
+
+# Inside an entry: the exported file, and the files the export placed next to it
+_entry_output = "output"
+_entry_files = "files"
+
+# Totals kept in the cache directory; names starting with "." are never evicted
+_stats_name = ".stats.json"
+_stats_lock_name = ".stats.lock"
+_stats_thread_lock = threading.Lock()
+
+# Entries restored or stored by this process, never evicted while it runs:
+# exports run concurrently, and another one may still be placing them
+_used_keys = set()
+_used_keys_lock = threading.Lock()
+
+# Counters of the running process, e.g. for a summary at the end of a build
+session_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+def export_cache_dir() -> str:
+    """
+    Returns the directory of the shared export cache.
+
+    Defaults to `~/.cache/marimo_extra/exports`, overridden by the
+    `MARIMO_EXTRA_CACHE_DIR` environment variable. Pointing it to a directory
+    that CI restores as a cache artifact shares exports between branches.
+    """
+    return default_cache_dir("exports", EXPORT_CACHE_DIR_ENV)
+
+def export_cache_size() -> int:
+    """
+    Returns the size cap of the export cache in bytes.
+
+    Set with the `MARIMO_EXTRA_CACHE_SIZE` environment variable (e.g. "500M");
+    a size of 0 disables the cache.
+    """
+    return parse_size(os.environ.get(EXPORT_CACHE_SIZE_ENV) or default_export_cache_size)
+
+def export_cache_enabled() -> bool:
+    return export_cache_size() > 0
+
+def _public_hashes(notebook_path: str) -> list[str]:
+    public_dir = os.path.join(os.path.dirname(notebook_path), "public")
+    parts = []
+    for root, _, names in os.walk(public_dir):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            parts += [os.path.relpath(path, public_dir), file_hash(path)]
+    return parts
+
+def export_cache_key(notebook_path: str, options: list[str], copies_public: bool=False) -> str:
+    """
+    Computes the content-addressed key of an export.
+
+    The key covers the notebook source, the export options (format, mode,
+    show_code, sort, ...), the marimo and Python versions and the data files
+    the notebook reads. The installed versions of the notebook's own imports
+    are not part of the key; pin them in the notebook's script metadata.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+        options (list[str]): The export options, without notebook and output paths.
+        copies_public (bool, optional): Whether the export copies the `public`
+            folder next to the notebook (HTML-WASM), which then is part of the
+            key as well. Defaults to False.
+
+    Returns:
+        str: The cache key.
+    """
+    import marimo
+
+    parts = [marimo.__version__, sys.version.split()[0], file_hash(notebook_path), *options]
+    for path, digest in data_dependency_hashes(notebook_path):
+        parts += [path, digest]
+    if copies_public:
+        parts += ["public", *_public_hashes(notebook_path)]
+    return text_hash(*parts)
+
+@contextmanager
+def _stats_locked(cache_dir: str):
+    """
+    Holds the lock of the statistics file, against the concurrent exports of
+    this process and, where `fcntl` is available, of other processes sharing
+    the cache directory.
+    """
+    with _stats_thread_lock:
+        try:
+            import fcntl
+        except ImportError:
+            yield
+            return
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(os.path.join(cache_dir, _stats_lock_name), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _update_stats(**counts):
+    with _stats_thread_lock:
+        for name, count in counts.items():
+            session_stats[name] += count
+
+    cache_dir = export_cache_dir()
+    stats_path = os.path.join(cache_dir, _stats_name)
+    try:
+        with _stats_locked(cache_dir):
+            try:
+                with open(stats_path, encoding="utf-8") as f:
+                    stats = json.load(f)
+            except (OSError, ValueError):
+                stats = {}
+            for name, count in counts.items():
+                stats[name] = stats.get(name, 0) + count
+            fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=cache_dir)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(stats, f)
+            os.replace(tmp_path, stats_path)
+    except OSError:
+        pass
+
+def cache_stats() -> dict:
+    """
+    Returns the statistics of the export cache.
+
+    Returns:
+        dict: The total number of hits, misses, stores and evictions over all
+            runs, and the current number of entries and their size in bytes.
+    """
+    cache_dir = export_cache_dir()
+    try:
+        with open(os.path.join(cache_dir, _stats_name), encoding="utf-8") as f:
+            stats = json.load(f)
+    except (OSError, ValueError):
+        stats = {}
+    entries = [name for name in os.listdir(cache_dir) if not name.startswith(".")] if os.path.isdir(cache_dir) else []
+    return {
+        "hits": stats.get("hits", 0),
+        "misses": stats.get("misses", 0),
+        "stores": stats.get("stores", 0),
+        "evictions": stats.get("evictions", 0),
+        "entries": len(entries),
+        "size": sum(dir_size(os.path.join(cache_dir, name)) for name in entries),
+    }
+
+def _place(source: str, files_dir: str, output: str):
+    """
+    Places an exported file at the output path and the files below `files_dir`
+    relative to the output's directory.
+    """
+    link_or_copy(source, output)
+    output_dir = os.path.dirname(output)
+    for root, _, names in os.walk(files_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            if path != source:
+                link_or_copy(path, os.path.join(output_dir, os.path.relpath(path, files_dir)))
+
+def contains(key: str) -> bool:
+    """
+    Checks whether an export is in the cache, without counting a hit or miss.
+    """
+    return os.path.isfile(os.path.join(export_cache_dir(), key, _entry_output))
+
+def restore(key: str, output: str, record: bool=True) -> bool:
+    """
+    Places a cached export at the output path.
+
+    The exported file is placed at `output` and the files the export wrote
+    next to it (assets, `public` folder) are placed relative to its directory.
+    Files are hardlinked or reflinked from the cache when possible.
+
+    Args:
+        key (str): The cache key (see `export_cache_key`).
+        output (str): The path to the output file.
+        record (bool, optional): Whether the lookup counts as a hit or miss.
+            Defaults to True.
+
+    Returns:
+        bool: True on a cache hit, False on a miss.
+    """
+    entry = os.path.join(export_cache_dir(), key)
+    with _used_keys_lock:
+        _used_keys.add(key)
+    if not os.path.isfile(os.path.join(entry, _entry_output)):
+        if record:
+            _update_stats(misses=1)
+        return False
+
+    # Used now, so the evictions of other builds sharing the cache come to it last
+    touch_entry(entry)
+    _place(os.path.join(entry, _entry_output), os.path.join(entry, _entry_files), output)
+    if record:
+        _update_stats(hits=1)
+    return True
+
+def place_work_dir(work_dir: str, output_name: str, output: str):
+    """
+    Places the result of an export from its work directory, for when it could not be stored.
+
+    Args:
+        work_dir (str): The directory the export wrote into.
+        output_name (str): The output file name, relative to `work_dir`.
+        output (str): The path to the output file.
+    """
+    _place(os.path.join(work_dir, output_name), work_dir, output)
+
+def store(key: str, work_dir: str, output_name: str) -> bool:
+    """
+    Adds the result of an export to the cache.
+
+    The export must have written into its own work directory. Its output file
+    and every other file in the directory make up the entry.
+    The entry is assembled next to the cache and renamed into place, then the
+    least recently used entries are evicted to keep the cache under its cap;
+    entries this process restored or stored are kept.
+
+    Args:
+        key (str): The cache key (see `export_cache_key`).
+        work_dir (str): The directory the export wrote into.
+        output_name (str): The output file name, relative to `work_dir`.
+
+    Returns:
+        bool: True if the entry was stored, False otherwise.
+    """
+    cache_dir = export_cache_dir()
+    entry = os.path.join(cache_dir, key)
+    with _used_keys_lock:
+        _used_keys.add(key)
+    if os.path.isdir(entry):
+        return True
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_entry = tempfile.mkdtemp(prefix=".tmp-", dir=cache_dir)
+    try:
+        link_or_copy(os.path.join(work_dir, output_name), os.path.join(tmp_entry, _entry_output))
+        for root, _, names in os.walk(work_dir):
+            for name in names:
+                path = os.path.relpath(os.path.join(root, name), work_dir)
+                if path == output_name:
+                    continue
+                link_or_copy(os.path.join(work_dir, path), os.path.join(tmp_entry, _entry_files, path))
+        try:
+            os.rename(tmp_entry, entry)
+        except OSError:
+            # Another build stored the same export in the meantime
+            if not os.path.isdir(entry):
+                raise
+        touch_entry(entry)
+    except OSError:
+        return False
+    finally:
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+
+    with _used_keys_lock:
+        keep = list(_used_keys)
+    evicted = lru_evict(cache_dir, export_cache_size(), keep=keep)
+    _update_stats(stores=1, evictions=len(evicted))
+    return True
+
+def new_work_dir() -> str:
+    """
+    Creates a temporary directory for an export that is going to be stored.
+
+    It lives inside the cache directory, so storing the result only creates
+    hardlinks. The caller removes it.
+    """
+    cache_dir = export_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    return tempfile.mkdtemp(prefix=".tmp-", dir=cache_dir)
@@ -0,0 +1,418 @@
+"""
+Exports one notebook to several formats from a single load of the notebook.
+
+Run as `python -m marimo_extra.export_runner NOTEBOOK --to FORMAT OUTPUT ...`.
+The notebook is parsed once and, if any requested format needs outputs, run
+once; every format is then rendered from the same session.
+
+With `--profile PATH`, the execution time and peak RSS growth of every cell
+is written to PATH as JSON. With `--cell-cache`, cells whose code and upstream
+cells are unchanged since an earlier export are restored instead of executed.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import argparse
+from pathlib import Path
+
+# Set for the kernel process: the file it appends one JSON line per executed cell to
+PROFILE_RECORDS_ENV = "MARIMO_EXTRA_PROFILE_RECORDS"
+
+# Set for the kernel process: the cell cache directory, the notebook's salt
+# and the file it appends the id of every restored cell to
+CELL_CACHE_ENV = "MARIMO_EXTRA_CELL_CACHE"
+CELL_CACHE_SALT_ENV = "MARIMO_EXTRA_CELL_CACHE_SALT"
+CELL_CACHE_HITS_ENV = "MARIMO_EXTRA_CELL_CACHE_HITS"
+
+# Cells listed as slowest at the end of a profiled export
+slowest_cells_shown = 5
+
+# Formats whose output contains execution results
+executed_formats = ["html"]
+# Formats that reuse execution results when the notebook was run anyway
+output_formats = ["html", "ipynb"]
+wasm_formats = {
+    "html-wasm": None,
+    "html-wasm-run": "run",
+    "html-wasm-edit": "edit",
+}
+runner_formats = ["html", "ipynb", "md", "script", *wasm_formats]
+
+def _cell_preview(code: str, width: int=80) -> str:
+    """
+    Returns the first non-empty line of a cell's code, shortened to `width`.
+    """
+    for line in code.splitlines():
+        if line.strip():
+            line = line.strip()
+            return line if len(line) <= width else line[:width - 3] + "..."
+    return ""
+
+def _patch_executors(wrap_sync, wrap_async):
+    """
+    Replaces the `execute_cell` and `execute_cell_async` methods of marimo's
+    cell executors by `wrap_sync(method)` and `wrap_async(method)`.
+    """
+    import inspect
+    from marimo._runtime import executor
+
+    executor_types = {value if isinstance(value, type) else type(value) for value in executor.EXECUTION_TYPES.values()}
+    for executor_type in executor_types:
+        for name, wrap in [("execute_cell", wrap_sync), ("execute_cell_async", wrap_async)]:
+            attribute = inspect.getattr_static(executor_type, name, None)
+            if attribute is None:
+                continue
+            if isinstance(attribute, staticmethod):
+                setattr(executor_type, name, staticmethod(wrap(attribute.__func__)))
+            else:
+                setattr(executor_type, name, wrap(attribute))
+
+def _cell_arguments(args, kwargs):
+    """
+    Finds the cell, its globals and the dependency graph among the arguments of an executor call.
+    """
+    cell = kwargs.get("cell", next((arg for arg in args if hasattr(arg, "cell_id")), None))
+    glbls = kwargs.get("glbls", next((arg for arg in args if isinstance(arg, dict)), None))
+    graph = kwargs.get("graph", next((arg for arg in args if hasattr(arg, "parents")), None))
+    return cell, glbls, graph
+
+def _install_cell_cache(cache_dir: str, salt: str, hits_path: str):
+    """
+    Wraps marimo's cell executors so that cells whose code and upstream cells
+    are unchanged are not executed; their definitions and output are loaded
+    from the cell cache instead (see `marimo_extra.cell_cache`).
+
+    Runs in the kernel process. Cells are executed in dependency order, so
+    the keys of a cell's parents are known when it runs. Restored cells are
+    appended to `hits_path`, not printed: marimo would capture the message
+    as console output of the cell and publish it with the export.
+    """
+    from marimo_extra import cell_cache
+
+    keys = {}
+
+    def lookup(args, kwargs):
+        cell, glbls, graph = _cell_arguments(args, kwargs)
+        if cell is None or glbls is None:
+            return None, None
+        parents = getattr(graph, "parents", {}).get(cell.cell_id, ())
+        if any(parent not in keys for parent in parents):
+            # A parent did not run successfully, don't trust anything downstream
+            keys.pop(cell.cell_id, None)
+            return None, None
+        key = cell_cache.cell_key(salt, cell.code, [keys[parent] for parent in parents])
+        keys[cell.cell_id] = key
+        return cell, key
+
+    def restore(cell, glbls, key):
+        if not cell_cache.is_cacheable(cell.code):
+            return False, None
+        stored = cell_cache.load(cache_dir, key)
+        if stored is None:
+            return False, None
+        defs, output = stored
+        glbls.update(defs)
+        with open(hits_path, "a", encoding="utf-8") as f:
+            f.write(f"{cell.cell_id}\n")
+        return True, output
+
+    def save(cell, glbls, key, output, seconds):
+        if seconds < cell_cache.min_cell_seconds or not cell_cache.is_cacheable(cell.code):
+            return
+        defs = {name: glbls[name] for name in getattr(cell, "defs", ()) if name in glbls}
+        cell_cache.store(cache_dir, key, defs, output)
+
+    def wrap_sync(func):
+        def execute_cell(*args, **kwargs):
+            cell, key = lookup(args, kwargs)
+            if key is None:
+                return func(*args, **kwargs)
+            glbls = _cell_arguments(args, kwargs)[1]
+            hit, output = restore(cell, glbls, key)
+            if hit:
+                return output
+            start = time.perf_counter()
+            try:
+                output = func(*args, **kwargs)
+            except BaseException:
+                keys.pop(cell.cell_id, None)
+                raise
+            save(cell, glbls, key, output, time.perf_counter() - start)
+            return output
+        return execute_cell
+
+    def wrap_async(func):
+        async def execute_cell_async(*args, **kwargs):
+            cell, key = lookup(args, kwargs)
+            if key is None:
+                return await func(*args, **kwargs)
+            glbls = _cell_arguments(args, kwargs)[1]
+            hit, output = restore(cell, glbls, key)
+            if hit:
+                return output
+            start = time.perf_counter()
+            try:
+                output = await func(*args, **kwargs)
+            except BaseException:
+                keys.pop(cell.cell_id, None)
+                raise
+            save(cell, glbls, key, output, time.perf_counter() - start)
+            return output
+        return execute_cell_async
+
+    _patch_executors(wrap_sync, wrap_async)
+
+def _install_profiler(records_path: str):
+    """
+    Wraps marimo's cell executors so that every executed cell is recorded.
+
+    Runs in the kernel process. Each record has the cell id, a preview of its
+    code, the wall time in seconds, how much the process' peak RSS grew
+    during the cell and the peak RSS after it. Only the peak RSS is sampled,
+    before and after each cell: tracing the allocations would slow the
+    cells down and skew their times.
+    """
+    try:
+        import resource
+        rss_scale = 1 if sys.platform == "darwin" else 1024
+        max_rss = lambda: resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_scale
+    except ImportError:
+        max_rss = lambda: None
+
+    # Executors may call each other, only the outermost call is recorded
+    depth = [0]
+
+    def find_cell(args):
+        return next((arg for arg in args if hasattr(arg, "cell_id")), None)
+
+    def record(cell, start, rss_before):
+        seconds = time.perf_counter() - start
+        rss_after = max_rss()
+        entry = {
+            "cell_id": str(getattr(cell, "cell_id", "")),
+            "code": _cell_preview(getattr(cell, "code", "")),
+            "seconds": round(seconds, 6),
+            "peak_memory": None if rss_after is None else rss_after - rss_before,
+            "max_rss": rss_after,
+        }
+        with open(records_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def wrap_sync(func):
+        def execute_cell(*args, **kwargs):
+            if depth[0]:
+                return func(*args, **kwargs)
+            depth[0] += 1
+            rss_before, start = max_rss(), time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                depth[0] -= 1
+                record(find_cell(args), start, rss_before)
+        return execute_cell
+
+    def wrap_async(func):
+        async def execute_cell_async(*args, **kwargs):
+            if depth[0]:
+                return await func(*args, **kwargs)
+            depth[0] += 1
+            rss_before, start = max_rss(), time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                depth[0] -= 1
+                record(find_cell(args), start, rss_before)
+        return execute_cell_async
+
+    _patch_executors(wrap_sync, wrap_async)
+
+def _write_profile(notebook_path: str, records_path: str, profile_path: str, seconds: float):
+    """
+    Collects the cell records of the kernel into the profile of the notebook.
+    """
+    cells = []
+    if os.path.exists(records_path):
+        with open(records_path, encoding="utf-8") as f:
+            cells = [json.loads(line) for line in f if line.strip()]
+        os.remove(records_path)
+
+    profile = {
+        "notebook": notebook_path,
+        "seconds": round(seconds, 6),
+        "cells_seconds": round(sum(cell["seconds"] for cell in cells), 6),
+        "cells": cells,
+    }
+    _write(profile_path, json.dumps(profile, indent=1))
+
+    print(f"Profiled {len(cells)} cells of {notebook_path} ({profile['cells_seconds']:.2f}s), slowest:")
+    for cell in sorted(cells, key=lambda cell: cell["seconds"], reverse=True)[:slowest_cells_shown]:
+        memory = "" if cell["peak_memory"] is None else f"{cell['peak_memory'] / 1024 ** 2:+8.1f} MiB"
+        print(f"  {cell['seconds']:8.3f}s {memory:>12}  {cell['code']}")
+
+def _load_file_manager(notebook_path: str):
+    """
+    Loads a notebook into a marimo file manager.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+
+    Returns:
+        AppFileManager: The file manager of the loaded notebook.
+    """
+    from marimo._server.file_router import AppFileRouter
+    from marimo._utils.marimo_path import MarimoPath
+
+    file_router = AppFileRouter.from_filename(MarimoPath(notebook_path))
+    file_key = file_router.get_unique_file_key()
+    assert file_key is not None
+    file_manager = file_router.get_file_manager(file_key)
+    file_manager.app.inline_layout_file()
+    return file_manager
+
+def _write(output: str, contents: str):
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(contents)
+
+def _export_wasm(exporter, file_manager, display_config, notebook_path, output, mode, show_code):
+    """
+    Renders an HTML-WASM file and copies the assets and public folder it needs,
+    like `marimo export html-wasm` does.
+    """
+    from marimo._utils.marimo_path import MarimoPath
+
+    out_dir = os.path.dirname(output) or "."
+    exporter.export_assets(out_dir, ignore_index_html=True)
+    Path(out_dir, ".nojekyll").touch()
+    exporter.export_public_folder(out_dir, MarimoPath(notebook_path))
+
+    html, _ = exporter.export_as_wasm(
+        file_manager=file_manager,
+        display_config=display_config,
+        code=file_manager.to_code(),
+        mode=mode,
+        show_code=show_code,
+    )
+    _write(output, html)
+
+async def export_formats(notebook_path: str, targets: list[tuple[str, str]], mode: str="run", show_code: bool=True, sort: str="topological") -> bool:
+    """
+    Exports a notebook to all requested formats from one load of the notebook.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+        targets (list[tuple[str, str]]): The (format, output path) pairs to export.
+        mode (str, optional): The mode of "html-wasm" targets. Defaults to "run".
+        show_code (bool, optional): Whether to include the code. Defaults to True.
+        sort (str, optional): The cell order of "ipynb" targets. Defaults to "topological".
+
+    Returns:
+        bool: True if every cell ran without an unexpected error, False otherwise.
+    """
+    from marimo._config.manager import get_default_config_manager
+    from marimo._server.export import run_app_until_completion
+    from marimo._server.export.exporter import Exporter
+    from marimo._server.models.export import ExportAsHTMLRequest
+
+    file_manager = _load_file_manager(notebook_path)
+    display_config = get_default_config_manager(current_path=file_manager.path).get_config()["display"]
+    exporter = Exporter()
+
+    session_view, did_error = None, False
+    if any(export_format in executed_formats for export_format, _ in targets):
+        session_view, did_error = await run_app_until_completion(file_manager, cli_args={})
+
+    for export_format, output in targets:
+        if export_format == "html":
+            html, _ = exporter.export_as_html(
+                file_manager=file_manager,
+                session_view=session_view,
+                display_config=display_config,
+                request=ExportAsHTMLRequest(include_code=show_code, download=False, files=[]),
+            )
+            _write(output, html)
+        elif export_format == "ipynb":
+            _write(output, exporter.export_as_ipynb(file_manager, sort_mode=sort, session_view=session_view)[0])
+        elif export_format == "md":
+            _write(output, exporter.export_as_md(file_manager)[0])
+        elif export_format == "script":
+            _write(output, exporter.export_as_script(file_manager)[0])
+        elif export_format in wasm_formats:
+            _export_wasm(exporter, file_manager, display_config, notebook_path, output,
+                         wasm_formats[export_format] or mode, show_code)
+        else:
+            raise ValueError(f"Unknown export format: {export_format}")
+        print(f"Exported {notebook_path} to {output} ({export_format})")
+    return not did_error
+
+def main(argv: list[str]=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m marimo_extra.export_runner", description=__doc__)
+    parser.add_argument("notebook")
+    parser.add_argument("--to", nargs=2, action="append", required=True, metavar=("FORMAT", "OUTPUT"))
+    parser.add_argument("--mode", choices=["run", "edit"], default="run")
+    parser.add_argument("--show-code", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--sort", choices=["topological", "top-down"], default="topological")
+    parser.add_argument("--profile", metavar="PATH", help="write a per-cell execution profile to PATH")
+    parser.add_argument("--cell-cache", action="store_true", help="reuse the outputs of unchanged cells")
+    args = parser.parse_args(argv)
+
+    targets = [(export_format, output) for export_format, output in args.to]
+    if args.cell_cache:
+        import marimo
+        from marimo_extra import cell_cache
+        if not cell_cache.marimo_supported(marimo.__version__):
+            low, high = cell_cache.supported_marimo_versions
+            print(f"The cell cache does not support marimo {marimo.__version__} (only {low} up to {high}), executing all cells", file=sys.stderr)
+            args.cell_cache = False
+    if args.cell_cache:
+        cache_dir = cell_cache.cell_cache_dir()
+        salt = cell_cache.notebook_salt(args.notebook)
+        os.environ[CELL_CACHE_ENV] = cache_dir
+        os.environ[CELL_CACHE_SALT_ENV] = salt
+        fd, hits_path = tempfile.mkstemp(prefix="marimo_extra_", suffix=".hits")
+        os.close(fd)
+        os.environ[CELL_CACHE_HITS_ENV] = hits_path
+        _install_cell_cache(cache_dir, salt, hits_path)
+    if args.profile:
+        records_path = os.path.abspath(args.profile + ".records")
+        if os.path.exists(records_path):
+            os.remove(records_path)
+        # Inherited by the kernel process, see the end of this module. The
+        # profiler is installed here as well, for kernels run in this process.
+        os.environ[PROFILE_RECORDS_ENV] = records_path
+        _install_profiler(records_path)
+    start = time.perf_counter()
+    ok = asyncio.run(export_formats(args.notebook, targets, args.mode, args.show_code, args.sort))
+    if args.profile:
+        _write_profile(args.notebook, records_path, args.profile, time.perf_counter() - start)
+    if args.cell_cache:
+        with open(hits_path, encoding="utf-8") as f:
+            hits = [line.strip() for line in f if line.strip()]
+        os.remove(hits_path)
+        if hits:
+            print(f"Restored {len(hits)} cells of {args.notebook} from the cell cache: {', '.join(hits)}")
+        cell_cache.evict(cache_dir)
+    if not ok:
+        print("Export was successful, but some cells failed to execute.", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# marimo runs the kernel in a process started with "spawn", which imports this
+# module as `__mp_main__` before the kernel runs any cell. The profiler is
+# installed last, so it also times the cells restored from the cell cache.
+if __name__ == "__mp_main__" and os.environ.get(CELL_CACHE_ENV):
+    try:
+        _install_cell_cache(os.environ[CELL_CACHE_ENV], os.environ[CELL_CACHE_SALT_ENV], os.environ[CELL_CACHE_HITS_ENV])
+    except Exception as e:
+        print(f"The cell cache is not available: {e}", file=sys.stderr)
+if __name__ == "__mp_main__" and os.environ.get(PROFILE_RECORDS_ENV):
+    try:
+        _install_profiler(os.environ[PROFILE_RECORDS_ENV])
+    except Exception as e:
+        print(f"Cell profiling is not available: {e}", file=sys.stderr)
@@ -0,0 +1,169 @@
+import os
+import re
+import json
+import base64
+import hashlib
+import mimetypes
+from urllib.parse import quote, unquote
+from marimo_extra.cache import parse_size
+
+# Directory of the externalized outputs, relative to the site directory
+assets_dir_name = "_assets"
+
+# Smaller embedded outputs stay in the page, a request costs more than their bytes
+externalize_min_size = "32K"
+
+# Static HTML exports keep the notebook's state in assignments of this object
+_static_state = re.compile(r"window\.__MARIMO_STATIC__\.(notebookState|files)\s*=\s*")
+_data_uri = re.compile(r"data:([\w.+\-]+/[\w.+\-]+)((?:;[\w\-]+=[\w.\-]+)*);base64,([A-Za-z0-9+/]+={0,2})")
+_lazy_img = re.compile(rf"<img\b(?![^<>]*\bloading=)(?=[^<>]*{assets_dir_name}/)")
+
+def _extension(mime: str) -> str:
+    return mimetypes.guess_extension(mime, strict=False) or ".bin"
+
+def _decode_state(value):
+    """
+    Decodes a value of the static state. Marimo stores the outputs of the
+    cells as base64 of their URL-encoded JSON, which its frontend decodes
+    with `JSON.parse(decodeURIComponent(atob(value)))`.
+
+    Returns:
+        tuple: The decoded value, and whether it was encoded.
+    """
+    if isinstance(value, str):
+        try:
+            return json.loads(unquote(base64.b64decode(value, validate=True).decode("utf-8"))), True
+        except ValueError:
+            pass
+    return value, False
+
+def _encode_state(value, encoded: bool):
+    if encoded:
+        # As marimo's `uri_encode_component`, the equivalent of `encodeURIComponent`
+        return base64.b64encode(quote(json.dumps(value), safe="~()*!.'").encode("utf-8")).decode("ascii")
+    return value
+
+def _script_json(value) -> str:
+    # As marimo's `json_script`: the JSON must not end the <script> element
+    return json.dumps(value, separators=(",", ":")).replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+
+def _map_strings(value, func):
+    """
+    Applies a function to every string in a JSON value.
+    """
+    if isinstance(value, str):
+        return func(value)
+    if isinstance(value, list):
+        return [_map_strings(item, func) for item in value]
+    if isinstance(value, dict):
+        return {key: _map_strings(item, func) for key, item in value.items()}
+    return value
+
+def externalize_outputs(page_path: str, site_dir: str, min_size: str | int=externalize_min_size) -> list[str]:
+    """
+    Moves the large embedded outputs of a static HTML export into files.
+
+    A static HTML export of marimo embeds the output of every cell, encoded,
+    in `window.__MARIMO_STATIC__.notebookState.cellOutputs`: images and
+    plots as `data:` URIs in HTML or mimebundle outputs, the rows of tables
+    as `data:` URIs in their `data-data` attribute. Exports downloaded from
+    the editor may also embed the data of tables and charts as virtual files
+    (`./@file/...`) in `window.__MARIMO_STATIC__.files`. The outputs are
+    decoded, and every `data:` URI in them and every virtual file decoding
+    to at least `min_size` bytes is written to `_assets/<sha256>.<ext>` in
+    the site directory and replaced by a relative URL. The page gets
+    smaller, and outputs shared by several pages are downloaded and cached
+    once. Images are marked `loading=lazy`, so they are fetched when
+    scrolled into view; tables and charts fetch their data from the URL when
+    they are rendered, as in a running notebook. Other outputs, e.g. JSON,
+    are rendered from the page itself and stay in it.
+
+    Args:
+        page_path (str): The path to the exported HTML file.
+        site_dir (str): The site directory the page belongs to.
+        min_size (str | int): The smallest output to externalize, in bytes or
+            a human readable size. Defaults to "32K".
+
+    Returns:
+        list[str]: The written files, relative to the site directory.
+    """
+    min_size = parse_size(min_size)
+    with open(page_path, encoding="utf-8") as f:
+        page = f.read()
+    page_dir = os.path.dirname(page_path)
+    written = []
+
+    values = {}
+    decoder = json.JSONDecoder()
+    for match in _static_state.finditer(page):
+        try:
+            value, end = decoder.raw_decode(page, match.end())
+        except ValueError:
+            continue
+        values[match.group(1)] = (match.end(), end, value)
+    if "notebookState" not in values:
+        return []
+
+    def write_asset(data: bytes, mime: str) -> str:
+        name = hashlib.sha256(data).hexdigest()[:32] + _extension(mime)
+        path = os.path.join(site_dir, assets_dir_name, name)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        written.append(os.path.join(assets_dir_name, name))
+        return os.path.relpath(path, page_dir).replace(os.sep, "/")
+
+    def replace_data_uri(match):
+        payload = match.group(3)
+        if len(payload) * 3 // 4 < min_size:
+            return match.group(0)
+        try:
+            data = base64.b64decode(payload, validate=True)
+        except ValueError:
+            return match.group(0)
+        return write_asset(data, match.group(1))
+
+    # Virtual files: moved out of the page, their references point to the file instead
+    moved = {}
+    files = values["files"][2] if "files" in values else {}
+    if isinstance(files, dict):
+        for virtual_path, url in list(files.items()):
+            match = _data_uri.fullmatch(url) if isinstance(url, str) else None
+            if match is None:
+                continue
+            url = replace_data_uri(match)
+            if url != match.group(0):
+                moved[virtual_path] = url
+                del files[virtual_path]
+    references = re.compile(r"\.?(" + "|".join(re.escape(path) for path in moved) + r")(?![\w.\-])") if moved else None
+
+    def externalize_string(text: str) -> str:
+        changed = _data_uri.sub(replace_data_uri, text)
+        if references is not None:
+            changed = references.sub(lambda match: moved[match.group(1)], changed)
+        return changed if changed == text else _lazy_img.sub("<img loading=lazy", changed)
+
+    state = values["notebookState"][2]
+    if not isinstance(state, dict) or not isinstance(state.get("cellOutputs"), dict):
+        return []
+    for cell_id, value in state["cellOutputs"].items():
+        output, encoded = _decode_state(value)
+        state["cellOutputs"][cell_id] = _encode_state(_map_strings(output, externalize_string), encoded)
+    if not written:
+        return []
+
+    replacements = {"notebookState": state}
+    if moved:
+        replacements["files"] = files
+    for name, (start, end, _) in sorted(values.items(), key=lambda item: -item[1][0]):
+        if name in replacements:
+            page = page[:start] + _script_json(replacements[name]) + page[end:]
+
+    # The page may be hardlinked to the export cache
+    tmp_path = page_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(page)
+    os.replace(tmp_path, page_path)
+    return sorted(set(written))
@@ -0,0 +1,130 @@
+import os
+import re
+from marimo_extra.transport import read_text
+
+# The prerendered gallery is published next to the index CSV file
+gallery_html_name = "gallery.html"
+
+# Page of the site the gallery is prerendered into, relative to the site directory
+home_page = "index.html"
+
+# Vertical gap between the cards, as in the default view of `ui.Gallery`
+gallery_gap = 2
+
+_root_div = re.compile(r"<div id=[\"']root[\"']>")
+_prerendered = re.compile(r"<!-- marimo-extra-gallery -->.*?<!-- /marimo-extra-gallery -->", re.DOTALL)
+
+def gallery_html(cards: list[dict]) -> str:
+    """
+    Renders the default view of `ui.Gallery` to static HTML.
+
+    Args:
+        cards (list[dict]): The cards, as returned by `index_csv_to_dict`.
+
+    Returns:
+        str: The HTML of the cards, stacked vertically.
+    """
+    import marimo as mo
+    from marimo_extra.ui import _get_cards
+
+    return f"<div class=\"marimo-extra-gallery\">{mo.vstack(_get_cards(cards), gap=gallery_gap).text}</div>"
+
+def write_gallery_html(
+    index_csv_path: str="public/index.csv",
+    output: str=None,
+    filter_out_data: dict[str, list[str]]={"Name": ["Home"]},
+    ) -> bool:
+    """
+    Writes the gallery of the notebooks in an index CSV file as static HTML, at build time.
+
+    The cards are rendered with `ui.card`, like the default view of
+    `ui.Gallery`, so the home page can show them before Pyodide has started
+    (see `prerender_home_gallery`).
+
+    Args:
+        index_csv_path (str): The path to the "index.csv" file. Defaults to "public/index.csv".
+        output (str, optional): The path to the gallery. Defaults to
+            "gallery.html" next to the index CSV file.
+        filter_out_data (dict): The rows left out of the gallery, see
+            `NotebookIndex.filter_out`. Defaults to the 'Home' row.
+
+    Returns:
+        bool: True if the gallery was written, False otherwise.
+    """
+    from marimo_extra.log import get_logger
+    from marimo_extra.utils import index_csv_to_dict
+
+    logger = get_logger(__name__)
+    if not os.path.exists(index_csv_path):
+        logger.warning(f"No index.csv file found at {index_csv_path}. Gallery will be skipped.")
+        return False
+    if output is None:
+        output = os.path.join(os.path.dirname(index_csv_path), gallery_html_name)
+
+    cards = index_csv_to_dict(home_dir="", index_csv_path=index_csv_path, filter_out_data=filter_out_data)
+    tmp_path = output + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(gallery_html(cards))
+    os.replace(tmp_path, output)
+    logger.info(f"[green]Rendered[end] {len(cards)} cards into [blue]{output}[end]")
+    return True
+
+def prerender_home_gallery(output_dir: str, index_csv_path: str) -> bool:
+    """
+    Puts the prerendered gallery into the root element of the site's home
+    page, a post-process of the build pipeline.
+
+    The gallery is shown as soon as the page is loaded and is replaced by the
+    notebook once marimo has started. A gallery put in by an earlier run is
+    replaced.
+
+    Args:
+        output_dir (str): The site directory.
+        index_csv_path (str): The path to the "index.csv" file, next to the gallery.
+
+    Returns:
+        bool: True on success, also when there is no home page or gallery.
+    """
+    gallery_path = os.path.join(os.path.dirname(index_csv_path), gallery_html_name)
+    page_path = os.path.join(output_dir, home_page)
+    if not os.path.exists(gallery_path) or not os.path.exists(page_path):
+        return True
+
+    with open(gallery_path, encoding="utf-8") as f:
+        gallery = f.read()
+    with open(page_path, encoding="utf-8") as f:
+        page = f.read()
+    page = _prerendered.sub("", page)
+    match = _root_div.search(page)
+    if match is None:
+        return True
+    page = f"{page[:match.end()]}<!-- marimo-extra-gallery -->{gallery}<!-- /marimo-extra-gallery -->{page[match.end():]}"
+
+    # The page may be hardlinked to the previous site or the export cache
+    tmp_path = page_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(page)
+    os.replace(tmp_path, page_path)
+    return True
+
+_gallery_html_cache = {}
+
+def load_gallery_html(home_dir: str, gallery_html_path: str=os.path.join("public", gallery_html_name)) -> str | None:
+    """
+    Loads the gallery prerendered by the build, once per session.
+
+    Args:
+        home_dir (str): The base directory or URL of the site.
+        gallery_html_path (str): The path to the gallery relative to the home
+            directory. Defaults to 'public/gallery.html'.
+
+    Returns:
+        str | None: The HTML of the gallery, or None if it is not available.
+    """
+    path = os.path.join(str(home_dir), gallery_html_path)
+    if path not in _gallery_html_cache:
+        try:
+            _gallery_html_cache[path] = read_text(path)
+        except Exception:
+            _gallery_html_cache[path] = None
+    return _gallery_html_cache[path]
@@ -0,0 +1,204 @@
+import io
+import os
+import csv
+from marimo_extra.transport import read_text
+
+index_columns = ["Name", "NB_Path", "HTML_Path", "Type", "Thumbnail", "Tags"]
+
+class IndexRecord:
+    """
+    One row of an index CSV file.
+
+    The standard columns are stored in slots; any other columns of the file
+    are kept in `extra`.
+    """
+    __slots__ = (*index_columns, "extra")
+
+    def __init__(self, Name="", NB_Path="", HTML_Path="", Type="", Thumbnail="", Tags="", extra=None):
+        self.Name = Name
+        self.NB_Path = NB_Path
+        self.HTML_Path = HTML_Path
+        self.Type = Type
+        self.Thumbnail = Thumbnail
+        self.Tags = Tags
+        self.extra = extra
+
+    def get(self, column: str, default: str="") -> str:
+        """
+        Returns the value of a column, or `default` if the row does not have it.
+        """
+        if column in index_columns:
+            return getattr(self, column)
+        if self.extra is not None:
+            return self.extra.get(column, default)
+        return default
+
+    def __repr__(self):
+        return f"IndexRecord({', '.join(f'{column}={getattr(self, column)!r}' for column in index_columns)})"
+
+class NotebookIndex:
+    """
+    The notebooks listed in an index CSV file, parsed with the `csv` module.
+
+    Filtering and search return new indexes that share the record objects,
+    so they are cheap enough to run on every keystroke of a search box.
+    """
+    __slots__ = ("records",)
+
+    def __init__(self, records: list[IndexRecord]=None):
+        self.records = [] if records is None else records
+
+    @classmethod
+    def from_text(cls, text: str) -> "NotebookIndex":
+        """
+        Parses the contents of an index CSV file.
+
+        Args:
+            text (str): The CSV text, with a header row.
+
+        Returns:
+            NotebookIndex: The parsed index. Empty cells become empty strings.
+        """
+        reader = csv.reader(io.StringIO(text))
+        header = next(reader, [])
+        slots = [(i, column) for i, column in enumerate(header) if column in index_columns]
+        others = [(i, column) for i, column in enumerate(header) if column not in index_columns]
+
+        records = []
+        for row in reader:
+            if not row:
+                continue
+            row += [""] * (len(header) - len(row))
+            record = IndexRecord(**{column: row[i] for i, column in slots})
+            if others:
+                record.extra = {column: row[i] for i, column in others}
+            records.append(record)
+        return cls(records)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "NotebookIndex":
+        """
+        Reads an index CSV file from a local path or URL.
+
+        Args:
+            path (str): The path or URL of the CSV file.
+
+        Returns:
+            NotebookIndex: The parsed index.
+        """
+        return cls.from_text(read_text(path))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def filter_out(self, filter_out_data: dict[str, list[str]]) -> "NotebookIndex":
+        """
+        Removes the rows whose column values are listed in `filter_out_data`.
+
+        Args:
+            filter_out_data (dict[str, list[str]]): A mapping of column name to
+                the values to filter out, e.g. {"Name": ["Home"]}.
+
+        Returns:
+            NotebookIndex: The remaining rows.
+        """
+        records = self.records
+        for column, values in filter_out_data.items():
+            values = set(values)
+            records = [record for record in records if record.get(column) not in values]
+        return NotebookIndex(records)
+
+    def search(self, search: str, column: str="Name") -> "NotebookIndex":
+        """
+        Keeps the rows whose `column` contains `search`, ignoring case.
+
+        Args:
+            search (str): The text to search for. An empty string keeps all rows.
+            column (str): The column to search in. Defaults to "Name".
+
+        Returns:
+            NotebookIndex: The matching rows.
+        """
+        if search == "":
+            return self
+        search = search.casefold()
+        return NotebookIndex([record for record in self.records if search in record.get(column).casefold()])
+
+    def select(self, values: list[str], column: str="HTML_Path") -> "NotebookIndex":
+        """
+        Keeps the rows whose `column` is one of `values`, in the order of `values`.
+
+        Args:
+            values (list[str]): The values to keep, e.g. ranked search results.
+            column (str): The column to match. Defaults to "HTML_Path".
+
+        Returns:
+            NotebookIndex: The selected rows.
+        """
+        by_value = {}
+        for record in self.records:
+            by_value.setdefault(record.get(column), []).append(record)
+        return NotebookIndex([record for value in dict.fromkeys(values) for record in by_value.get(value, [])])
+
+    def to_dicts(self, index_to_dict_names: dict[str, str]) -> list[dict]:
+        """
+        Converts the rows to dictionaries, e.g. for `ui.Gallery`.
+
+        Args:
+            index_to_dict_names (dict[str, str]): A mapping of column name to
+                dictionary key.
+
+        Returns:
+            list[dict]: One dictionary per row.
+        """
+        return [
+            {key: record.get(column) for column, key in index_to_dict_names.items()}
+            for record in self.records
+        ]
+
+    def to_nav_dict(self, home_dir: str, index_names: dict[str, str]) -> dict[str, str]:
+        """
+        Converts the rows to a navigation dictionary for `mo.nav_menu`.
+
+        Args:
+            home_dir (str): The base directory or URL the links are joined to.
+            index_names (dict[str, str]): A mapping with the 'name' and 'link'
+                column names.
+
+        Returns:
+            dict[str, str]: A mapping of full link to name.
+        """
+        return {
+            os.path.join(home_dir, record.get(index_names['link'])): record.get(index_names['name'])
+            for record in self.records
+        }
+
+_index_cache = {}
+
+def load_index(path: str) -> NotebookIndex:
+    """
+    Loads an index CSV file, parsing it only once per session.
+
+    Local files are parsed again when their modification time changes;
+    remote files are parsed once.
+
+    Args:
+        path (str): The path or URL of the CSV file.
+
+    Returns:
+        NotebookIndex: The parsed index.
+    """
+    version = None
+    if not path.startswith(("http://", "https://")):
+        version = os.stat(path).st_mtime_ns
+
+    cached = _index_cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    index = NotebookIndex.from_csv(path)
+    _index_cache[path] = (version, index)
+    return index
@@ -0,0 +1,208 @@
+import os
+import re
+import sys
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+
+LOG_LEVEL_ENV = "MARIMO_EXTRA_LOG_LEVEL"
+LOG_JSON_ENV = "MARIMO_EXTRA_LOG_JSON"
+
+root_logger_name = "marimo_extra"
+
+color = {
+    "red": "\033[31m",
+    "green": "\033[32m",
+    "yellow": "\033[33m",
+    "blue": "\033[34m",
+    "magenta": "\033[35m",
+    "cyan": "\033[36m",
+    "white": "\033[37m",
+    "end": "\033[0m",
+    "bold": "\033[1m",
+    "underline": "\033[4m",
+    "italic": "\033[3m",
+}
+
+_tag = re.compile(r"\[(" + "|".join(color) + r")\]")
+
+# The running queue listener, if output is handed to a background thread
+_listener = None
+
+def render(message: str, use_color: bool=True) -> str:
+    """
+    Replaces the color and style tags of a message (e.g. "[red]", "[end]")
+    with terminal escape codes, or removes them.
+
+    Args:
+        message (str): The message containing color and style tags.
+        use_color (bool, optional): Whether to emit escape codes. Defaults to True.
+
+    Returns:
+        str: The rendered message.
+    """
+    if use_color:
+        return _tag.sub(lambda match: color[match.group(1)], message)
+    return _tag.sub("", message)
+
+def stream_supports_color(stream) -> bool:
+    """
+    Decides whether escape codes are written to a stream.
+
+    `NO_COLOR` (any value) disables colors and `FORCE_COLOR` enables them;
+    otherwise colors are used if the stream is a terminal.
+    """
+    if os.environ.get("NO_COLOR"):
+        return False
+    if os.environ.get("FORCE_COLOR"):
+        return True
+    isatty = getattr(stream, "isatty", None)
+    try:
+        return bool(isatty and isatty())
+    except ValueError:
+        return False
+
+class TagFormatter(logging.Formatter):
+    """
+    Formats a record as its message with the color tags rendered.
+    """
+    def __init__(self, use_color: bool=True):
+        super().__init__()
+        self.use_color = use_color
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = render(record.getMessage(), self.use_color)
+        if record.exc_info:
+            message += "\n" + self.formatException(record.exc_info)
+        return message
+
+_record_attributes = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object per line, without color tags.
+
+    Fields passed with `extra=` (e.g. `extra={"notebook": path}`) are included.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": render(record.getMessage(), use_color=False),
+        }
+        for key, value in vars(record).items():
+            if key not in _record_attributes and not key.startswith("_"):
+                entry[key] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+def _threads_available() -> bool:
+    # Pyodide (marimo in the browser) cannot start threads
+    return sys.platform != "emscripten"
+
+def setup_logging(level=None, json_path: str=None, use_color: bool=None, stream=None):
+    """
+    Configures the `marimo_extra` logger.
+
+    Messages go to stdout with their color tags rendered. Outside the browser
+    they are handed to a background thread through a queue, so export workers
+    never block on the terminal and lines of different workers never mix.
+    Called automatically on first use with the environment defaults; calling
+    it again replaces the configuration.
+
+    Args:
+        level (int | str, optional): The lowest level that is output. Defaults
+            to `MARIMO_EXTRA_LOG_LEVEL` or "INFO".
+        json_path (str, optional): A file that additionally receives every
+            record as a JSON line. Defaults to `MARIMO_EXTRA_LOG_JSON`, if set.
+        use_color (bool, optional): Whether escape codes are written. Defaults
+            to detecting a terminal (see `stream_supports_color`).
+        stream (file, optional): The output stream. Defaults to stdout.
+
+    Returns:
+        logging.Logger: The `marimo_extra` logger.
+    """
+    global _listener
+
+    if level is None:
+        level = os.environ.get(LOG_LEVEL_ENV, "INFO")
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            level = logging.INFO
+    if json_path is None:
+        json_path = os.environ.get(LOG_JSON_ENV) or None
+    if stream is None:
+        stream = sys.stdout
+    if use_color is None:
+        use_color = stream_supports_color(stream)
+
+    handlers = []
+    console = logging.StreamHandler(stream)
+    console.setFormatter(TagFormatter(use_color))
+    handlers.append(console)
+    if json_path is not None:
+        os.makedirs(os.path.dirname(json_path) or ".", exist_ok=True)
+        json_handler = logging.FileHandler(json_path, encoding="utf-8")
+        json_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(json_handler)
+
+    logger = logging.getLogger(root_logger_name)
+    _shutdown()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.setLevel(level)
+    logger.propagate = False
+
+    if _threads_available():
+        records = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(records))
+        _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+    return logger
+
+def _shutdown():
+    """
+    Stops the background thread after it has written all queued messages.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(_shutdown)
+
+def flush():
+    """
+    Waits until all queued messages have been written, e.g. before handing
+    the terminal to a server.
+    """
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+
+def get_logger(name: str=root_logger_name) -> logging.Logger:
+    """
+    Returns a logger below the `marimo_extra` logger, configuring it on first use.
+
+    Args:
+        name (str, optional): The logger name, usually `__name__`. Defaults to "marimo_extra".
+
+    Returns:
+        logging.Logger: The logger.
+    """
+    if not logging.getLogger(root_logger_name).handlers:
+        setup_logging()
+    if name != root_logger_name and not name.startswith(root_logger_name + "."):
+        name = f"{root_logger_name}.{name}"
+    return logging.getLogger(name)
@@ -1,13 +1,20 @@
 import os
-import subprocess
+import sys
 import shutil
-from marimo_extra.utils import rich_print
+import hashlib
+import subprocess
+from marimo_extra.log import get_logger
+from marimo_extra.cache import link_or_copy
+from marimo_extra.sandbox_env import sandbox_python
+import marimo_extra.export_cache as export_cache
+
+logger = get_logger(__name__)
 
 try:
     import marimo
 except ImportError:
-    rich_print("[red]Error:[end] Python [green][italic]Marimo[end] Library is not installed!")
-    rich_print("Please install it with \"[italic][yellow] uv add marimo [end]\" or \"[italic] pip install marimo [end]\" command.")
+    logger.error("[red]Error:[end] Python [green][italic]Marimo[end] Library is not installed!")
+    logger.error("Please install it with \"[italic][yellow] uv add marimo [end]\" or \"[italic] pip install marimo [end]\" command.")
     exit(1)
 
 format_ext = {
@@ -18,6 +25,27 @@ format_ext = {
     "md": ".md",
 }
 
+# Export logs, next to the pipeline state of the project
+logs_dir = os.path.join(".marimo_extra", "logs")
+
+# Lines of a failed export's log that are printed
+error_tail_lines = 40
+
+# Peak RSS in bytes of the export commands run for a notebook, by notebook path
+export_peak_rss = {}
+
+# Default extensions when one notebook is exported to several formats at once,
+# chosen so that outputs of different formats never overwrite each other
+multi_format_ext = {
+    "html": ".html",
+    "html-wasm": ".wasm.html",
+    "html-wasm-run": ".wasm.html",
+    "html-wasm-edit": ".edit.html",
+    "script": ".script.py",
+    "ipynb": ".ipynb",
+    "md": ".md",
+}
+
 def _get_xcmd_html(cmd, sandbox, show_code):
     """
     Modify the export command to generate an HTML file.
@@ -150,58 +178,478 @@ def get_export_cmd(
 
     return cmd
 
-def _html_copy_process(notebook_path, output, saved_html_path=None):
+def _saved_html_path(notebook_path):
+    """
+    Returns the path of the HTML file marimo saves next to a notebook in `__marimo__`.
+    """
+    return os.path.join(os.path.dirname(notebook_path),"__marimo__",os.path.basename(notebook_path).replace(".py", ".html"))
+
+def _saved_html_code_hash(saved_html_path, chunk_size=1 << 16):
+    """
+    Reads the code hash marimo embeds in a saved HTML file.
+
+    The file is scanned in chunks and reading stops as soon as the
+    `<marimo-code-hash>` element has been found.
+
+    Args:
+        saved_html_path (str): The path to the saved HTML file.
+        chunk_size (int, optional): The read size in characters. Defaults to 64 KiB.
+
+    Returns:
+        str: The SHA-256 hex digest of the notebook code, or None if the file has no code hash.
+    """
+    start_tag, end_tag = '<marimo-code-hash hidden="">', "</marimo-code-hash>"
+    buffer = ""
+    with open(saved_html_path, encoding="utf-8", errors="replace") as f:
+        for chunk in iter(lambda: f.read(chunk_size), ""):
+            buffer += chunk
+            start = buffer.find(start_tag)
+            if start != -1:
+                end = buffer.find(end_tag, start)
+                if end != -1:
+                    return buffer[start + len(start_tag):end].strip()
+                buffer = buffer[start:]
+            else:
+                buffer = buffer[-len(start_tag):]
+    return None
+
+def _code_hash(code):
+    """
+    Hashes notebook code the same way marimo does for `<marimo-code-hash>`.
+    """
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+def is_saved_html_fresh(notebook_path, saved_html_path=None, freshness="hash"):
+    """
+    Checks whether the HTML file saved by marimo is up to date with the notebook source.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+        saved_html_path (str, optional): The path to the saved HTML file. Defaults to
+            `__marimo__/<name>.html` next to the notebook.
+        freshness (str, optional): How freshness is checked. Defaults to "hash".
+            Choices:
+                - "hash": The code hash embedded in the saved HTML must match the
+                    notebook source; falls back to "mtime" if there is no hash.
+                - "mtime": The saved HTML must not be older than the notebook.
+                - "none": The saved HTML is always considered fresh.
+
+    Returns:
+        bool: True if the saved HTML is fresh, False if it is stale or missing.
+    """
+    if freshness not in ["mtime", "hash", "none"]:
+        raise ValueError("freshness must be either 'mtime', 'hash' or 'none'")
+    if saved_html_path is None:
+        saved_html_path = _saved_html_path(notebook_path)
+
+    if not os.path.exists(saved_html_path):
+        return False
+    if freshness == "none":
+        return True
+
+    if freshness == "hash":
+        code_hash = _saved_html_code_hash(saved_html_path)
+        if code_hash is not None:
+            with open(notebook_path, encoding="utf-8") as f:
+                return code_hash == _code_hash(f.read())
+
+    return os.path.getmtime(saved_html_path) >= os.path.getmtime(notebook_path)
+
+def _html_copy_process(notebook_path, output, saved_html_path=None, freshness="hash"):
     """
-    Copies a saved HTML file to the specified output path.
+    Places a saved HTML file at the specified output path.
+
+    The saved file is hardlinked (or reflinked) instead of copied when the
+    filesystem allows it, and only if it is fresh with respect to the notebook.
 
     Args:
         notebook_path (str): The path to the notebook file.
         output (str): The path to the output file.
         saved_html_path (str, optional): The path to the saved HTML file to copy. Defaults to None.
+        freshness (str, optional): How freshness is checked, see `is_saved_html_fresh`.
+            Defaults to "hash".
 
     Returns:
-        bool: True if the copy was successful, False otherwise.
+        bool | None: True if the file was placed, False if it failed, None if
+            the saved HTML is stale.
     """
     
     if saved_html_path is None:
-        saved_html_path = os.path.join(os.path.dirname(notebook_path),"__marimo__",os.path.basename(notebook_path).replace(".py", ".html"))
+        saved_html_path = _saved_html_path(notebook_path)
     
     if os.path.exists(saved_html_path):
+        if not is_saved_html_fresh(notebook_path, saved_html_path, freshness):
+            logger.warning(f"[yellow]Warning:[end] Saved HTML is out of date with the notebook: {saved_html_path}")
+            return None
         try:
-            shutil.copy(saved_html_path, output)
-            rich_print(f"[green]Successfully Copied[end] {saved_html_path} to {output}")
+            how = link_or_copy(saved_html_path, output)
+            logger.info(f"[green]Successfully Copied[end] {saved_html_path} to {output} ({how})")
             return True
         except Exception as e:
-            rich_print(f"[red]Unexpected error exporting[end] {notebook_path}: {e}")
+            logger.error(f"[red]Unexpected error exporting[end] {notebook_path}: {e}")
             return False
     else:
-        rich_print(f"[red]Error:[end] File not found: {saved_html_path}")
+        logger.error(f"[red]Error:[end] File not found: {saved_html_path}")
         return False
 
-def _export_with_cmd(cmd, notebook_path, output):
+def _sandbox_cached_cmd(cmd, notebook_path):
+    """
+    Replaces the `--sandbox` flag of an export command with a cached sandbox environment.
+
+    Instead of letting marimo resolve and install a fresh environment for every
+    export, the command is run with the Python interpreter of a cached
+    environment that matches the notebook's dependency block.
+
+    Args:
+        cmd (list[str]): The export command.
+        notebook_path (str): The path to the notebook file.
+
+    Returns:
+        list[str]: The command running in the cached environment, or the
+            unchanged command if no cached environment is available.
+    """
+    if "--sandbox" not in cmd:
+        return cmd
+
+    python = sandbox_python(notebook_path)
+    if python is None:
+        return cmd
+    return [python, "-m"] + [arg for arg in cmd if arg != "--sandbox"]
+
+def export_log_path(notebook_path: str, export_format: str) -> str:
+    """
+    Returns the log file of a notebook's export, below `.marimo_extra/logs`.
+
+    The log mirrors the notebook path, e.g. `notebooks/penguins.py` exported
+    to HTML logs to `.marimo_extra/logs/notebooks/penguins.py.html.log`.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+        export_format (str): The export format, or "multi" for multi-format exports.
+
+    Returns:
+        str: The path to the log file.
+    """
+    relative = os.path.relpath(notebook_path)
+    if relative.startswith(os.pardir):
+        relative = os.path.basename(notebook_path)
+    return os.path.join(logs_dir, f"{relative}.{export_format}.log")
+
+def export_logs(notebook_path: str) -> list[str]:
+    """
+    Lists the export logs of a notebook.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+
+    Returns:
+        list[str]: The paths to the log files.
+    """
+    prefix = export_log_path(notebook_path, "")[:-len(".log")]
+    log_dir = os.path.dirname(prefix)
+    if not os.path.isdir(log_dir):
+        return []
+    logs = []
+    for name in sorted(os.listdir(log_dir)):
+        path = os.path.join(log_dir, name)
+        if path.startswith(prefix) and name.endswith(".log"):
+            logs.append(path)
+    return logs
+
+def _log_tail(log_path: str, lines: int=error_tail_lines, max_bytes: int=1 << 16) -> list[str]:
+    """
+    Reads the last lines of a log file, without reading more than `max_bytes` of it.
+    """
+    with open(log_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - max_bytes))
+        return f.read().decode("utf-8", errors="replace").splitlines()[-lines:]
+
+def _run_measured(cmd, log) -> tuple[int, int | None]:
+    """
+    Runs a command and measures its peak RSS, including the processes it
+    waited for (e.g. marimo's kernel).
+
+    Returns:
+        tuple[int, int | None]: The return code and the peak RSS in bytes, or
+            None where it cannot be measured.
+    """
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT)
+    if not hasattr(os, "wait4"):
+        return process.wait(), None
+    try:
+        _, status, usage = os.wait4(process.pid, 0)
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    # Keep Popen from waiting for the reaped process again
+    process.returncode = os.waitstatus_to_exitcode(status)
+    rss_scale = 1 if sys.platform == "darwin" else 1024
+    return process.returncode, usage.ru_maxrss * rss_scale
+
+def _export_with_cmd(cmd, notebook_path, output, export_format):
     """
     Runs a command to export a notebook.
 
+    The output of the command is written straight to the export's log file
+    (see `export_log_path`) instead of being collected in memory. If the
+    export fails, the last lines of the log are printed. The peak RSS of the
+    command is kept in `export_peak_rss`.
+
     Args:
         cmd (list[str]): The command to run.
         notebook_path (str): The path to the notebook file.
         output (str): The path to the output file.
+        export_format (str): The export format the log is named after, or
+            "multi" for multi-format exports.
 
     Returns:
         bool: True if the export was successful, False otherwise.
     """
+    log_path = export_log_path(notebook_path, export_format)
     try:
-        subprocess.run(cmd, capture_output=True, text=True, check=True)
-        rich_print(f"[green]Successfully Exported[end] {notebook_path} to {output}")
-        return True
-    except subprocess.CalledProcessError as e:
-        rich_print(f"[red]Error exporting {notebook_path}[end]:")
-        print(e.stderr)
-        return False
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        with open(log_path, "w", encoding="utf-8") as log:
+            log.write(f"$ {' '.join(cmd)}\n")
+            log.flush()
+            returncode, peak_rss = _run_measured(cmd, log)
+        if peak_rss is not None:
+            export_peak_rss[notebook_path] = max(export_peak_rss.get(notebook_path, 0), peak_rss)
     except Exception as e:
-        rich_print(f"[red]Unexpected error exporting[end] {notebook_path}: {e}")
+        logger.error(f"[red]Unexpected error exporting[end] {notebook_path}: {e}")
         return False
 
+    if returncode != 0:
+        logger.error(f"[red]Error exporting {notebook_path}[end] (exit code {returncode}):")
+        logger.error("\n".join(_log_tail(log_path)))
+        logger.error(f"Full log: [blue]{log_path}[end]")
+        return False
+    logger.info(f"[green]Successfully Exported[end] {notebook_path} to {output}")
+    return True
+
+def profile_path(output: str) -> str:
+    """
+    Returns the path of the cell profile written next to a profiled export.
+    """
+    return output + ".profile.json"
+
+def _cache_options(cmd, notebook_path, output):
+    """
+    Returns the options of an export command that decide its result, i.e.
+    without the notebook and output paths.
+    """
+    return [arg for arg in cmd[2:] if arg not in [notebook_path, "-o", output, "--no-watch"]]
+
+def _cached_export(cmd, notebook_path, output, sandbox_cache=True, export_format=None):
+    """
+    Runs an export command through the shared export cache.
+
+    On a hit the cached result is placed at the output path without running
+    marimo. On a miss the command exports into a work directory inside the
+    cache, the result is stored and then placed at the output path.
+
+    Args:
+        cmd (list[str]): The export command (see `get_export_cmd`).
+        notebook_path (str): The path to the notebook file.
+        output (str): The path to the output file.
+        sandbox_cache (bool, optional): Whether a sandboxed export runs in a
+            cached environment. Defaults to True.
+        export_format (str, optional): The export format, for commands other
+            than `marimo export`. Defaults to the format of the command.
+
+    Returns:
+        bool: True if the export was successful, False otherwise.
+    """
+    export_format = export_format or cmd[2]
+    key = export_cache.export_cache_key(notebook_path, _cache_options(cmd, notebook_path, output), export_format == "html-wasm")
+    if export_cache.restore(key, output):
+        logger.info(f"[green]Restored[end] {notebook_path} to {output} from the export cache")
+        return True
+
+    try:
+        work_dir = export_cache.new_work_dir()
+    except OSError as e:
+        logger.warning(f"[yellow]Warning:[end] Export cache not writable, exporting without it: {e}")
+        return _export_with_cmd(_sandbox_cached_cmd(cmd, notebook_path) if sandbox_cache else cmd, notebook_path, output, export_format)
+
+    try:
+        output_name = os.path.basename(output)
+        work_cmd = [os.path.join(work_dir, output_name) if arg == output else arg for arg in cmd]
+        if sandbox_cache:
+            work_cmd = _sandbox_cached_cmd(work_cmd, notebook_path)
+        if not _export_with_cmd(work_cmd, notebook_path, output, export_format):
+            return False
+        if export_cache.store(key, work_dir, output_name):
+            export_cache.restore(key, output, record=False)
+        else:
+            export_cache.place_work_dir(work_dir, output_name, output)
+        return True
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def get_multi_export_cmd(
+    notebook_path: str, outputs: dict[str, str],
+    mode:str="run",             # run, edit
+    show_code:bool=True,
+    sort:str="topological"      # topological, top-down
+    ) -> list[str]:
+    """
+    Generate the command to export a notebook to several formats in one process.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+        outputs (dict[str, str]): A mapping of export format to output path.
+        mode (str, optional): The export mode of "html-wasm" outputs. Defaults to "run".
+        show_code (bool, optional): If True, include the code in the exported notebook. Defaults to True.
+        sort (str, optional): The sorting method of "ipynb" outputs. Defaults to "topological".
+
+    Returns:
+        list[str]: The command to export the notebook.
+    """
+    if mode not in ["run", "edit"]:
+        raise ValueError("mode must be either 'run' or 'edit'")
+    if sort not in ["topological", "top-down"]:
+        raise ValueError("sort must be either 'topological' or 'top-down'")
+
+    cmd = [sys.executable, "-m", "marimo_extra.export_runner", notebook_path]
+    for export_format, output in outputs.items():
+        if export_format not in multi_format_ext:
+            raise ValueError(f"Unknown export format: {export_format}")
+        cmd += ["--to", export_format, output]
+    cmd += ["--mode", mode, "--show-code" if show_code else "--no-show-code", "--sort", sort]
+    return cmd
+
+def _multi_outputs(notebook_path: str, export_formats: list[str], output=None) -> dict[str, str]:
+    """
+    Resolves the output path of every format of a multi-format export.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+        export_formats (list[str]): The formats to export to.
+        output (dict[str, str] | str, optional): Either a mapping of format to
+            output path, or a base path without extension that every format's
+            extension is appended to. Defaults to the notebook path.
+
+    Returns:
+        dict[str, str]: A mapping of export format to output path.
+    """
+    if isinstance(output, dict):
+        missing = [export_format for export_format in export_formats if export_format not in output]
+        if missing:
+            raise ValueError(f"No output path given for: {', '.join(missing)}")
+        return {export_format: output[export_format] for export_format in export_formats}
+
+    base = notebook_path.removesuffix(".py") if output is None else output
+    return {export_format: base + multi_format_ext[export_format] for export_format in export_formats}
+
+def _runner_available() -> bool:
+    """
+    Checks whether the installed marimo provides the export API used by the
+    single-process multi-format runner.
+    """
+    import importlib.util
+    try:
+        return importlib.util.find_spec("marimo._server.export.exporter") is not None
+    except ModuleNotFoundError:
+        return False
+
+def export_multi(
+    notebook_path: str, export_formats: list[str], output=None,
+    mode:str="run",             # run, edit
+    show_code:bool=True, sandbox:bool=False,
+    sort:str="topological",     # topological, top-down
+    cache:bool=True
+    ) -> bool:
+    """
+    Exports a notebook to several formats from a single load of the notebook.
+
+    The notebook is parsed once and executed at most once; the execution
+    results are shared by every format that includes outputs (html, ipynb).
+
+    Args:
+        notebook_path (str): The path to the notebook file to be exported.
+        export_formats (list[str]): The formats to export to. Options include
+            "html", "ipynb", "md", "script", "html-wasm" (using `mode`),
+            "html-wasm-run" and "html-wasm-edit".
+        output (dict[str, str] | str, optional): A mapping of format to output
+            path, or a base path that each format's extension is appended to.
+            Defaults to the notebook path.
+        mode (str, optional): The export mode of "html-wasm". Defaults to "run".
+        show_code (bool, optional): Whether to include the code in the exported
+            notebook. Defaults to True.
+        sandbox (bool, optional): Whether to export the notebook in a sandboxed
+            environment. Sandboxed exports run one marimo process per format.
+            Defaults to False.
+        sort (str, optional): The method to sort the cells of "ipynb" outputs.
+            Defaults to "topological".
+        cache (bool, optional): Whether formats are taken from and stored in the
+            shared export cache, see `export`. Defaults to True.
+
+    Returns:
+        bool: True if every format was exported successfully, False otherwise.
+    """
+    outputs = _multi_outputs(notebook_path, export_formats, output)
+    for path in outputs.values():
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    if sandbox or not _runner_available():
+        success = True
+        for export_format, path in outputs.items():
+            wasm_mode = {"html-wasm-run": "run", "html-wasm-edit": "edit"}.get(export_format, mode)
+            success &= export(
+                notebook_path=notebook_path,
+                output=path,
+                export_format="html-wasm" if export_format.startswith("html-wasm") else export_format,
+                mode=wasm_mode,
+                show_code=show_code,
+                sandbox=sandbox,
+                sort=sort,
+                cache=cache
+            )
+        return success
+
+    if not cache or not export_cache.export_cache_enabled():
+        cmd = get_multi_export_cmd(notebook_path, outputs, mode, show_code, sort)
+        return _export_with_cmd(cmd, notebook_path, ", ".join(outputs.values()), "multi")
+
+    keys = {
+        export_format: export_cache.export_cache_key(
+            notebook_path, ["multi", export_format, mode, str(show_code), sort], export_format.startswith("html-wasm"))
+        for export_format in outputs
+    }
+    missing = {}
+    for export_format, path in outputs.items():
+        if export_cache.restore(keys[export_format], path):
+            logger.info(f"[green]Restored[end] {notebook_path} to {path} from the export cache")
+        else:
+            missing[export_format] = path
+    if not missing:
+        return True
+
+    # Every format gets its own directory, so the files each one writes next
+    # to its output (assets, public folder) end up in its own cache entry
+    work_dir = export_cache.new_work_dir()
+    try:
+        work_outputs = {
+            export_format: os.path.join(work_dir, export_format, os.path.basename(path))
+            for export_format, path in missing.items()
+        }
+        for path in work_outputs.values():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        cmd = get_multi_export_cmd(notebook_path, work_outputs, mode, show_code, sort)
+        if not _export_with_cmd(cmd, notebook_path, ", ".join(missing.values()), "multi"):
+            return False
+        for export_format, path in missing.items():
+            format_dir, output_name = os.path.join(work_dir, export_format), os.path.basename(path)
+            if export_cache.store(keys[export_format], format_dir, output_name):
+                export_cache.restore(keys[export_format], path, record=False)
+            else:
+                export_cache.place_work_dir(format_dir, output_name, path)
+        return True
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
 def export(
     notebook_path: str, output: str=None,
     export_format:str="html",   # html, html-wasm, ipynb, md, script
@@ -209,7 +657,13 @@ def export(
     show_code:bool=True, watch:bool=False, sandbox:bool=False, 
     sort:str="topological",      # topological, top-down
     from_saved:bool=False,
-    saved_html_path:str=None
+    saved_html_path:str=None,
+    sandbox_cache:bool=True,
+    freshness:str="hash",       # hash, mtime, none
+    on_stale:str="export",      # export, error
+    cache:bool=True,
+    profile:bool=False,
+    cell_cache:bool=False
     ) -> bool:
 
 
@@ -220,13 +674,16 @@ def export(
         notebook_path (str): The path to the notebook file to be exported.
         output (str, optional): The path to the output file. If not provided, 
             it defaults to the notebook path with an appropriate extension.
-        export_format (str, optional): The format to export the notebook to.
+            For a list of formats, a mapping of format to output path.
+        export_format (str | list[str], optional): The format to export the notebook to.
             Defaults to "html". Options include:
                 - "html": Static HTML file.
                 - "html-wasm": HTML file with WebAssembly support.
                 - "ipynb": IPython notebook file.
                 - "md": Markdown file.
                 - "script": Python script file.
+            A list of formats exports all of them from one load of the
+            notebook, see `export_multi`.
         mode (str, optional): The export mode. Defaults to "run".
             Options include:
                 - "run": Export the notebook in a runnable form.
@@ -245,22 +702,72 @@ def export(
             Defaults to False.
         saved_html_path (str, optional): The path to the saved HTML file to copy 
             if `from_saved` is True. Defaults to None.
+        sandbox_cache (bool, optional): Whether a sandboxed export reuses a cached
+            environment keyed by the notebook's dependencies instead of creating
+            a fresh one. Defaults to True.
+        freshness (str, optional): How a saved HTML file is checked against the
+            notebook source when `from_saved` is True, see `is_saved_html_fresh`.
+            Defaults to "hash", which does not depend on file times set by a
+            git checkout.
+        on_stale (str, optional): What to do when the saved HTML file is stale.
+            Defaults to "export". Options include:
+                - "export": Export the notebook instead.
+                - "error": Fail the export.
+        cache (bool, optional): Whether the export is taken from and stored in
+            the shared export cache (see `export_cache`), keyed by the notebook
+            source, the export options, the marimo version and the notebook's
+            data files. Watched exports are never cached. Defaults to True.
+        profile (bool, optional): Whether the execution time and peak RSS growth
+            of every cell is recorded in `<output>.profile.json` (see
+            `profile_path`). Only "html" exports execute the notebook; profiled
+            exports bypass the export cache. Defaults to False.
+        cell_cache (bool, optional): Whether an "html" export reuses the outputs
+            of cells whose code, upstream cells and data files are unchanged
+            since an earlier export, instead of executing them (see
+            `cell_cache`). Defaults to False.
 
     Returns:
         bool: True if the export was successful, False otherwise.
     """
 
+    if isinstance(export_format, (list, tuple)):
+        return export_multi(notebook_path, list(export_format), output, mode, show_code, sandbox, sort, cache)
+
     if output is None:
         output = notebook_path.replace(".py", format_ext[export_format])
     os.makedirs(os.path.dirname(output), exist_ok=True)
 
     if from_saved:
-        return _html_copy_process(notebook_path, output, saved_html_path)
-
-    
-    else:
-        cmd = get_export_cmd(notebook_path, output, export_format, mode, show_code, watch, sandbox, sort)
-        return _export_with_cmd(cmd, notebook_path, output)
+        if on_stale not in ["export", "error"]:
+            raise ValueError("on_stale must be either 'export' or 'error'")
+        copied = _html_copy_process(notebook_path, output, saved_html_path, freshness)
+        if copied is not None:
+            return copied
+        if on_stale == "error":
+            logger.error(f"[red]Error:[end] Saved HTML of {notebook_path} is stale, re-save the notebook in marimo")
+            return False
+        logger.info(f"[yellow]Falling back[end] to exporting {notebook_path}")
+
+    if (profile or cell_cache) and export_format == "html" and not watch:
+        if sandbox or not _runner_available():
+            logger.warning(f"[yellow]Warning:[end] Cannot profile or cache the cells of {notebook_path} here, exporting without")
+        else:
+            cmd = get_multi_export_cmd(notebook_path, {"html": output}, mode, show_code, sort)
+            if cell_cache:
+                cmd += ["--cell-cache"]
+            if profile:
+                cmd += ["--profile", profile_path(output)]
+                return _export_with_cmd(cmd, notebook_path, output, export_format)
+            if cache and export_cache.export_cache_enabled():
+                return _cached_export(cmd, notebook_path, output, sandbox_cache=False, export_format=export_format)
+            return _export_with_cmd(cmd, notebook_path, output, export_format)
+
+    cmd = get_export_cmd(notebook_path, output, export_format, mode, show_code, watch, sandbox, sort)
+    if cache and not watch and export_cache.export_cache_enabled():
+        return _cached_export(cmd, notebook_path, output, sandbox and sandbox_cache)
+    if sandbox and sandbox_cache:
+        cmd = _sandbox_cached_cmd(cmd, notebook_path)
+    return _export_with_cmd(cmd, notebook_path, output, export_format)
 
 
 def export_executable(notebook_path: str, output: str=None, watch=False, sandbox=False) -> bool:
@@ -278,7 +785,7 @@ def export_executable(notebook_path: str, output: str=None, watch=False, sandbox
     Returns:
         bool: True if the export was successful, False otherwise.
     """
-    rich_print(f"\n[yellow]Exporting[end] to [blue]Executable[end]: {notebook_path}")
+    logger.info(f"\n[yellow]Exporting[end] to [blue]Executable[end]: {notebook_path}")
     return export(
         notebook_path=notebook_path,
         output=output,
@@ -303,7 +810,7 @@ def export_editable(notebook_path: str, output: str=None, watch=False) -> bool:
     Returns:
         bool: True if the export was successful, False otherwise.
     """
-    rich_print(f"\n[yellow]Exporting[end] to [blue]Editable[end]: {notebook_path}")
+    logger.info(f"\n[yellow]Exporting[end] to [blue]Editable[end]: {notebook_path}")
     return export(
         notebook_path=notebook_path,
         output=output,
@@ -324,7 +831,7 @@ def export_app(notebook_path: str, output: str=None) -> bool:
     Returns:
         bool: True if the export was successful, False otherwise.
     """
-    rich_print(f"\n[yellow]Exporting[end] to [blue]App[end]: {notebook_path}")
+    logger.info(f"\n[yellow]Exporting[end] to [blue]App[end]: {notebook_path}")
     return export(
         notebook_path=notebook_path,
         output=output,
@@ -333,7 +840,7 @@ def export_app(notebook_path: str, output: str=None) -> bool:
         show_code=False
     )
 
-def export_html(notebook_path: str, output: str=None, output_dir: str="_site", show_code:bool=True, from_saved:bool=False, saved_html_path=None) -> bool:
+def export_html(notebook_path: str, output: str=None, output_dir: str="_site", show_code:bool=True, from_saved:bool=False, saved_html_path=None, freshness:str="hash", on_stale:str="export", profile:bool=False, cell_cache:bool=False) -> bool:
     """
     Exports a notebook to HTML format.
 
@@ -348,16 +855,28 @@ def export_html(notebook_path: str, output: str=None, output_dir: str="_site", s
             Defaults to False.
         saved_html_path (str, optional): The path to the saved HTML file to copy 
             if `from_saved` is True. Defaults to None.
+        freshness (str, optional): How the saved HTML file is checked against the
+            notebook source ("hash", "mtime" or "none"). Defaults to "hash".
+        on_stale (str, optional): Whether a stale saved HTML file falls back to a
+            real export ("export") or fails ("error"). Defaults to "export".
+        profile (bool, optional): Whether to record a per-cell execution profile
+            next to the output when the notebook is executed. Defaults to False.
+        cell_cache (bool, optional): Whether unchanged cells are restored from
+            the cell cache instead of executed. Defaults to False.
 
     Returns:
         bool: True if the export was successful, False otherwise.
     """
-    rich_print(f"\n[yellow]Exporting[end] to [blue]HTML{"-save" if from_saved else ""}[end]: {notebook_path}")
+    logger.info(f"\n[yellow]Exporting[end] to [blue]HTML{"-save" if from_saved else ""}[end]: {notebook_path}")
     return export(
         notebook_path=notebook_path,
         output=output,
         export_format="html",
         show_code=show_code,
         from_saved=from_saved,
-        saved_html_path=saved_html_path
+        saved_html_path=saved_html_path,
+        freshness=freshness,
+        on_stale=on_stale,
+        profile=profile,
+        cell_cache=cell_cache
     )
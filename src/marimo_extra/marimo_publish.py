@@ -0,0 +1,459 @@
+import os
+import json
+import time
+import shutil
+from marimo_extra.cache import file_hash, text_hash, link_or_copy
+from marimo_extra.dependencies import data_dependency_hashes
+from marimo_extra.marimo_web import export_notebook, read_index_rows, walk_files, move_outputs
+from marimo_extra.marimo_export import export_logs, profile_path
+from marimo_extra.resources import run_exports, _save_history
+from marimo_extra.shard import current_shard, shard_rows
+from marimo_extra.externalize import externalize_outputs
+from marimo_extra.public_data import columnar_path, columnar_ext, publish_columnar_copies
+from marimo_extra.log import get_logger
+import marimo_extra.export_cache as export_cache
+
+logger = get_logger(__name__)
+
+# Build metadata kept inside the published site, relative to the site directory
+meta_dir = ".marimo_extra"
+manifest_name = "manifest.json"
+work_dir_name = "work"
+
+# Report of the last build, in the project's build directory
+report_path = os.path.join(".marimo_extra", "build_report.json")
+
+# Files a shard build adds to its site's metadata for `merge_shards`
+shard_report_name = "build_report.json"
+shard_history_name = "export_history.json"
+
+# Notebook types whose export executes the notebook, and can be profiled
+profiled_types = ["html", "html-nocode"]
+
+# Cells of the whole site listed in the build report as the slowest
+report_slowest_cells = 10
+
+# Notebook types exported as static HTML, with their outputs embedded
+static_types = ["html", "html-save", "html-nocode"]
+
+# Notebook types that marimo exports as HTML-WASM, which copies the `public`
+# folder next to the notebook into the output
+wasm_types = ["app", "edit", "exe"]
+
+def notebook_build_key(notebook_path: str, notebook_type: str, html_path: str) -> str:
+    """
+    Computes the key that decides whether a notebook has to be exported again.
+
+    The key covers the notebook source, its type and output path, the marimo
+    version, the data files the notebook reads (see `notebook_data_dependencies`)
+    and, for HTML-WASM types, the `public` folder next to the notebook that
+    marimo copies into the output, with the Parquet copies of its CSV files
+    (see `convert_public_assets`). Changing a data file therefore only
+    re-exports the notebooks that read it.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+        notebook_type (str): The encoded notebook type (see `_nb_type_encoder`).
+        html_path (str): The output path relative to the site directory.
+
+    Returns:
+        str: The build key.
+    """
+    import marimo
+
+    parts = [marimo.__version__, notebook_type, html_path, file_hash(notebook_path)]
+    for path, digest in data_dependency_hashes(notebook_path):
+        parts += [path, digest]
+    if notebook_type in wasm_types:
+        public_dir = os.path.join(os.path.dirname(notebook_path), "public")
+        if os.path.isdir(public_dir):
+            for path in walk_files(public_dir):
+                parts += [path, file_hash(os.path.join(public_dir, path))]
+                if path.endswith(".csv") and os.path.exists(columnar_path(os.path.join(public_dir, path))):
+                    # Published with it, and written from it
+                    parts.append(columnar_ext)
+    return text_hash(*parts)
+
+def load_manifest(output_dir: str="_site") -> dict:
+    """
+    Loads the build manifest of a published site.
+
+    Args:
+        output_dir (str): The site directory. Defaults to "_site".
+
+    Returns:
+        dict: A mapping of HTML path to its manifest entry, empty if the site
+            has no manifest.
+    """
+    manifest_path = os.path.join(output_dir, meta_dir, manifest_name)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"[yellow]Warning:[end] Ignoring unreadable manifest {manifest_path}: {e}")
+        return {}
+
+def _save_manifest(output_dir: str, manifest: dict):
+    os.makedirs(os.path.join(output_dir, meta_dir), exist_ok=True)
+    with open(os.path.join(output_dir, meta_dir, manifest_name), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+def _reuse_outputs(outputs: list[str], previous_dir: str, staging_dir: str) -> bool:
+    """
+    Hardlinks the outputs of a notebook from the previous site into the staging directory.
+
+    Files that already exist in the staging directory (e.g. marimo assets shared
+    by several notebooks) are left alone.
+
+    Returns:
+        bool: True if all outputs were available, False otherwise.
+    """
+    if not all(os.path.isfile(os.path.join(previous_dir, path)) for path in outputs):
+        return False
+    for path in outputs:
+        target = os.path.join(staging_dir, path)
+        if not os.path.exists(target):
+            link_or_copy(os.path.join(previous_dir, path), target)
+    return True
+
+def _exchange_dirs(a: str, b: str) -> bool:
+    """
+    Atomically exchanges two directories with `renameat2(RENAME_EXCHANGE)` on Linux.
+
+    Returns:
+        bool: True if the directories were exchanged, False if the platform or
+            filesystem does not support it.
+    """
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        renameat2 = libc.renameat2
+    except (OSError, AttributeError):
+        return False
+    AT_FDCWD, RENAME_EXCHANGE = -100, 2
+    return renameat2(AT_FDCWD, os.fsencode(a), AT_FDCWD, os.fsencode(b), RENAME_EXCHANGE) == 0
+
+def _swap_dirs(staging_dir: str, output_dir: str):
+    """
+    Replaces the output directory by the staging directory.
+
+    On Linux the two directories are exchanged atomically, so a server never
+    sees a missing or half-built site. Elsewhere two renames are used, which
+    leaves the site missing only for the moment between them.
+    """
+    if not os.path.exists(output_dir):
+        os.rename(staging_dir, output_dir)
+        return
+
+    if _exchange_dirs(staging_dir, output_dir):
+        shutil.rmtree(staging_dir)
+        return
+
+    old_dir = output_dir.rstrip(os.sep) + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    os.rename(output_dir, old_dir)
+    os.rename(staging_dir, output_dir)
+    shutil.rmtree(old_dir)
+
+def load_build_report() -> dict:
+    """
+    Loads the report of the last `publish_site` run.
+
+    Returns:
+        dict: The report, empty if there is none. Its "notebooks" list has an
+            entry per notebook with its status ("exported", "reused" or
+            "failed"), the export time in seconds and the paths to its export logs.
+    """
+    if not os.path.exists(report_path):
+        return {}
+    try:
+        with open(report_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_build_report(report: dict):
+    _write_json(report_path, report)
+
+def _write_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+
+def _read_json(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _collect_profiles(report: dict, staging_dir: str):
+    """
+    Links the cell profiles of the site's notebooks into the build report and
+    lists the slowest cells of the whole site.
+    """
+    cells = []
+    for item in report["notebooks"]:
+        path = profile_path(item["html_path"])
+        if not os.path.exists(os.path.join(staging_dir, path)):
+            continue
+        item["profile"] = path
+        try:
+            with open(os.path.join(staging_dir, path), encoding="utf-8") as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            continue
+        cells += [{"notebook": item["notebook"], **cell} for cell in profile.get("cells", [])]
+    report["slowest_cells"] = sorted(cells, key=lambda cell: cell["seconds"], reverse=True)[:report_slowest_cells]
+
+def publish_site(index_csv_path: str="public/index.csv", output_dir: str="_site", incremental: bool=True, profile: bool=False, cell_cache: bool=False, workers: int=None, shard: str=None, externalize: bool=False) -> bool:
+    """
+    Builds the website into a staging directory and publishes it with an atomic swap.
+
+    The site is built in `<output_dir>.staging` next to the output directory.
+    Every notebook in the index is exported into its own work directory, so
+    the files it produces are known exactly. HTML-WASM exports get the
+    Parquet copies of the CSV files of their `public` folder (see
+    `publish_columnar_copies`). With `incremental`, notebooks
+    whose build key matches the manifest of the previous site are not
+    exported again; their files are hardlinked from the previous output.
+    Files that are no longer produced are simply not carried over. Finally,
+    the staging directory replaces the output directory, only if every
+    notebook was exported; otherwise the previous site is left as it was.
+
+    Notebooks are exported concurrently, as long as their peak memory in
+    past builds fits into the memory budget (see `run_exports`).
+
+    With `shard`, only a share of the index is exported (see `shard_rows`),
+    e.g. by each runner of a CI matrix. The shard's site also gets its build
+    report and export history, and `merge_shards` combines the shard sites
+    into one.
+
+    With `externalize`, large outputs embedded in static HTML exports are
+    moved into content-addressed files under `_assets/` (see
+    `externalize_outputs`), which belong to the outputs of the notebook.
+
+    A report of the build, with the status, export time and log files of
+    every notebook, is written to `.marimo_extra/build_report.json`. With
+    `profile`, executed notebooks record a profile of their cells next to
+    their output, and the slowest cells of the site are added to the report.
+
+    Args:
+        index_csv_path (str): The path to the "index.csv" file. Defaults to "public/index.csv".
+        output_dir (str): The site directory. Defaults to "_site".
+        incremental (bool): Whether unchanged notebooks are reused from the
+            previous site. Defaults to True.
+        profile (bool): Whether to profile the cells of executed notebooks.
+            Defaults to False.
+        cell_cache (bool): Whether executed notebooks restore their unchanged
+            cells from the cell cache instead of running them. Defaults to False.
+        workers (int, optional): The number of concurrent exports. Defaults to
+            choosing it from the available cores and memory.
+        shard (str, optional): The shard to export as "i/n", e.g. "2/4".
+            Defaults to the `MARIMO_EXTRA_SHARD` environment variable, or all
+            notebooks if it is not set.
+        externalize (bool): Whether large embedded outputs of static HTML
+            exports are moved into separate files. Defaults to False.
+
+    Returns:
+        bool: True if all notebooks were published successfully, False otherwise.
+    """
+    rows = read_index_rows(index_csv_path)
+    if rows is None:
+        logger.warning(f"No index.csv file found at {index_csv_path}. Export will be skipped.")
+        return False
+    shard = current_shard(shard)
+    if shard is not None:
+        rows = shard_rows(rows, shard)
+        logger.info(f"Exporting shard {shard[0]}/{shard[1]}: {len(rows)} notebooks")
+
+    staging_dir = output_dir.rstrip(os.sep) + ".staging"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    work_root = os.path.join(staging_dir, meta_dir, work_dir_name)
+
+    previous = load_manifest(output_dir) if incremental else {}
+    manifest = {}
+    reused = 0
+    cache_before = dict(export_cache.session_stats)
+    report = {"output_dir": output_dir, "started": time.time(), "notebooks": []}
+    if shard is not None:
+        report["shard"] = list(shard)
+
+    items = [None] * len(rows)
+    jobs = []
+    for i, (nb_path, html_path, nb_type) in enumerate(rows):
+        key = notebook_build_key(nb_path, nb_type, html_path)
+        entry = previous.get(html_path)
+        if entry is not None and profile and nb_type in profiled_types and profile_path(html_path) not in entry["outputs"]:
+            # Reused outputs would come without a profile
+            entry = None
+        if entry is not None and nb_type in static_types and entry.get("externalized", False) != externalize:
+            entry = None
+        if entry is not None and entry["key"] == key and _reuse_outputs(entry["outputs"], output_dir, staging_dir):
+            logger.info(f"[green]Unchanged[end] {nb_path}, reusing {html_path}")
+            manifest[html_path] = entry
+            items[i] = {"notebook": nb_path, "html_path": html_path, "type": nb_type, "status": "reused", "seconds": 0.0, "logs": []}
+            reused += 1
+            continue
+
+        def export_job(i=i, nb_path=nb_path, html_path=html_path, nb_type=nb_type, key=key):
+            work_dir = os.path.join(work_root, str(i))
+            for log_path in export_logs(nb_path):
+                os.remove(log_path)
+            start = time.time()
+            ok = export_notebook(notebook_path=nb_path, notebook_type=nb_type, html_output_path=html_path, output_dir=work_dir, profile=profile, cell_cache=cell_cache)
+            if ok and externalize and nb_type in static_types:
+                externalize_outputs(os.path.join(work_dir, html_path), work_dir)
+            public_dir = os.path.join(work_dir, os.path.dirname(html_path), "public")
+            if ok and nb_type in wasm_types and os.path.isdir(public_dir):
+                publish_columnar_copies(os.path.join(os.path.dirname(nb_path), "public"), public_dir)
+            outputs = move_outputs(work_dir, staging_dir)
+            if ok:
+                manifest[html_path] = {"key": key, "notebook": nb_path, "type": nb_type, "outputs": outputs}
+                if nb_type in static_types:
+                    manifest[html_path]["externalized"] = externalize
+            items[i] = {
+                "notebook": nb_path,
+                "html_path": html_path,
+                "type": nb_type,
+                "status": "exported" if ok else "failed",
+                "seconds": round(time.time() - start, 3),
+                "logs": export_logs(nb_path),
+            }
+            return ok
+        jobs.append((nb_path, export_job))
+
+    # Shards keep the project's history as it is, so all of them split the index alike
+    history_output = None if shard is None else os.path.join(staging_dir, meta_dir, shard_history_name)
+    success = all(run_exports(jobs, workers, history_output))
+    report["notebooks"] = items
+
+    shutil.rmtree(work_root, ignore_errors=True)
+    _save_manifest(staging_dir, manifest)
+    _collect_profiles(report, staging_dir)
+    hits = export_cache.session_stats["hits"] - cache_before["hits"]
+    misses = export_cache.session_stats["misses"] - cache_before["misses"]
+    report["seconds"] = round(time.time() - report["started"], 3)
+    report["export_cache"] = {"hits": hits, "misses": misses}
+    if shard is not None:
+        _write_json(os.path.join(staging_dir, meta_dir, shard_report_name), report)
+    if success:
+        _swap_dirs(staging_dir, output_dir)
+        logger.info(f"[green]Published[end] {len(rows)} notebooks to [blue]{output_dir}[end] ({reused} reused, {len(rows) - reused} exported)")
+    else:
+        # A site with missing notebooks never replaces the previous one
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        logger.error(f"[red]Not published[end]: {output_dir} is left as it was")
+    if hits or misses:
+        logger.info(f"Export cache: {hits} hits, {misses} misses ([blue]{export_cache.export_cache_dir()}[end])")
+    _save_build_report(report)
+    failed = [item for item in report["notebooks"] if item["status"] == "failed"]
+    for item in failed:
+        logger.error(f"[red]Failed[end] {item['notebook']}, see {', '.join(item['logs']) or 'the output above'}")
+    if failed:
+        logger.info(f"Build report: [blue]{report_path}[end]")
+    if profile and report["slowest_cells"]:
+        logger.info("Slowest cells:")
+        for cell in report["slowest_cells"][:5]:
+            logger.info(f"  [yellow]{cell['seconds']:8.3f}s[end] {cell['notebook']}: {cell['code']}")
+    return success
+
+def merge_shards(shard_dirs: list[str], output_dir: str="_site", index_csv_path: str="public/index.csv") -> bool:
+    """
+    Combines the sites of a sharded build into one site (see `publish_site`).
+
+    The files of every shard are hardlinked into a staging directory, which
+    then replaces the output directory like in `publish_site`. Files that
+    several shards produced (e.g. shared marimo assets) are taken from the
+    first shard. The manifests, build reports and export histories of the
+    shards are merged, so the next build can reuse the merged site and split
+    the index by the durations of this one.
+
+    Nothing is published if a shard is missing. The merge fails if a notebook
+    of the index was exported by no shard, which happens when the runners
+    split the index with different export histories.
+
+    Args:
+        shard_dirs (list[str]): The site directories of the shards.
+        output_dir (str): The site directory. Defaults to "_site".
+        index_csv_path (str): The path to the "index.csv" file, to check that
+            every notebook was exported. Defaults to "public/index.csv".
+
+    Returns:
+        bool: True if the shards were merged and all notebooks were published
+            successfully, False otherwise.
+    """
+    reports = [_read_json(os.path.join(shard_dir, meta_dir, shard_report_name)) for shard_dir in shard_dirs]
+    if not reports:
+        logger.error("[red]Error:[end] No shards to merge")
+        return False
+    for shard_dir, shard_report in zip(shard_dirs, reports):
+        if "shard" not in shard_report:
+            logger.error(f"[red]Error:[end] {shard_dir} is not the site of a sharded build")
+            return False
+    counts = {shard_report["shard"][1] for shard_report in reports}
+    numbers = sorted(shard_report["shard"][0] for shard_report in reports)
+    if len(counts) != 1 or numbers != list(range(1, counts.pop() + 1)):
+        found = ", ".join(f"{shard_report['shard'][0]}/{shard_report['shard'][1]}" for shard_report in reports)
+        logger.error(f"[red]Error:[end] Incomplete set of shards: {found}")
+        return False
+
+    staging_dir = output_dir.rstrip(os.sep) + ".staging"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+
+    manifest = {}
+    items = {}
+    histories = []
+    for shard_dir, shard_report in sorted(zip(shard_dirs, reports), key=lambda pair: pair[1]["shard"][0]):
+        for path in walk_files(shard_dir):
+            target = os.path.join(staging_dir, path)
+            if path.split(os.sep)[0] != meta_dir and not os.path.exists(target):
+                link_or_copy(os.path.join(shard_dir, path), target)
+        for html_path, entry in load_manifest(shard_dir).items():
+            manifest.setdefault(html_path, entry)
+        for item in shard_report["notebooks"]:
+            if item["html_path"] in items:
+                logger.warning(f"[yellow]Warning:[end] {item['html_path']} was exported by several shards")
+            items.setdefault(item["html_path"], item)
+        histories.append((shard_report, _read_json(os.path.join(shard_dir, meta_dir, shard_history_name))))
+
+    rows = read_index_rows(index_csv_path) or []
+    missing = [html_path for _, html_path, _ in rows if html_path not in items]
+    order = {html_path: i for i, (_, html_path, _) in enumerate(rows)}
+    report = {
+        "output_dir": output_dir,
+        "started": min(shard_report["started"] for shard_report in reports),
+        "shards": len(reports),
+        "notebooks": sorted(items.values(), key=lambda item: order.get(item["html_path"], len(order))),
+        # The shards ran side by side
+        "seconds": max(shard_report["seconds"] for shard_report in reports),
+        "export_cache": {key: sum(shard_report["export_cache"][key] for shard_report in reports) for key in ["hits", "misses"]},
+    }
+
+    # Every shard restored the same history, but only knows the durations of its own exports
+    history = {}
+    for _, shard_history in histories:
+        for notebook_path, entry in shard_history.items():
+            history.setdefault(notebook_path, entry)
+    for shard_report, shard_history in histories:
+        for item in shard_report["notebooks"]:
+            if item["notebook"] in shard_history:
+                history[item["notebook"]] = shard_history[item["notebook"]]
+    _save_history(history)
+
+    _save_manifest(staging_dir, manifest)
+    _collect_profiles(report, staging_dir)
+    _swap_dirs(staging_dir, output_dir)
+    _save_build_report(report)
+
+    logger.info(f"[green]Merged[end] {len(reports)} shards with {len(items)} notebooks into [blue]{output_dir}[end]")
+    for html_path in missing:
+        logger.error(f"[red]Missing[end] {html_path}: no shard exported it, the shards split the index with different export histories")
+    failed = [item for item in report["notebooks"] if item["status"] == "failed"]
+    for item in failed:
+        logger.error(f"[red]Failed[end] {item['notebook']}, see the build report of its shard")
+    return not missing and not failed
@@ -1,10 +1,22 @@
 import os
 import shutil
 from pathlib import Path
-import pandas as pd
 
 from marimo_extra.marimo_export import export, export_app, export_editable, export_executable, export_html
-from marimo_extra.utils import rich_print
+from marimo_extra.log import get_logger
+from marimo_extra.index_model import NotebookIndex
+from marimo_extra.nb_metadata import collect_metadata, notebook_name
+from marimo_extra.resources import run_exports
+from marimo_extra.shard import current_shard, shard_rows
+
+logger = get_logger(__name__)
+
+try:
+    import pandas as pd
+except ImportError:
+    logger.error("[red]Error:[end] Python [green][italic]pandas[end] Library is not installed!")
+    logger.error("Building websites needs the build extra, install it with \"[italic][yellow] uv add marimo-extra[build] [end]\" or \"[italic] pip install marimo-extra[build] [end]\" command.")
+    raise
 
 def collect_notebooks_info(directories: list[str]):
     """
@@ -26,13 +38,13 @@ def collect_notebooks_info(directories: list[str]):
     for directory in directories:
         dir_path = Path(directory)
         if not dir_path.exists():
-            print(f"Warning: Directory not found: {dir_path}")
+            logger.warning(f"Warning: Directory not found: {dir_path}")
         else:
             notebooks = [{"dir":directory, "path":str(path)} for path in dir_path.rglob("*.py")]
             all_notebooks.extend(notebooks)
     return all_notebooks
 
-def export_notebook(notebook_path: str, notebook_type: str, html_output_path: str=None, output_dir: str="_site") -> bool:
+def export_notebook(notebook_path: str, notebook_type: str, html_output_path: str=None, output_dir: str="_site", profile: bool=False, cell_cache: bool=False) -> bool:
     """
     Exports a notebook based on the given notebook type.
 
@@ -48,6 +60,11 @@ def export_notebook(notebook_path: str, notebook_type: str, html_output_path: st
         html_output_path (str, optional): The path to the HTML output file.
         output_dir (str): The directory where the exported notebook will be
             saved. Defaults to "_site".
+        profile (bool): Whether notebooks executed for the export ('html',
+            'html-nocode') record a per-cell profile next to the output.
+            Defaults to False.
+        cell_cache (bool): Whether notebooks executed for the export restore
+            their unchanged cells from the cell cache. Defaults to False.
 
     Returns:
         bool: True if the notebook was exported successfully, False otherwise.
@@ -66,18 +83,18 @@ def export_notebook(notebook_path: str, notebook_type: str, html_output_path: st
         return export_executable(notebook_path=notebook_path, output=os.path.join(output_dir, notebook_path.replace(".py", ".html")))
     elif notebook_type == "html":
         if html_output_path is not None:
-            return export_html(notebook_path=notebook_path, output=os.path.join(output_dir, html_output_path))
-        return export_html(notebook_path=notebook_path, output=os.path.join(output_dir, notebook_path.replace(".py", ".html")))
+            return export_html(notebook_path=notebook_path, output=os.path.join(output_dir, html_output_path), profile=profile, cell_cache=cell_cache)
+        return export_html(notebook_path=notebook_path, output=os.path.join(output_dir, notebook_path.replace(".py", ".html")), profile=profile, cell_cache=cell_cache)
     elif notebook_type == "html-save":
         if html_output_path is not None:
-            return export_html(notebook_path=notebook_path, output=os.path.join(output_dir, html_output_path), from_saved=True)
-        return export_html(notebook_path=notebook_path, output=os.path.join(output_dir, notebook_path.replace(".py", ".html")), from_saved=True)
+            return export_html(notebook_path=notebook_path, output=os.path.join(output_dir, html_output_path), from_saved=True, profile=profile, cell_cache=cell_cache)
+        return export_html(notebook_path=notebook_path, output=os.path.join(output_dir, notebook_path.replace(".py", ".html")), from_saved=True, profile=profile, cell_cache=cell_cache)
     elif notebook_type == "html-nocode":
         if html_output_path is not None:
-            return export_html(notebook_path=notebook_path, output=os.path.join(output_dir, html_output_path), show_code=False)
-        return export_html(notebook_path=notebook_path, output=os.path.join(output_dir, notebook_path.replace(".py", ".html")), show_code=False)
+            return export_html(notebook_path=notebook_path, output=os.path.join(output_dir, html_output_path), show_code=False, profile=profile, cell_cache=cell_cache)
+        return export_html(notebook_path=notebook_path, output=os.path.join(output_dir, notebook_path.replace(".py", ".html")), show_code=False, profile=profile, cell_cache=cell_cache)
     else:
-        rich_print(f"[red]Error:[end] Unknown notebook type: {notebook_type}")
+        logger.error(f"[red]Error:[end] Unknown notebook type: {notebook_type}")
     return False
 
 def _nb_path_html2py(notebook_path: list[str]) -> str:
@@ -139,44 +156,109 @@ def _nb_type_encoder(notebook_type: list[str]) -> str:
         out_type.append(_search_dict_of_lists(type_web, nb_type))
     return out_type
 
-def auto_export_notebooks_web(index_csv_path: str="public/index.csv") -> bool:
+def read_index_rows(index_csv_path: str="public/index.csv") -> list[tuple[str, str, str]] | None:
+    """
+    Reads the notebooks to export from an "index.csv" file.
+
+    Args:
+        index_csv_path (str): The path to the "index.csv" file. Defaults to "public/index.csv".
+
+    Returns:
+        list[tuple[str, str, str]] | None: The (notebook path, HTML path, encoded
+            notebook type) of every row, or None if the file does not exist.
+    """
+    if not os.path.exists(index_csv_path):
+        return None
+
+    notebooks = NotebookIndex.from_csv(index_csv_path)
+    notebook_path = [record.NB_Path for record in notebooks]
+    notebook_html_path = [record.HTML_Path for record in notebooks]
+    notebook_type = _nb_type_encoder([record.Type for record in notebooks])
+    return list(zip(notebook_path, notebook_html_path, notebook_type))
+
+def walk_files(directory: str) -> list[str]:
+    """
+    Lists all files below a directory as sorted paths relative to it.
+    """
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            files.append(os.path.relpath(os.path.join(root, name), directory))
+    return sorted(files)
+
+def move_outputs(work_dir: str, output_dir: str) -> list[str]:
+    """
+    Moves the files an export produced in its work directory into the output directory.
+
+    Every file is renamed over its target, so files that several exports
+    produce (e.g. marimo assets) can be moved in concurrently.
+
+    Returns:
+        list[str]: The moved files, relative to the output directory.
+    """
+    outputs = walk_files(work_dir)
+    for path in outputs:
+        target = os.path.join(output_dir, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(os.path.join(work_dir, path), target)
+    return outputs
+
+def auto_export_notebooks_web(index_csv_path: str="public/index.csv", output_dir: str="_site", shard: str=None) -> bool:
     """
     Automatically exports notebooks from the specified directories.
 
     This function checks for the existence of an "index.csv" file to determine the
     notebooks and their types to export. If the file exists, it reads the notebook
     paths and types from the CSV; otherwise, it collects this information by scanning
-    the provided directories.
+    the provided directories. Notebooks are exported concurrently under the
+    memory budget (see `run_exports`), each into its own work directory, and
+    their files are then moved into the output directory. With `shard`, only
+    a share of the notebooks is exported (see `shard_rows`).
 
     Args:
-        notebook_dir (list[str]): A list of directories to search for notebook files.
+        index_csv_path (str): The path to the "index.csv" file. Defaults to "public/index.csv".
         output_dir (str): The directory where the exported notebook files will be
             saved. Defaults to "_site".
-        index_csv_path (str): The path to the "index.csv" file. Defaults to "index.csv".
+        shard (str, optional): The shard to export as "i/n", e.g. "2/4".
+            Defaults to the `MARIMO_EXTRA_SHARD` environment variable, or all
+            notebooks if it is not set.
 
     Returns:
         bool: True if the notebooks were exported successfully, False otherwise.
     """
 
-    if os.path.exists(index_csv_path):
-        notebook_df = pd.read_csv(index_csv_path)
-        notebook_path = notebook_df["NB_Path"].values
-        notebook_html_path = notebook_df["HTML_Path"].values
-        notebook_type = notebook_df["Type"].values
-    else:
-        print(f"No index.csv file found at {index_csv_path}. Export will be skipped.")
+    rows = read_index_rows(index_csv_path)
+    if rows is None:
+        logger.warning(f"No index.csv file found at {index_csv_path}. Export will be skipped.")
         return False
-
-    notebook_type = _nb_type_encoder(notebook_type)
-    for nb_path, html_path, nb_type in zip(notebook_path, notebook_html_path, notebook_type):
-        export_notebook(notebook_path = nb_path, html_output_path=html_path, notebook_type = nb_type)
-    return True
+    shard = current_shard(shard)
+    if shard is not None:
+        rows = shard_rows(rows, shard)
+
+    # Next to the output directory, so outputs are moved in with a rename
+    work_root = output_dir.rstrip(os.sep) + ".work"
+    shutil.rmtree(work_root, ignore_errors=True)
+
+    def export_job(i, nb_path, html_path, nb_type):
+        work_dir = os.path.join(work_root, str(i))
+        ok = export_notebook(notebook_path=nb_path, html_output_path=html_path, notebook_type=nb_type, output_dir=work_dir)
+        move_outputs(work_dir, output_dir)
+        return ok
+
+    jobs = [
+        (nb_path, lambda i=i, nb_path=nb_path, html_path=html_path, nb_type=nb_type: export_job(i, nb_path, html_path, nb_type))
+        for i, (nb_path, html_path, nb_type) in enumerate(rows)
+    ]
+    try:
+        return all(run_exports(jobs))
+    finally:
+        shutil.rmtree(work_root, ignore_errors=True)
 
 
 def generate_index(output_dir: str="_site") -> bool:
     pass
 
-def _add_row_csv(out, out_dict):
+def _add_row_csv(out, out_dict, metadata: dict=None):
     """
     Adds rows to the given dataframe based on the notebook dictionaries.
 
@@ -186,17 +268,23 @@ def _add_row_csv(out, out_dict):
             information. Each dictionary should contain the following keys:
             - path (str): The path to the notebook file.
             - dir (str): The directory where the notebook is located.
+        metadata (dict, optional): The notebooks' metadata by path (see
+            `collect_metadata`), used for the Name and Tags columns. Defaults
+            to parsing the notebooks.
 
     Returns:
         pd.DataFrame: The dataframe with the added rows.
     """
+    if metadata is None:
+        metadata = collect_metadata([notebook["path"] for notebook in out_dict])
     for notebook in out_dict:
         nb_path = notebook["path"]
+        nb_metadata = metadata.get(nb_path, {})
         html_path = os.path.join(notebook["path"].replace(".py", ".html"))
-        name = os.path.basename(nb_path).replace(".py", "").replace(".html", "").capitalize()
+        name = notebook_name(nb_path, nb_metadata)
         np_type = notebook["dir"]
         thumbnail = os.path.join(os.path.dirname(nb_path), "public", "thumbnail", os.path.basename(nb_path).replace(".py", "").replace(".html", "")+".png")
-        tags = ""
+        tags = ", ".join(nb_metadata.get("tags", []))
         out.loc[len(out)] = [name, nb_path, html_path, np_type, thumbnail, tags]
     return out
 
@@ -213,10 +301,10 @@ def _save_record_csv(out, output_csv):
     """
     try:
         out.to_csv(output_csv, index=False)
-        rich_print(f"[green]Successfully Recoded[end] Index to {output_csv}")
+        logger.info(f"[green]Successfully Recoded[end] Index to {output_csv}")
         return True
     except Exception as e:
-        rich_print(f"[red]Unexpected error Recording[end] Index: {e}")
+        logger.error(f"[red]Unexpected error Recording[end] Index: {e}")
         return False
 def record_csv(dirs: list[str] , output_csv = os.path.join("public" , "index.csv"), replace: bool=False, output=False):
     """
@@ -225,7 +313,8 @@ def record_csv(dirs: list[str] , output_csv = os.path.join("public" , "index.csv
     This function scans the specified directories for notebook files, collects
     their information, and records it into a CSV file with specified columns.
     If the CSV file already exists, it can either replace it or skip the
-    recording based on the `replace` argument.
+    recording based on the `replace` argument. Names and tags are read from
+    the notebook sources (see `notebook_metadata`), without running them.
 
     Args:
         dirs (list[str]): A list of directories to search for notebook files.
@@ -240,7 +329,7 @@ def record_csv(dirs: list[str] , output_csv = os.path.join("public" , "index.csv
     """
 
     if os.path.exists(output_csv) and not replace:
-        rich_print(f"[red]Warning:[end] File already exists: {output_csv}")
+        logger.warning(f"[red]Warning:[end] File already exists: {output_csv}")
         return True
 
     os.makedirs(os.path.dirname(output_csv), exist_ok=True)
@@ -0,0 +1,150 @@
+import os
+import json
+from marimo_extra.index_model import NotebookIndex, load_index
+from marimo_extra.transport import read_text
+
+# The navigation tree is published next to the index CSV file
+nav_tree_name = "nav_tree.json"
+
+# Group of the notebooks without tags, when grouping by tag
+untagged_group = "Other"
+
+def _new_group(name: str) -> dict:
+    return {"name": name, "count": 0, "groups": [], "entries": []}
+
+def _tags(record) -> list[str]:
+    return [tag.strip() for tag in record.Tags.split(",") if tag.strip() != ""]
+
+def nav_tree(notebooks: NotebookIndex, group_by: str="directory") -> dict:
+    """
+    Groups the notebooks of an index into a navigation tree.
+
+    Args:
+        notebooks (NotebookIndex): The notebooks.
+        group_by (str): How notebooks are grouped. Defaults to "directory".
+            Options include:
+                - "directory": By the directories of their HTML path, nested.
+                - "tag": By their tags, one level; notebooks with several tags
+                  are listed under each of them.
+
+    Returns:
+        dict: The root group. Every group has a "name", the "count" of
+            notebooks below it, its sub-"groups" and its "entries" as
+            [name, link] pairs, all sorted by name.
+    """
+    if group_by not in ["directory", "tag"]:
+        raise ValueError("group_by must be either 'directory' or 'tag'")
+
+    root = _new_group("")
+    children = {}
+    for record in notebooks:
+        if group_by == "directory":
+            paths = [[part for part in os.path.dirname(record.HTML_Path).split("/") if part != ""]]
+        else:
+            paths = [[tag] for tag in _tags(record)] or [[untagged_group]]
+        root["count"] += 1
+        for path in paths:
+            group = root
+            for depth in range(len(path)):
+                key = tuple(path[:depth + 1])
+                if key not in children:
+                    children[key] = _new_group(path[depth])
+                    group["groups"].append(children[key])
+                group = children[key]
+                group["count"] += 1
+            group["entries"].append([record.Name, record.HTML_Path])
+
+    def sort(group):
+        group["groups"].sort(key=lambda child: child["name"].casefold())
+        group["entries"].sort(key=lambda entry: entry[0].casefold())
+        for child in group["groups"]:
+            sort(child)
+    sort(root)
+    return root
+
+def write_nav_tree(
+    index_csv_path: str="public/index.csv",
+    output: str=None,
+    group_by: str="directory",
+    filter_out_data: dict[str, list[str]]={"Name": ["Home"]},
+    ) -> bool:
+    """
+    Writes the navigation tree of the notebooks in an index CSV file, at build time.
+
+    Args:
+        index_csv_path (str): The path to the "index.csv" file. Defaults to "public/index.csv".
+        output (str, optional): The path to the navigation tree. Defaults to
+            "nav_tree.json" next to the index CSV file.
+        group_by (str): How notebooks are grouped, see `nav_tree`. Defaults to "directory".
+        filter_out_data (dict): The rows left out of the navigation, see
+            `NotebookIndex.filter_out`. Defaults to the 'Home' row.
+
+    Returns:
+        bool: True if the navigation tree was written, False otherwise.
+    """
+    from marimo_extra.log import get_logger
+
+    logger = get_logger(__name__)
+    if not os.path.exists(index_csv_path):
+        logger.warning(f"No index.csv file found at {index_csv_path}. Navigation tree will be skipped.")
+        return False
+    if output is None:
+        output = os.path.join(os.path.dirname(index_csv_path), nav_tree_name)
+
+    tree = nav_tree(NotebookIndex.from_csv(index_csv_path).filter_out(filter_out_data), group_by)
+    tree["group_by"] = group_by
+    tmp_path = output + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(tree, f, separators=(",", ":"))
+    os.replace(tmp_path, output)
+    logger.info(f"[green]Grouped[end] {tree['count']} notebooks into [blue]{output}[end]")
+    return True
+
+_nav_tree_cache = {}
+
+def load_nav_tree(
+    home_dir: str,
+    nav_tree_path: str=os.path.join("public", nav_tree_name),
+    index_csv_path: str=os.path.join("public", "index.csv"),
+    group_by: str="directory",
+    filter_out_data: dict[str, list[str]]={"Name": ["Home"]},
+    ) -> dict | None:
+    """
+    Loads the navigation tree written by the build, once per session.
+
+    When there is no navigation tree with the requested grouping, it is
+    built from the index CSV file instead.
+
+    Args:
+        home_dir (str): The base directory or URL of the site.
+        nav_tree_path (str): The path to the navigation tree relative to the
+            home directory. Defaults to 'public/nav_tree.json'.
+        index_csv_path (str): The path to the index CSV file relative to the
+            home directory. Defaults to 'public/index.csv'.
+        group_by (str): How notebooks are grouped, see `nav_tree`. Defaults to "directory".
+        filter_out_data (dict): The rows left out when the tree is built from
+            the index CSV file. Defaults to the 'Home' row.
+
+    Returns:
+        dict | None: The root group, or None if neither file is available.
+    """
+    home_dir = str(home_dir)
+    key = (home_dir, nav_tree_path, group_by)
+    if key in _nav_tree_cache:
+        return _nav_tree_cache[key]
+
+    tree = None
+    try:
+        tree = json.loads(read_text(os.path.join(home_dir, nav_tree_path)))
+        if tree.get("group_by") != group_by:
+            tree = None
+    except Exception:
+        pass
+    if tree is None:
+        try:
+            notebooks = load_index(os.path.join(home_dir, index_csv_path)).filter_out(filter_out_data)
+        except Exception:
+            return None
+        tree = nav_tree(notebooks, group_by)
+    _nav_tree_cache[key] = tree
+    return tree
@@ -0,0 +1,189 @@
+import os
+import re
+import ast
+import json
+import inspect
+from concurrent.futures import ProcessPoolExecutor
+from marimo_extra.cache import file_hash
+from marimo_extra.sandbox_env import parse_script_metadata
+from marimo_extra.log import get_logger
+
+logger = get_logger(__name__)
+
+# Metadata cache of the project, next to the pipeline state
+metadata_cache_path = os.path.join(".marimo_extra", "metadata.json")
+
+# Below this many notebooks to parse, starting worker processes costs more than it saves
+parallel_threshold = 8
+
+# Table of the inline script metadata read for index metadata, e.g.
+#
+#   # /// script
+#   # [tool.marimo-extra]
+#   # name = "Penguins"
+#   # tags = ["data", "plots"]
+#   # ///
+metadata_table = "marimo-extra"
+
+_heading = re.compile(r"(?m)^[ \t]*#{1,6}[ \t]+(?P<text>.+?)[ \t#]*$")
+
+def _is_app_call(node) -> bool:
+    func = node.func
+    return (isinstance(func, ast.Attribute) and func.attr == "App") or \
+        (isinstance(func, ast.Name) and func.id == "App")
+
+def _is_md_call(node) -> bool:
+    func = node.func
+    return (isinstance(func, ast.Attribute) and func.attr == "md") or \
+        (isinstance(func, ast.Name) and func.id == "md")
+
+def _static_text(node) -> str | None:
+    """
+    Returns the text of a string literal, or the literal parts of an f-string.
+    """
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        return "".join(value.value for value in node.values if isinstance(value, ast.Constant))
+    return None
+
+def _first_heading(calls: list) -> str:
+    """
+    Finds the first markdown heading among `mo.md(...)` calls, in source order.
+    """
+    for call in sorted(calls, key=lambda node: (node.lineno, node.col_offset)):
+        if not call.args:
+            continue
+        text = _static_text(call.args[0])
+        if text is None:
+            continue
+        match = _heading.search(inspect.cleandoc(text))
+        if match:
+            return match.group("text")
+    return ""
+
+def _table_metadata(source: str) -> dict:
+    """
+    Reads the `[tool.marimo-extra]` table of the inline script metadata.
+    """
+    metadata = parse_script_metadata(source)
+    if metadata == "":
+        return {}
+    import tomllib
+    try:
+        table = tomllib.loads(metadata).get("tool", {}).get(metadata_table, {})
+    except tomllib.TOMLDecodeError:
+        return {}
+    return table if isinstance(table, dict) else {}
+
+def notebook_metadata(notebook_path: str) -> dict:
+    """
+    Extracts index metadata from a notebook's source, without importing or running it.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+
+    Returns:
+        dict: The metadata with the keys:
+            - 'title': The `app_title` given to `marimo.App`, or "".
+            - 'heading': The first markdown heading of the notebook, or "".
+            - 'name': The `name` of the `[tool.marimo-extra]` script metadata, or "".
+            - 'tags': The `tags` of the `[tool.marimo-extra]` script metadata.
+    """
+    with open(notebook_path, encoding="utf-8") as f:
+        source = f.read()
+
+    metadata = {"title": "", "heading": "", "name": "", "tags": []}
+    try:
+        tree = ast.parse(source, filename=notebook_path)
+    except SyntaxError:
+        return metadata
+
+    md_calls = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        if _is_md_call(node):
+            md_calls.append(node)
+        elif _is_app_call(node) and metadata["title"] == "":
+            for keyword in node.keywords:
+                if keyword.arg == "app_title" and isinstance(keyword.value, ast.Constant) and isinstance(keyword.value.value, str):
+                    metadata["title"] = keyword.value.value
+    metadata["heading"] = _first_heading(md_calls)
+
+    table = _table_metadata(source)
+    if isinstance(table.get("name"), str):
+        metadata["name"] = table["name"]
+    tags = table.get("tags", [])
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",")]
+    metadata["tags"] = [str(tag) for tag in tags if str(tag) != ""]
+    return metadata
+
+def _load_cache(cache_path: str) -> dict:
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cache(cache_path: str, cache: dict):
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+
+def collect_metadata(notebook_paths: list[str], cache_path: str=metadata_cache_path, workers: int=None) -> dict:
+    """
+    Extracts the metadata of many notebooks, in parallel and cached by file hash.
+
+    Notebooks whose content was parsed before are answered from the cache.
+    The others are parsed in worker processes when there are enough of them.
+    The cache only keeps the entries of the given notebooks.
+
+    Args:
+        notebook_paths (list[str]): The paths to the notebook files.
+        cache_path (str, optional): The cache file, None to disable caching.
+            Defaults to ".marimo_extra/metadata.json".
+        workers (int, optional): The number of worker processes. Defaults to
+            the number of CPUs.
+
+    Returns:
+        dict: A mapping of notebook path to its metadata (see `notebook_metadata`).
+    """
+    cache = _load_cache(cache_path) if cache_path is not None else {}
+    hashes = {path: file_hash(path) for path in notebook_paths}
+    missing = sorted({path for path, digest in hashes.items() if digest not in cache})
+
+    if len(missing) >= parallel_threshold and (workers is None or workers > 1):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(notebook_metadata, missing, chunksize=4))
+    else:
+        parsed = [notebook_metadata(path) for path in missing]
+    for path, metadata in zip(missing, parsed):
+        cache[hashes[path]] = metadata
+
+    if cache_path is not None:
+        used = set(hashes.values())
+        _save_cache(cache_path, {digest: cache[digest] for digest in used})
+    if missing:
+        logger.info(f"[green]Parsed[end] metadata of {len(missing)} notebooks ({len(notebook_paths) - len(missing)} cached)")
+    return {path: cache[digest] for path, digest in hashes.items()}
+
+def notebook_name(notebook_path: str, metadata: dict) -> str:
+    """
+    Chooses the display name of a notebook.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+        metadata (dict): The notebook's metadata (see `notebook_metadata`).
+
+    Returns:
+        str: The `name` from the script metadata, else the app title, else the
+            first markdown heading, else the capitalized file name.
+    """
+    for key in ["name", "title", "heading"]:
+        if metadata.get(key):
+            return metadata[key]
+    return os.path.basename(notebook_path).replace(".py", "").replace(".html", "").capitalize()
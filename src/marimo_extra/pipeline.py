@@ -0,0 +1,368 @@
+import os
+import json
+import inspect
+import importlib.util
+from pathlib import Path
+from marimo_extra.cache import file_hash, text_hash
+from marimo_extra.marimo_web import record_csv, read_index_rows
+from marimo_extra.marimo_publish import publish_site, notebook_build_key, load_manifest
+from marimo_extra.public_data import convert_public_assets, public_csv_files, columnar_path
+from marimo_extra.search_index import build_search_index, search_index_name
+from marimo_extra.nav import write_nav_tree, nav_tree_name
+from marimo_extra.gallery import write_gallery_html, gallery_html_name, prerender_home_gallery
+from marimo_extra.preload import inject_preload_hints
+from marimo_extra.verify import verify_build
+from marimo_extra.shard import SHARD_ENV, current_shard
+from marimo_extra.log import get_logger
+
+logger = get_logger(__name__)
+
+# Build state of the project, next to `scripts/` and `public/`
+build_dir = ".marimo_extra"
+state_name = "pipeline.json"
+
+stages = ["scan", "index", "search", "nav", "gallery", "assets", "export", "post-process", "verify"]
+
+# User scripts that replace the default action of a stage, and the
+# function each of them must define
+stage_hooks = {
+    "index": ("gen_index_csv.py", "gen_index_csv"),
+    "export": ("website_build.py", "build_website"),
+}
+
+# Options of the export stage, passed on to the export hook as keyword arguments
+export_options = ["profile", "cell_cache", "shard", "externalize"]
+
+# Functions run by the post-process stage, called with (output_dir, index_csv_path)
+post_processors = []
+
+def register_post_process(func):
+    """
+    Registers a function to run in the post-process stage of the build pipeline.
+
+    The function is called with `(output_dir, index_csv_path)` after the site
+    has been exported and returns True on success. Can be used as a decorator.
+
+    Args:
+        func (callable): The post-process function.
+
+    Returns:
+        callable: The function, unchanged.
+    """
+    if func not in post_processors:
+        post_processors.append(func)
+    return func
+
+register_post_process(prerender_home_gallery)
+register_post_process(inject_preload_hints)
+
+def _load_state() -> dict:
+    state_path = os.path.join(build_dir, state_name)
+    if not os.path.exists(state_path):
+        return {}
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_state(state: dict):
+    os.makedirs(build_dir, exist_ok=True)
+    with open(os.path.join(build_dir, state_name), "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+
+def _load_hook(scripts_dir: str, stage: str):
+    """
+    Loads the user script hooked to a stage and returns its function.
+
+    Returns:
+        tuple[str, callable] | None: The script path and its function, or None
+            if the script does not exist.
+    """
+    script_name, func_name = stage_hooks[stage]
+    script_path = os.path.join(scripts_dir, script_name)
+    if not os.path.exists(script_path):
+        return None
+
+    spec = importlib.util.spec_from_file_location(f"_marimo_extra_hook_{func_name}", script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not hasattr(module, func_name):
+        raise AttributeError(f"{script_path} does not define {func_name}()")
+    return script_path, getattr(module, func_name)
+
+def _hook_options(hook: tuple, options: dict) -> dict:
+    """
+    Picks the options a hook function takes, by the names of its parameters.
+
+    Raises:
+        ValueError: If an option is set that the function does not take.
+    """
+    script_path, func = hook
+    parameters = inspect.signature(func).parameters
+    if any(parameter.kind == inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()):
+        return options
+    unsupported = [name for name, value in options.items() if value and name not in parameters]
+    if unsupported:
+        raise ValueError(f"{script_path} does not support {', '.join(unsupported)}: add the parameters (or **options) to {func.__name__}() and pass them on to publish_site()")
+    return {name: value for name, value in options.items() if name in parameters}
+
+def _hook_hash(scripts_dir: str, stage: str) -> str:
+    script_path = os.path.join(scripts_dir, stage_hooks[stage][0])
+    return file_hash(script_path) if os.path.exists(script_path) else ""
+
+def _scan_fingerprint(notebook_dirs: list[str]) -> str:
+    """
+    Fingerprints the notebooks below the given directories by path, size and mtime.
+    """
+    parts = []
+    for directory in notebook_dirs:
+        for path in sorted(Path(directory).rglob("*.py")):
+            stat = path.stat()
+            parts += [str(path), stat.st_size, stat.st_mtime_ns]
+    return text_hash(*parts)
+
+def _export_fingerprint(index_csv_path: str, scripts_dir: str) -> str:
+    """
+    Fingerprints everything the export stage depends on: the index, the export
+    hook and the build key of every notebook in the index.
+    """
+    parts = [file_hash(index_csv_path), _hook_hash(scripts_dir, "export")]
+    for nb_path, html_path, nb_type in read_index_rows(index_csv_path):
+        parts.append(notebook_build_key(nb_path, nb_type, html_path) if os.path.exists(nb_path) else f"missing:{nb_path}")
+    return text_hash(*parts)
+
+def _run_stage(stage: str, context: dict) -> bool:
+    """
+    Runs one stage of the build pipeline.
+
+    Args:
+        stage (str): The stage name.
+        context (dict): The pipeline arguments.
+
+    Returns:
+        bool: True if the stage succeeded, False otherwise.
+    """
+    index_csv_path = context["index_csv_path"]
+    output_dir = context["output_dir"]
+
+    if stage == "scan":
+        # Nothing to produce: the fingerprint tells the later stages what changed
+        return True
+
+    if stage == "index":
+        hook = _load_hook(context["scripts_dir"], "index")
+        if hook is not None:
+            logger.info(f"Running hook [blue]{hook[0]}[end]")
+            return hook[1]() is not False and os.path.exists(index_csv_path)
+        return record_csv(context["notebook_dirs"], output_csv=index_csv_path) is not False
+
+    if stage == "search":
+        return build_search_index(index_csv_path)
+
+    if stage == "nav":
+        return write_nav_tree(index_csv_path)
+
+    if stage == "gallery":
+        return write_gallery_html(index_csv_path)
+
+    if stage == "assets":
+        return convert_public_assets(context["notebook_dirs"], state_path=os.path.join(build_dir, "public_data.json"))
+
+    if stage == "export":
+        hook = _load_hook(context["scripts_dir"], "export")
+        options = {name: context[name] for name in export_options}
+        if hook is not None:
+            options = _hook_options(hook, options)
+            logger.info(f"Running hook [blue]{hook[0]}[end]")
+            return hook[1](**options) is not False
+        return publish_site(index_csv_path=index_csv_path, output_dir=output_dir, **options)
+
+    if stage == "post-process":
+        success = True
+        for func in post_processors:
+            logger.info(f"Running post-process [blue]{func.__name__}[end]")
+            success &= func(output_dir, index_csv_path) is not False
+        return success
+
+    if stage == "verify":
+        return verify_build(output_dir, index_csv_path)
+
+    raise ValueError(f"Unknown stage: {stage}")
+
+def _stage_fingerprint(stage: str, context: dict) -> str | None:
+    """
+    Computes the fingerprint of a stage's inputs.
+
+    Returns:
+        str | None: The fingerprint, or None if the stage cannot be skipped.
+    """
+    index_csv_path = context["index_csv_path"]
+
+    if stage == "scan":
+        return _scan_fingerprint(context["notebook_dirs"])
+
+    if stage == "index":
+        return text_hash(_scan_fingerprint(context["notebook_dirs"]), _hook_hash(context["scripts_dir"], "index"))
+
+    if stage == "search":
+        if not os.path.exists(index_csv_path):
+            return None
+        rows = read_index_rows(index_csv_path)
+        return text_hash(file_hash(index_csv_path), *(file_hash(nb_path) if os.path.exists(nb_path) else "" for nb_path, _, _ in rows))
+
+    if stage in ["nav", "gallery"]:
+        return file_hash(index_csv_path) if os.path.exists(index_csv_path) else None
+
+    if stage == "assets":
+        return text_hash(*(part for path in public_csv_files(context["notebook_dirs"]) for part in [path, file_hash(path)]))
+
+    if stage == "export":
+        if not os.path.exists(index_csv_path):
+            return None
+        # Every option passed to the export changes what it produces
+        return text_hash(_export_fingerprint(index_csv_path, context["scripts_dir"]), *(context[option] for option in export_options))
+
+    if stage == "post-process":
+        if not load_manifest(context["output_dir"]):
+            return None
+        manifest = json.dumps(load_manifest(context["output_dir"]), sort_keys=True)
+        return text_hash(manifest, *(f"{func.__module__}.{func.__qualname__}" for func in post_processors))
+
+    return None
+
+def _stage_outputs_intact(stage: str, context: dict, entry: dict) -> bool:
+    """
+    Checks that the outputs a skipped stage produced last time are still there.
+    """
+    if stage == "index":
+        path = context["index_csv_path"]
+        return os.path.exists(path) and file_hash(path) == entry.get("output")
+    if stage == "search":
+        return os.path.exists(os.path.join(os.path.dirname(context["index_csv_path"]), search_index_name))
+    if stage == "nav":
+        return os.path.exists(os.path.join(os.path.dirname(context["index_csv_path"]), nav_tree_name))
+    if stage == "gallery":
+        return os.path.exists(os.path.join(os.path.dirname(context["index_csv_path"]), gallery_html_name))
+    if stage == "assets":
+        return all(os.path.exists(columnar_path(path)) for path in public_csv_files(context["notebook_dirs"]))
+    if stage in ["export", "post-process"]:
+        return os.path.isdir(context["output_dir"])
+    return True
+
+def _stage_output(stage: str, context: dict) -> str | None:
+    if stage == "index" and os.path.exists(context["index_csv_path"]):
+        return file_hash(context["index_csv_path"])
+    return None
+
+def run_pipeline(
+    run_stages: list[str]=None,
+    notebook_dirs: list[str]=["notebooks", "apps"],
+    index_csv_path: str=os.path.join("public", "index.csv"),
+    output_dir: str="_site",
+    scripts_dir: str="scripts",
+    force: bool=False,
+    after: dict[str, list]=None,
+    profile: bool=False,
+    cell_cache: bool=False,
+    shard: str=None,
+    externalize: bool=False,
+    ) -> bool:
+    """
+    Runs the website build pipeline in the current process.
+
+    The pipeline runs the stages scan, index, search, nav, gallery, assets,
+    export, post-process and verify in order. The search, nav and gallery stages
+    write the full-text search index, the navigation tree and the
+    prerendered gallery next to the index CSV file (see `build_search_index`,
+    `write_nav_tree` and `write_gallery_html`), the assets stage Parquet
+    copies of the CSV files in the notebooks' `public` folders (see
+    `convert_public_assets`), the verify stage checks the site for broken
+    links and missing files (see `verify_site`) and always runs.
+    Each stage is skipped when the fingerprint of its inputs matches the last
+    successful run and its outputs are still present. The user scripts
+    `scripts/gen_index_csv.py` and `scripts/website_build.py` replace the
+    default index and export actions when they exist. The export options
+    `profile`, `cell_cache`, `shard` and `externalize` are passed to
+    `build_website()` as keyword arguments; the export stage fails if one is
+    set that it does not take.
+
+    Args:
+        run_stages (list[str], optional): The stages to run. Defaults to all stages.
+        notebook_dirs (list[str]): The directories scanned for notebooks.
+            Defaults to ["notebooks", "apps"].
+        index_csv_path (str): The path to the "index.csv" file. Defaults to "public/index.csv".
+        output_dir (str): The site directory. Defaults to "_site".
+        scripts_dir (str): The directory of the hook scripts. Defaults to "scripts".
+        force (bool): If True, no stage is skipped. Defaults to False.
+        after (dict[str, list[callable]], optional): Functions to call after a
+            stage has run, by stage name. A function returning False fails the stage.
+        profile (bool): Whether the export stage profiles the cells
+            of executed notebooks (see `publish_site`). Defaults to False.
+        cell_cache (bool): Whether the export stage restores unchanged
+            cells from the cell cache (see `publish_site`). Defaults to False.
+        shard (str, optional): The share of the notebooks the export stage
+            exports, as "i/n" (see `publish_site`). Defaults to the
+            `MARIMO_EXTRA_SHARD` environment variable, or all notebooks.
+        externalize (bool): Whether the export stage moves large
+            embedded outputs of static HTML exports into separate files (see
+            `publish_site`). Defaults to False.
+
+    Returns:
+        bool: True if all stages succeeded, False otherwise.
+    """
+    if run_stages is None:
+        run_stages = stages
+    unknown = [stage for stage in run_stages if stage not in stages]
+    if unknown:
+        raise ValueError(f"Unknown stage: {', '.join(unknown)}")
+    after = {} if after is None else after
+
+    context = {
+        "notebook_dirs": notebook_dirs,
+        "index_csv_path": index_csv_path,
+        "output_dir": output_dir,
+        "scripts_dir": scripts_dir,
+        "profile": profile,
+        "cell_cache": cell_cache,
+        "shard": shard or os.environ.get(SHARD_ENV) or None,
+        "externalize": externalize,
+    }
+    if context["shard"] is not None:
+        # Fails early on a malformed shard
+        current_shard(context["shard"])
+    state = _load_state()
+
+    for stage in [stage for stage in stages if stage in run_stages]:
+        fingerprint = _stage_fingerprint(stage, context)
+        entry = state.get(stage, {})
+        if (not force and not after.get(stage) and fingerprint is not None
+                and entry.get("fingerprint") == fingerprint
+                and _stage_outputs_intact(stage, context, entry)):
+            logger.info(f"[green]Skipping[end] stage [blue]{stage}[end] (unchanged)")
+            continue
+
+        logger.info(f"\n[yellow]Running[end] stage [blue]{stage}[end]")
+        try:
+            ok = _run_stage(stage, context)
+            for func in after.get(stage, []):
+                ok &= func() is not False
+        except Exception as e:
+            logger.error(f"[red]Error in stage {stage}[end]: {e}")
+            ok = False
+
+        if not ok:
+            logger.error(f"[red]Stage {stage} failed[end]")
+            state.pop(stage, None)
+            _save_state(state)
+            return False
+
+        if after.get(stage):
+            # Outputs changed by `after` functions must not be reused by a normal run
+            state.pop(stage, None)
+        else:
+            # Fingerprint again: running the stage can change its own inputs
+            state[stage] = {"fingerprint": _stage_fingerprint(stage, context), "output": _stage_output(stage, context)}
+        _save_state(state)
+
+    return True
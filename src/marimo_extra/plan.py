@@ -0,0 +1,120 @@
+import os
+from marimo_extra.marimo_web import read_index_rows
+from marimo_extra.marimo_publish import notebook_build_key, load_manifest
+from marimo_extra.marimo_export import get_export_cmd, is_saved_html_fresh, _cache_options
+from marimo_extra.resources import load_history, export_workers, estimate_memory
+from marimo_extra.log import get_logger
+import marimo_extra.export_cache as export_cache
+
+logger = get_logger(__name__)
+
+# The marimo export behind every notebook type: (format, mode, show_code)
+type_exports = {
+    "app": ("html-wasm", "run", False),
+    "edit": ("html-wasm", "edit", True),
+    "exe": ("html-wasm", "run", True),
+    "html": ("html", "run", True),
+    "html-save": ("html", "run", True),
+    "html-nocode": ("html", "run", False),
+}
+
+def _in_export_cache(notebook_path: str, notebook_type: str) -> bool:
+    if not export_cache.export_cache_enabled():
+        return False
+    export_format, mode, show_code = type_exports[notebook_type]
+    output = notebook_path.replace(".py", ".html")
+    cmd = get_export_cmd(notebook_path, output, export_format, mode, show_code, False, False, "topological")
+    key = export_cache.export_cache_key(notebook_path, _cache_options(cmd, notebook_path, output), export_format == "html-wasm")
+    return export_cache.contains(key)
+
+def _plan_notebook(nb_path: str, html_path: str, nb_type: str, previous: dict, output_dir: str) -> tuple[str, str]:
+    """
+    Decides what the build does with one notebook.
+
+    Returns:
+        tuple[str, str]: The action ("export", "skip" or "copy") and the reason.
+    """
+    if not os.path.exists(nb_path):
+        return "export", "notebook not found, the export will fail"
+    if nb_type not in type_exports:
+        return "export", f"unknown notebook type {nb_type}, the export will fail"
+
+    entry = previous.get(html_path)
+    if entry is not None and entry["key"] == notebook_build_key(nb_path, nb_type, html_path):
+        if all(os.path.isfile(os.path.join(output_dir, path)) for path in entry["outputs"]):
+            return "skip", "unchanged since the last build"
+        reason = "outputs of the last build are missing"
+    elif entry is not None:
+        reason = "notebook, data files or type changed"
+    else:
+        reason = "not in the last build"
+
+    if nb_type == "html-save":
+        if is_saved_html_fresh(nb_path):
+            return "copy", "saved HTML is up to date"
+        reason = "saved HTML is missing or stale"
+    if _in_export_cache(nb_path, nb_type):
+        return "skip", f"{reason}, restored from the export cache"
+    return "export", reason
+
+def plan_build(index_csv_path: str="public/index.csv", output_dir: str="_site", incremental: bool=True) -> dict | None:
+    """
+    Plans a build of the website without exporting anything.
+
+    Reads the index, normalizes the notebook types and checks every notebook
+    against the manifest of the previous site, the saved HTML files and the
+    export cache, like `publish_site` would. Expected durations come from
+    past builds (see `run_exports`).
+
+    Args:
+        index_csv_path (str): The path to the "index.csv" file. Defaults to "public/index.csv".
+        output_dir (str): The site directory. Defaults to "_site".
+        incremental (bool): Whether unchanged notebooks are reused from the
+            previous site. Defaults to True.
+
+    Returns:
+        dict | None: The plan, or None if there is no index. Its "notebooks"
+            list has an entry per notebook with its "action" ("export",
+            "skip" or "copy"), the "reason" and the expected "seconds" (None
+            if the notebook was never exported here). "exports" counts the
+            notebooks to export, "seconds" estimates the export time with
+            "workers" concurrent exports and "needs_build" tells whether
+            anything has to be exported or copied.
+    """
+    rows = read_index_rows(index_csv_path)
+    if rows is None:
+        return None
+
+    previous = load_manifest(output_dir) if incremental else {}
+    history = load_history()
+    notebooks = []
+    for nb_path, html_path, nb_type in rows:
+        action, reason = _plan_notebook(nb_path, html_path, nb_type, previous, output_dir)
+        seconds = history.get(nb_path, {}).get("seconds") if action == "export" else 0.0
+        notebooks.append({"notebook": nb_path, "html_path": html_path, "type": nb_type, "action": action, "reason": reason, "seconds": seconds})
+
+    exports = [item for item in notebooks if item["action"] == "export"]
+    workers = export_workers([estimate_memory(item["notebook"], history) for item in exports]) if exports else 1
+    known = [item["seconds"] for item in exports if item["seconds"] is not None]
+    return {
+        "index_csv_path": index_csv_path,
+        "output_dir": output_dir,
+        "notebooks": notebooks,
+        "exports": len(exports),
+        "unknown_durations": len(exports) - len(known),
+        "workers": workers,
+        # Exports run concurrently, but never faster than the longest one
+        "seconds": round(max(sum(known) / workers, max(known, default=0.0)), 3),
+        "needs_build": any(item["action"] != "skip" for item in notebooks),
+    }
+
+def print_plan(plan: dict):
+    """
+    Prints a build plan (see `plan_build`) as a table.
+    """
+    actions = {"export": "[yellow]export[end]", "skip": "[green]skip[end]  ", "copy": "[blue]copy[end]  "}
+    for item in plan["notebooks"]:
+        seconds = "      ?" if item["seconds"] is None else f"{item['seconds']:6.1f}s"
+        logger.info(f"{actions[item['action']]} {seconds}  {item['notebook']} -> {item['html_path']} ({item['type']}): {item['reason']}")
+    unknown = f", {plan['unknown_durations']} never exported before" if plan["unknown_durations"] else ""
+    logger.info(f"{plan['exports']} of {len(plan['notebooks'])} notebooks to export, about {plan['seconds']:.1f}s with {plan['workers']} worker{'s' if plan['workers'] != 1 else ''}{unknown}")
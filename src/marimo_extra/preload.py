@@ -0,0 +1,162 @@
+import os
+import re
+import ast
+import html
+from marimo_extra.cache import parse_size
+from marimo_extra.dependencies import notebook_data_dependencies, _call_name
+from marimo_extra.index_model import NotebookIndex
+from marimo_extra.marimo_publish import load_manifest, wasm_types
+from marimo_extra.public_data import columnar_path, columnar_ext
+from marimo_extra.log import get_logger
+
+logger = get_logger(__name__)
+
+# Larger files are only prefetched, so they do not hold up Pyodide's own downloads
+preload_max_size = "10M"
+
+# Files the runtime helpers fetch by default, relative to the notebook location
+helper_files = {
+    "index_csv_to_dict": ["public/index.csv"],
+    "index_csv_to_nav_dict": ["public/index.csv"],
+    "index_csv_to_nav_tree": ["public/nav_tree.json"],
+    "Gallery": ["public/gallery.html", "public/index.csv"],
+}
+
+_head_end = re.compile(r"</head>", re.IGNORECASE)
+_hints = re.compile(r"<!-- marimo-extra-preload -->.*?<!-- /marimo-extra-preload -->", re.DOTALL)
+
+def _site_path(dependency: str, notebook_path: str, html_path: str) -> str | None:
+    """
+    Returns where a data file of a notebook ends up in the site, relative to
+    the site directory, or None if it is not published.
+
+    Marimo copies the `public` folder next to an HTML-WASM notebook into the
+    folder of its output.
+    """
+    public_dir = os.path.join(os.path.dirname(notebook_path), "public")
+    relative = os.path.relpath(dependency, public_dir)
+    if relative.startswith(os.pardir):
+        return None
+    return os.path.normpath(os.path.join(os.path.dirname(html_path), "public", relative))
+
+def _helper_dependencies(notebook_path: str) -> list[str]:
+    """
+    Lists the files the `marimo_extra` helpers called by a notebook read by default.
+    """
+    with open(notebook_path, encoding="utf-8") as f:
+        try:
+            tree = ast.parse(f.read(), filename=notebook_path)
+        except SyntaxError:
+            return []
+    notebook_dir = os.path.dirname(notebook_path)
+    files = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            for path in helper_files.get(_call_name(node).split(".")[-1], []):
+                files.append(os.path.normpath(os.path.join(notebook_dir, path)))
+    return [path for path in dict.fromkeys(files) if os.path.isfile(path)]
+
+def notebook_hints(notebook_path: str, html_path: str, output_dir: str) -> list[tuple[str, str]]:
+    """
+    Finds the files an exported HTML-WASM notebook will fetch, without running it.
+
+    The data files come from `notebook_data_dependencies` and the defaults
+    of the `marimo_extra` helpers it calls (see `helper_files`). Files below
+    a directory the notebook only knows at runtime are left out, except
+    wheels (e.g. `marimo_extra` installed with micropip). Of a CSV file with
+    a Parquet copy, only the copy is hinted, since `read_public` prefers it.
+    When the notebook reads the index CSV file, the thumbnails of the index
+    are hinted as well.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+        html_path (str): The output path relative to the site directory.
+        output_dir (str): The site directory.
+
+    Returns:
+        list[tuple[str, str]]: The hint ("preload" or "prefetch") and the
+            site path of every file, relative to the site directory.
+    """
+    static = set(notebook_data_dependencies(notebook_path, include_dynamic=False))
+    dependencies = [path for path in notebook_data_dependencies(notebook_path) if path in static or path.endswith(".whl")]
+    dependencies = list(dict.fromkeys(dependencies + _helper_dependencies(notebook_path)))
+
+    # The files as laid out next to the notebook, and the files holding them
+    files = []
+    for path in dependencies:
+        if path.endswith(".csv") and path.removesuffix(".csv") + columnar_ext in dependencies:
+            continue
+        if path.endswith(".csv") and columnar_path(path) in dependencies:
+            # Published next to the CSV file, see `publish_columnar_copies`
+            files.append((path.removesuffix(".csv") + columnar_ext, columnar_path(path)))
+        else:
+            files.append((path, path))
+
+    max_size = parse_size(preload_max_size)
+    hints = []
+    for dependency, source in files:
+        site_path = _site_path(dependency, notebook_path, html_path)
+        if site_path is None or not os.path.isfile(os.path.join(output_dir, site_path)):
+            continue
+        hint = "preload" if os.path.getsize(source) <= max_size else "prefetch"
+        hints.append((hint, site_path))
+
+    index_csv_path = os.path.join(os.path.dirname(notebook_path), "public", "index.csv")
+    if os.path.normpath(index_csv_path) in dependencies:
+        for record in NotebookIndex.from_csv(index_csv_path):
+            thumbnail = record.Thumbnail.strip()
+            if thumbnail and "://" not in thumbnail and not thumbnail.startswith("data:"):
+                site_path = os.path.normpath(os.path.join(os.path.dirname(html_path), thumbnail))
+                if os.path.isfile(os.path.join(output_dir, site_path)):
+                    hints.append(("prefetch", site_path))
+    return list(dict.fromkeys(hints))
+
+def _link_tag(hint: str, href: str) -> str:
+    if hint == "prefetch":
+        return f'<link rel="prefetch" href="{html.escape(href)}">'
+    # Pyodide fetches in CORS mode, the preload must match to be reused
+    return f'<link rel="preload" href="{html.escape(href)}" as="fetch" crossorigin="anonymous">'
+
+def inject_preload_hints(output_dir: str, index_csv_path: str) -> bool:
+    """
+    Adds `<link rel="preload">` and `<link rel="prefetch">` hints for the
+    files every HTML-WASM page of the site will fetch (see `notebook_hints`),
+    a post-process of the build pipeline.
+
+    The browser then downloads them while Pyodide starts, instead of one
+    after another as the cells run. Hints added by an earlier run are replaced.
+
+    Args:
+        output_dir (str): The site directory.
+        index_csv_path (str): The path to the "index.csv" file, unused.
+
+    Returns:
+        bool: True on success.
+    """
+    pages = 0
+    for html_path, entry in load_manifest(output_dir).items():
+        page_path = os.path.join(output_dir, html_path)
+        if entry["type"] not in wasm_types or not os.path.isfile(page_path) or not os.path.isfile(entry["notebook"]):
+            continue
+        hints = notebook_hints(entry["notebook"], html_path, output_dir)
+
+        with open(page_path, encoding="utf-8") as f:
+            original = f.read()
+        page = _hints.sub("", original)
+        match = _head_end.search(page)
+        if hints and match is not None:
+            page_dir = os.path.dirname(html_path) or "."
+            links = "".join(_link_tag(hint, os.path.relpath(site_path, page_dir).replace(os.sep, "/")) for hint, site_path in hints)
+            page = f"{page[:match.start()]}<!-- marimo-extra-preload -->{links}<!-- /marimo-extra-preload -->{page[match.start():]}"
+            pages += 1
+        if page == original:
+            continue
+
+        # The page may be hardlinked to the previous site or the export cache
+        tmp_path = page_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(page)
+        os.replace(tmp_path, page_path)
+
+    logger.info(f"[green]Added[end] preload hints to {pages} pages")
+    return True
@@ -0,0 +1,227 @@
+import os
+from marimo_extra.transport import read_bytes
+from marimo_extra.log import get_logger
+
+# Runtime part: `read_public` is used by notebooks, also in the browser (Pyodide).
+# Data libraries are only imported when a file is read or converted.
+
+logger = get_logger(__name__)
+
+# The columnar copy of every CSV file of a `public/` folder, published next to it
+columnar_ext = ".parquet"
+
+# The build keeps the columnar copies here, out of the notebooks' `public/` folders
+columnar_dir = os.path.join(".marimo_extra", "public_data")
+
+# Files of `public/` folders that are read with the `csv` module and never converted
+skip_names = ["index.csv"]
+
+# Parsed frames of the session, by (path, library)
+_public_cache = {}
+
+def _default_library() -> str:
+    try:
+        import polars
+        return "polars"
+    except ImportError:
+        return "pandas"
+
+def _parse_errors(library: str) -> tuple[type, ...]:
+    """
+    Returns the exceptions the library raises for a file it cannot parse.
+    """
+    if library == "polars":
+        import polars as pl
+        return (ValueError, pl.exceptions.PolarsError)
+    # pyarrow's ArrowInvalid is a ValueError
+    return (ValueError,)
+
+def _read_frame(data: bytes, columnar: bool, library: str):
+    import io
+    if library == "polars":
+        import polars as pl
+        return pl.read_parquet(io.BytesIO(data)) if columnar else pl.read_csv(io.BytesIO(data))
+    import pandas as pd
+    return pd.read_parquet(io.BytesIO(data)) if columnar else pd.read_csv(io.BytesIO(data))
+
+def read_public(name: str, home_dir: str=None, library: str=None):
+    """
+    Reads a data file of the notebook's `public` folder into a dataframe.
+
+    The columnar copy the build publishes next to the CSV file
+    (`<name>.parquet`, see `convert_public_assets`) is read when it exists and
+    the library can parse it; otherwise the CSV file is read. Parquet is smaller to download and
+    much faster to parse than CSV, especially in the browser. The parsed frame
+    is kept for the session, so reading the same file again is free; don't
+    modify it in place.
+
+    Args:
+        name (str): The file name in the `public` folder, with or without the
+            ".csv" extension, e.g. "penguins.csv".
+        home_dir (str, optional): The directory or URL containing the `public`
+            folder. Defaults to the location of the current notebook.
+        library (str, optional): "polars" or "pandas". Defaults to polars if
+            it is installed, else pandas.
+
+    Returns:
+        polars.DataFrame | pandas.DataFrame: The data.
+    """
+    if home_dir is None:
+        import marimo as mo
+        home_dir = mo.notebook_location()
+    if library is None:
+        library = _default_library()
+    if library not in ["polars", "pandas"]:
+        raise ValueError("library must be either 'polars' or 'pandas'")
+
+    stem = name[:-len(".csv")] if name.endswith(".csv") else name
+    base = f"{str(home_dir).rstrip('/')}/public/{stem}"
+    cached = _public_cache.get((base, library))
+    if cached is not None:
+        return cached
+
+    try:
+        data = read_bytes(base + columnar_ext)
+    except OSError:
+        # No columnar copy, e.g. when the notebook runs from its sources
+        data = None
+    try:
+        frame = None if data is None else _read_frame(data, True, library)
+    except (ImportError, *_parse_errors(library)) as e:
+        # No Parquet support (e.g. pandas without pyarrow), or a damaged copy
+        logger.warning(f"[yellow]Warning:[end] Cannot read {base + columnar_ext} ({type(e).__name__}: {e}), reading the CSV file")
+        frame = None
+    if frame is None:
+        frame = _read_frame(read_bytes(base + ".csv"), False, library)
+    _public_cache[(base, library)] = frame
+    return frame
+
+def public_csv_files(notebook_dirs: list[str]) -> list[str]:
+    """
+    Lists the CSV files of the `public` folders below the notebook directories.
+
+    Args:
+        notebook_dirs (list[str]): The directories scanned for notebooks.
+
+    Returns:
+        list[str]: The sorted paths of the CSV files.
+    """
+    files = []
+    for directory in notebook_dirs:
+        for root, dirs, names in os.walk(directory):
+            dirs[:] = [d for d in dirs if not d.startswith((".", "__"))]
+            if os.path.basename(root) != "public":
+                continue
+            files += [os.path.join(root, name) for name in names if name.endswith(".csv") and name not in skip_names]
+    return sorted(files)
+
+def columnar_path(csv_path: str) -> str:
+    """
+    Returns the path of the columnar copy of a CSV file in the build directory.
+    """
+    relative = os.path.relpath(csv_path)
+    if relative.startswith(os.pardir):
+        # Outside the project: mirrored below its absolute path
+        relative = os.path.splitdrive(os.path.abspath(csv_path))[1].lstrip(os.sep)
+    return os.path.join(columnar_dir, relative[:-len(".csv")] + columnar_ext)
+
+def publish_columnar_copies(public_dir: str, output_dir: str) -> list[str]:
+    """
+    Places the columnar copies of the CSV files of a `public` folder into its
+    published copy, next to the CSV files, where `read_public` finds them.
+
+    Files the folder itself has are never replaced.
+
+    Args:
+        public_dir (str): The notebook's `public` folder.
+        output_dir (str): The copy of the folder in the site, e.g. written by
+            marimo's HTML-WASM export.
+
+    Returns:
+        list[str]: The placed files.
+    """
+    from marimo_extra.cache import link_or_copy
+
+    placed = []
+    for root, dirs, names in os.walk(public_dir):
+        dirs[:] = [d for d in dirs if not d.startswith((".", "__"))]
+        for name in names:
+            if not name.endswith(".csv") or name in skip_names:
+                continue
+            csv_path = os.path.join(root, name)
+            copy_path = columnar_path(csv_path)
+            output = os.path.join(output_dir, os.path.relpath(csv_path, public_dir)[:-len(".csv")] + columnar_ext)
+            if not os.path.exists(copy_path) or os.path.exists(output):
+                continue
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            link_or_copy(copy_path, output)
+            placed.append(output)
+    return placed
+
+def _write_parquet(csv_path: str, output: str):
+    try:
+        import polars as pl
+        pl.read_csv(csv_path).write_parquet(output)
+    except ImportError:
+        import pandas as pd
+        pd.read_csv(csv_path).to_parquet(output, index=False)
+
+def convert_public_assets(notebook_dirs: list[str]=["notebooks", "apps"], state_path: str=os.path.join(".marimo_extra", "public_data.json")) -> bool:
+    """
+    Writes a Parquet copy of every CSV file of the notebooks' `public` folders.
+
+    The copies are kept in the build directory (see `columnar_path`), so the
+    notebooks' folders are left as they are. Copies are only written again
+    when the CSV file changed since it was last converted, so a build without
+    data changes writes nothing. `publish_site` places them next to the CSV
+    files in the `public` folders that HTML-WASM exports publish, where
+    `read_public` picks them up.
+
+    Args:
+        notebook_dirs (list[str]): The directories scanned for notebooks.
+            Defaults to ["notebooks", "apps"].
+        state_path (str, optional): The file recording the converted CSV
+            hashes. Defaults to ".marimo_extra/public_data.json".
+
+    Returns:
+        bool: True if every copy is up to date, False if a conversion failed.
+    """
+    import json
+    from marimo_extra.cache import file_hash
+
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+
+    success = True
+    converted = {}
+    for csv_path in public_csv_files(notebook_dirs):
+        digest = file_hash(csv_path)
+        output = columnar_path(csv_path)
+        if state.get(csv_path) == digest and os.path.exists(output):
+            converted[csv_path] = digest
+            continue
+
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        tmp_path = output + ".tmp"
+        try:
+            _write_parquet(csv_path, tmp_path)
+            os.replace(tmp_path, output)
+        except ImportError:
+            logger.warning("[yellow]Warning:[end] Converting public data needs polars, or pandas with pyarrow; skipped")
+            return True
+        except Exception as e:
+            logger.error(f"[red]Error converting[end] {csv_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            success = False
+            continue
+        logger.info(f"[green]Converted[end] {csv_path} to {output} ({os.path.getsize(csv_path)} -> {os.path.getsize(output)} bytes)")
+        converted[csv_path] = digest
+
+    os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump(converted, f, indent=1, sort_keys=True)
+    return success
@@ -0,0 +1,245 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from marimo_extra.cache import parse_size
+from marimo_extra.marimo_export import export_peak_rss
+from marimo_extra.log import get_logger
+
+logger = get_logger(__name__)
+
+MEMORY_BUDGET_ENV = "MARIMO_EXTRA_MEMORY_BUDGET"
+EXPORT_WORKERS_ENV = "MARIMO_EXTRA_EXPORT_WORKERS"
+
+# Peak memory of past exports, next to the pipeline state of the project
+history_path = os.path.join(".marimo_extra", "export_history.json")
+
+# Share of the available memory exports may use when no budget is set
+default_budget_fraction = 0.8
+
+# Assumed peak of a notebook that was never exported here
+default_export_memory = "1G"
+
+# Margin on a notebook's last peak, which varies between runs
+estimate_margin = 1.2
+
+_cgroup_root = "/sys/fs/cgroup"
+
+def _read_first_line(path: str) -> str | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+def _cgroup_cpu_limit() -> float | None:
+    """
+    Returns the CPU quota of the cgroup (v2 or v1) in cores, None if unlimited.
+    """
+    line = _read_first_line(os.path.join(_cgroup_root, "cpu.max"))
+    if line is not None:
+        quota, _, period = line.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+        return None
+    quota = _read_first_line(os.path.join(_cgroup_root, "cpu", "cpu.cfs_quota_us"))
+    period = _read_first_line(os.path.join(_cgroup_root, "cpu", "cpu.cfs_period_us"))
+    if quota is not None and period is not None and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+def _cgroup_free_memory() -> int | None:
+    """
+    Returns the memory left under the cgroup's limit (v2 or v1), None if unlimited.
+    """
+    for limit_name, usage_name in [("memory.max", "memory.current"), (os.path.join("memory", "memory.limit_in_bytes"), os.path.join("memory", "memory.usage_in_bytes"))]:
+        limit = _read_first_line(os.path.join(_cgroup_root, limit_name))
+        usage = _read_first_line(os.path.join(_cgroup_root, usage_name))
+        if limit is None or usage is None:
+            continue
+        # cgroup v1 reports "no limit" as a huge number
+        if limit == "max" or int(limit) >= 1 << 60:
+            return None
+        return max(0, int(limit) - int(usage))
+    return None
+
+def _system_free_memory() -> int | None:
+    try:
+        with open("/proc/meminfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def available_cpus() -> int:
+    """
+    Returns the number of cores this process may use, honouring CPU affinity
+    and cgroup quotas (e.g. the CPU limit of a container).
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_limit()
+    if quota is not None:
+        cpus = min(cpus, max(1, int(quota)))
+    return max(1, cpus)
+
+def available_memory() -> int | None:
+    """
+    Returns the memory in bytes that can be used without swapping or hitting
+    the cgroup limit (e.g. the memory limit of a container), None if unknown.
+    """
+    candidates = [size for size in [_system_free_memory(), _cgroup_free_memory()] if size is not None]
+    return min(candidates) if candidates else None
+
+def memory_budget() -> int | None:
+    """
+    Returns the memory in bytes that concurrent exports may use together.
+
+    Set with the `MARIMO_EXTRA_MEMORY_BUDGET` environment variable (e.g. "6G");
+    defaults to 80% of the available memory. None if neither is known.
+    """
+    if os.environ.get(MEMORY_BUDGET_ENV):
+        return parse_size(os.environ[MEMORY_BUDGET_ENV])
+    memory = available_memory()
+    return None if memory is None else int(memory * default_budget_fraction)
+
+def load_history() -> dict:
+    """
+    Loads the peak memory (RSS, in bytes) and duration in seconds of past
+    exports by notebook path.
+    """
+    try:
+        with open(history_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_history(history: dict, path: str=None):
+    path = history_path if path is None else path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=1, sort_keys=True)
+
+def estimate_memory(notebook_path: str, history: dict) -> int:
+    """
+    Estimates the peak memory of a notebook's export from its last export.
+    """
+    peak = history.get(notebook_path, {}).get("peak_rss")
+    if peak is None:
+        return parse_size(default_export_memory)
+    return int(peak * estimate_margin)
+
+def export_workers(estimates: list[int], budget: int=None) -> int:
+    """
+    Chooses the number of concurrent exports.
+
+    Set with the `MARIMO_EXTRA_EXPORT_WORKERS` environment variable; otherwise
+    as many as there are cores, but no more than the typical export fits
+    into the memory budget.
+
+    Args:
+        estimates (list[int]): The estimated peak memory of every export.
+        budget (int, optional): The memory budget in bytes. Defaults to `memory_budget()`.
+
+    Returns:
+        int: The number of workers, at least 1.
+    """
+    if os.environ.get(EXPORT_WORKERS_ENV):
+        return max(1, int(os.environ[EXPORT_WORKERS_ENV]))
+    workers = min(available_cpus(), max(1, len(estimates)))
+    budget = memory_budget() if budget is None else budget
+    if budget is not None and estimates:
+        typical = sorted(estimates)[len(estimates) // 2]
+        workers = min(workers, max(1, budget // max(1, typical)))
+    return workers
+
+class MemoryAdmission:
+    """
+    Admits exports while their estimated peak memory fits into a budget.
+
+    An export that does not fit waits until running exports finish. An export
+    larger than the whole budget is admitted alone, so it can still run.
+    """
+    def __init__(self, budget: int | None):
+        self.budget = budget
+        self.in_use = 0
+        self.running = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def admit(self, estimate: int):
+        with self._condition:
+            while self.budget is not None and self.running > 0 and self.in_use + estimate > self.budget:
+                self._condition.wait()
+            self.in_use += estimate
+            self.running += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_use -= estimate
+                self.running -= 1
+                self._condition.notify_all()
+
+def run_exports(jobs: list[tuple[str, callable]], workers: int=None, history_output: str=None) -> list:
+    """
+    Runs notebook exports concurrently under the memory budget.
+
+    Each export is admitted when its estimated peak memory fits next to the
+    running exports (see `MemoryAdmission`). Exports with the largest estimates
+    are started first. The peak RSS and duration of every export that ran
+    marimo are recorded for the next build.
+
+    Args:
+        jobs (list[tuple[str, callable]]): The notebook path and the function
+            exporting it, for every export.
+        workers (int, optional): The number of concurrent exports. Defaults
+            to `export_workers()`.
+        history_output (str, optional): The file the updated history is
+            written to. Defaults to the project's history.
+
+    Returns:
+        list: The results of the functions, in the order of `jobs`.
+    """
+    history = load_history()
+    estimates = [estimate_memory(notebook_path, history) for notebook_path, _ in jobs]
+    budget = memory_budget()
+    if workers is None:
+        workers = export_workers(estimates, budget)
+    admission = MemoryAdmission(budget)
+    if workers > 1 and len(jobs) > 1:
+        budget_text = "no memory budget" if budget is None else f"memory budget {budget / 1024 ** 3:.1f} GiB"
+        logger.info(f"Exporting {len(jobs)} notebooks with {workers} workers ({budget_text})")
+
+    seconds = {}
+
+    def run(i):
+        notebook_path, func = jobs[i]
+        export_peak_rss.pop(notebook_path, None)
+        with admission.admit(estimates[i]):
+            start = time.perf_counter()
+            result = func()
+            seconds[notebook_path] = time.perf_counter() - start
+            return result
+
+    if workers <= 1:
+        results = {i: run(i) for i in range(len(jobs))}
+    else:
+        order = sorted(range(len(jobs)), key=lambda i: estimates[i], reverse=True)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = dict(zip(order, pool.map(run, order)))
+
+    for notebook_path, _ in jobs:
+        if notebook_path in export_peak_rss:
+            history[notebook_path] = {"peak_rss": export_peak_rss[notebook_path], "seconds": round(seconds[notebook_path], 3)}
+    _save_history(history, history_output)
+    return [results[i] for i in range(len(jobs))]
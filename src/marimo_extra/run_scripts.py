@@ -1,66 +1,202 @@
 import os
+import sys
+import subprocess
+import importlib.util
+
+def _run_pipeline(*args, **kwargs) -> bool:
+    from marimo_extra.pipeline import run_pipeline
+    return run_pipeline(*args, **kwargs)
+
+def _exit(success: bool):
+    sys.exit(0 if success else 1)
 
 def run_gen_index_csv():
     """
-    Runs the gen_index_csv.py script in the scripts directory if it exists.
-    
-    The script is expected to generate an index.csv file. 
-    Which specifies the Marimo Notebooks' names, paths, export paths and types, etc . 
-    By default, the index.csv file is generated in the public directory, 
+    Runs the scan, index, search, nav and gallery stages of the build pipeline.
+
+    The index stage runs `gen_index_csv()` from scripts/gen_index_csv.py if it exists.
+    The script is expected to generate an index.csv file.
+    Which specifies the Marimo Notebooks' names, paths, export paths and types, etc .
+    By default, the index.csv file is generated in the public directory,
     and exported notebooks are saving them to the _site directory.
     """
-    if os.path.exists(os.path.join("scripts", "gen_index_csv.py")):
-        os.system("uv run scripts/gen_index_csv.py")
-    else:
-        print("No scripts/gen_index_csv.py found")
+    _exit(_run_pipeline(["scan", "index", "search", "nav", "gallery"]))
 
 
-def run_website_build():
+def run_website_build(argv: list[str]=None):
     """
-    Runs the website_build.py script in the scripts directory if it exists.
-    
-    The script is expected to generate the website by exporting the notebooks
-    specified in the index.csv file. By default, the index.csv file is generated 
+    Runs the assets, export, post-process and verify stages of the build pipeline.
+
+    The export stage runs `build_website(**options)` from scripts/website_build.py if it exists,
+    with the options below, which is expected to generate the website by exporting the notebooks
+    specified in the index.csv file. By default, the index.csv file is generated
     in the public directory, and exported notebooks are saving them
     to the _site directory.
+
+    Options:
+        --shard i/n: Export only the i-th of n shares of the notebooks, e.g.
+            on one runner of a CI matrix, and skip the post-process and verify stages.
+            The shard sites are combined with `merge_shards`.
+        --externalize-outputs: Move large outputs embedded in static HTML
+            exports into separate, lazily loaded files under _site/_assets.
+        --profile: Record the execution time and memory of every cell of the
+            executed notebooks, and list the slowest cells in the build report.
+        --cell-cache: Restore the cells of executed notebooks whose code,
+            upstream cells and data files are unchanged from the cell cache
+            instead of running them.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="website_build", description="Export the notebooks of the index into the website.")
+    parser.add_argument("--shard", metavar="i/n", help="export only the i-th of n shares of the notebooks")
+    parser.add_argument("--externalize-outputs", action="store_true", help="move large embedded outputs of static HTML exports into separate files")
+    parser.add_argument("--profile", action="store_true", help="profile the cells of the executed notebooks")
+    parser.add_argument("--cell-cache", action="store_true", help="restore unchanged cells from the cell cache instead of running them")
+    args = parser.parse_args(argv)
+
+    options = {"externalize": args.externalize_outputs, "profile": args.profile, "cell_cache": args.cell_cache}
+    if args.shard is None:
+        _exit(_run_pipeline(["assets", "export", "post-process", "verify"], **options))
+    _exit(_run_pipeline(["assets", "export"], shard=args.shard, **options))
+
+def run_merge_shards(argv: list[str]=None):
+    """
+    Combines the sites of a sharded build (`website_build --shard i/n`) into
+    one site and runs the post-process and verify stages of the build pipeline on it.
+
+    Options:
+        SHARD_DIR...: The site directories of all shards.
+        --index PATH: The index CSV file. Defaults to public/index.csv.
+        --output-dir DIR: The site directory. Defaults to _site.
+    """
+    import argparse
+    from marimo_extra.marimo_publish import merge_shards
+
+    parser = argparse.ArgumentParser(prog="merge_shards", description="Combine the sites of a sharded build into one site.")
+    parser.add_argument("shard_dirs", nargs="+", metavar="SHARD_DIR", help="the site directory of a shard")
+    parser.add_argument("--index", default=os.path.join("public", "index.csv"), help="the index CSV file")
+    parser.add_argument("--output-dir", default="_site", help="the site directory")
+    args = parser.parse_args(argv)
+
+    if not merge_shards(args.shard_dirs, args.output_dir, args.index):
+        _exit(False)
+    _exit(_run_pipeline(["post-process", "verify"], index_csv_path=args.index, output_dir=args.output_dir))
+
+def run_plan_build(argv: list[str]=None):
+    """
+    Prints what the export stage would do, without exporting anything.
+
+    Every notebook of the index is listed as export, skip (unchanged or in
+    the export cache) or copy (up-to-date saved HTML), with the reason and
+    the expected duration from past builds.
+
+    Options:
+        --json: Print the plan as JSON instead of a table.
+        --exit-code: Exit with 1 if anything has to be built, 0 otherwise.
+        --index PATH: The index CSV file. Defaults to public/index.csv.
+        --output-dir DIR: The site directory. Defaults to _site.
     """
-    if os.path.exists(os.path.join("scripts", "website_build.py")):
-        os.system("uv run scripts/website_build.py")
+    import json
+    import argparse
+    from marimo_extra.plan import plan_build, print_plan
+
+    parser = argparse.ArgumentParser(prog="plan_build", description="Plan a website build without exporting anything.")
+    parser.add_argument("--json", action="store_true", help="print the plan as JSON")
+    parser.add_argument("--exit-code", action="store_true", help="exit with 1 if anything has to be built")
+    parser.add_argument("--index", default=os.path.join("public", "index.csv"), help="the index CSV file")
+    parser.add_argument("--output-dir", default="_site", help="the site directory")
+    args = parser.parse_args(argv)
+
+    plan = plan_build(args.index, args.output_dir)
+    if plan is None:
+        print(f"No index.csv file found at {args.index}", file=sys.stderr)
+        _exit(False)
+    if args.json:
+        print(json.dumps(plan, indent=1))
     else:
-        print("No scripts/website_build.py found")
+        print_plan(plan)
+    _exit(not (args.exit_code and plan["needs_build"]))
+
+def run_verify_site(argv: list[str]=None):
+    """
+    Checks the built website for broken links and missing files, and exits
+    with 1 if anything is broken.
+
+    Options:
+        --json: Print the report as JSON.
+        --ignore PATTERN: Do not report missing site paths matching the
+            pattern; can be repeated.
+        --index PATH: The index CSV file. Defaults to public/index.csv.
+        --output-dir DIR: The site directory. Defaults to _site.
+    """
+    import json
+    import argparse
+    from marimo_extra.verify import verify_build, verify_site
+
+    parser = argparse.ArgumentParser(prog="verify_site", description="Check the website for broken links and missing files.")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--ignore", action="append", default=[], metavar="PATTERN", help="do not report missing site paths matching the pattern")
+    parser.add_argument("--index", default=os.path.join("public", "index.csv"), help="the index CSV file")
+    parser.add_argument("--output-dir", default="_site", help="the site directory")
+    args = parser.parse_args(argv)
+
+    if args.json:
+        report = verify_site(args.output_dir, args.index, args.ignore)
+        print(json.dumps(report, indent=1))
+        _exit(not report["broken"])
+    _exit(verify_build(args.output_dir, args.index, args.ignore))
+
+def serve_site(output_dir: str="_site", port: int=8000):
+    """
+    Serves the website from the output directory with Python's http.server,
+    in the current process.
+
+    Args:
+        output_dir (str): The directory to serve. Defaults to "_site".
+        port (int): The port to listen on. Defaults to 8000.
+    """
+    import functools
+    import http.server
+    from marimo_extra.log import flush
+
+    # Queued build messages go out before the server's own output
+    flush()
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=output_dir)
+    http.server.test(HandlerClass=handler, ServerClass=http.server.ThreadingHTTPServer, port=port)
 
 def run_local_server():
     """
-    Runs the web server for the website by running the uv command
-    "uv run -m http.server -d _site".
-    
-    This command starts a web server serving the files in the _site directory.
+    Runs the web server for the website.
+
+    This starts a web server serving the files in the _site directory.
     """
-    os.system("uv run -m http.server -d _site")
+    serve_site()
 
-def _run_uv_build():
+def _run_uv_build() -> bool:
     """
     Executes the UV build command to build the project.
 
-    This function invokes the "uv build" command using the operating system's
-    shell. It is expected to be used in scenarios where building the project
-    is necessary, such as preparing for deployment or testing.
+    This function invokes the "uv build" command. It is expected to be used
+    in scenarios where building the project is necessary, such as preparing
+    for deployment or testing.
+
+    Returns:
+        bool: True if the build succeeded, False otherwise.
     """
 
-    os.system("uv build")
+    return subprocess.run(["uv", "build"]).returncode == 0
 
 def run_local_web():
     """
-    Executes the sequence of scripts to build and run the web server.
+    Executes the build pipeline and runs the web server.
 
-    This function first generates the index CSV file by running the 
-    gen_index_csv.py script. It then builds the website using the 
-    website_build.py script, and finally, starts the web server to 
+    This function runs all stages of the build pipeline (scan, index, search, nav, gallery, assets,
+    export, post-process and verify) in one process, and finally starts the web server to
     serve the generated website.
     """
 
-    run_gen_index_csv()
-    run_website_build()
+    if not _run_pipeline():
+        _exit(False)
     run_local_server()
 
 def run_build_local_web():
@@ -70,18 +206,24 @@ def run_build_local_web():
     This function first builds the project using the UV build command,
     and then runs the web server to serve the generated website.
     """
-    _run_uv_build()
+    if not _run_uv_build():
+        _exit(False)
     run_local_web()
 
 def run_test_build():
     """
-    Runs the test_build.py script in the scripts directory if it exists.
+    Runs `test_build()` from scripts/test_build.py if it exists.
 
     The test_build.py script is expected to test the build process of the
     project. It should check that the project is built correctly and that
     the generated website can be served by the web server.
     """
-    if os.path.exists(os.path.join("scripts", "test_build.py")):
-        os.system("uv run scripts/test_build.py")
-    else:
-        print("No scripts/test_build.py found")
\ No newline at end of file
+    script_path = os.path.join("scripts", "test_build.py")
+    if not os.path.exists(script_path):
+        print("No scripts/test_build.py found")
+        _exit(False)
+
+    spec = importlib.util.spec_from_file_location("_marimo_extra_test_build", script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _exit(module.test_build() is not False)
@@ -0,0 +1,198 @@
+import os
+import re
+import sys
+import shutil
+import platform
+import tempfile
+import threading
+import subprocess
+from marimo_extra.cache import default_cache_dir, parse_size, text_hash, touch_entry, lru_evict
+from marimo_extra.log import get_logger
+
+logger = get_logger(__name__)
+
+SANDBOX_CACHE_DIR_ENV = "MARIMO_EXTRA_SANDBOX_CACHE_DIR"
+SANDBOX_CACHE_SIZE_ENV = "MARIMO_EXTRA_SANDBOX_CACHE_SIZE"
+default_sandbox_cache_size = "5G"
+
+# Environments used by this process, never evicted while it runs: exports
+# run concurrently, and another one may still be using an older environment
+_used_keys = set()
+_used_keys_lock = threading.Lock()
+
+_script_block = re.compile(
+    r"(?m)^# /// (?P<type>[a-zA-Z0-9-]+)$\s(?P<content>(^#(| .*)$\s)+)^# ///$"
+)
+
+def read_script_metadata(notebook_path: str) -> str:
+    """
+    Reads the inline script metadata block (PEP 723) of a notebook.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+
+    Returns:
+        str: The TOML content of the `# /// script` block, or an empty string
+            if the notebook has none.
+    """
+    with open(notebook_path, encoding="utf-8") as f:
+        return parse_script_metadata(f.read())
+
+def parse_script_metadata(source: str) -> str:
+    """
+    Extracts the inline script metadata block (PEP 723) from notebook source.
+
+    Args:
+        source (str): The notebook source.
+
+    Returns:
+        str: The TOML content of the `# /// script` block, or an empty string
+            if the source has none.
+    """
+    for match in _script_block.finditer(source):
+        if match.group("type") == "script":
+            return "".join(
+                line[2:] if line.startswith("# ") else line[1:]
+                for line in match.group("content").splitlines(keepends=True)
+            )
+    return ""
+
+def _script_dependencies(metadata: str) -> list[str]:
+    """
+    Extracts the dependency list from inline script metadata.
+
+    Args:
+        metadata (str): The TOML content of a `# /// script` block.
+
+    Returns:
+        list[str]: The requirement strings, empty if there are none.
+    """
+    if metadata == "":
+        return []
+    import tomllib
+    return list(tomllib.loads(metadata).get("dependencies", []))
+
+def sandbox_env_key(notebook_path: str, python_version: str=None) -> str:
+    """
+    Computes the cache key of a notebook's sandbox environment.
+
+    The key only depends on the dependency block, the Python version and the
+    marimo version installed into the environment (see `_requirements`), so
+    notebooks with identical dependencies share one environment.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+        python_version (str, optional): The Python version the environment is
+            created for. Defaults to the running interpreter's version.
+
+    Returns:
+        str: The cache key.
+    """
+    import marimo
+
+    if python_version is None:
+        python_version = platform.python_version()
+    dependencies = sorted(dep.strip() for dep in _script_dependencies(read_script_metadata(notebook_path)))
+    return text_hash(python_version, marimo.__version__, *dependencies)[:32]
+
+def _env_python(env_dir: str) -> str:
+    if os.name == "nt":
+        return os.path.join(env_dir, "Scripts", "python.exe")
+    return os.path.join(env_dir, "bin", "python")
+
+def _requirements(dependencies: list[str]) -> list[str]:
+    """
+    Adds marimo, pinned to the running version, unless the notebook requires it itself.
+    """
+    names = [re.split(r"[\s\[<>=!~;@]", dep, maxsplit=1)[0].lower() for dep in dependencies]
+    if "marimo" in names:
+        return dependencies
+    import marimo
+    return dependencies + [f"marimo=={marimo.__version__}"]
+
+def _create_env(env_dir: str, dependencies: list[str]) -> bool:
+    """
+    Creates a virtual environment with uv and installs the dependencies into it.
+
+    The environment is built in a temporary directory next to `env_dir` and
+    moved into place with a rename, so a half-built environment is never used.
+
+    Args:
+        env_dir (str): The final path of the environment.
+        dependencies (list[str]): The requirements to install.
+
+    Returns:
+        bool: True if the environment is ready, False otherwise.
+    """
+    cache_dir = os.path.dirname(env_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=cache_dir)
+    try:
+        subprocess.run(["uv", "venv", "--quiet", "--python", sys.executable, tmp_dir],
+                       capture_output=True, text=True, check=True)
+        subprocess.run(["uv", "pip", "install", "--quiet", "--python", _env_python(tmp_dir), *_requirements(dependencies)],
+                       capture_output=True, text=True, check=True)
+        try:
+            os.rename(tmp_dir, env_dir)
+        except OSError:
+            # Another build created the same environment in the meantime
+            if not os.path.isdir(env_dir):
+                raise
+        return True
+    except subprocess.CalledProcessError as e:
+        logger.error(f"[red]Error creating sandbox environment[end] {env_dir}:\n{e.stderr}")
+        return False
+    except Exception as e:
+        logger.error(f"[red]Unexpected error creating sandbox environment[end] {env_dir}: {e}")
+        return False
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def sandbox_python(notebook_path: str, cache_dir: str=None, max_size=None) -> str | None:
+    """
+    Returns the Python interpreter of a cached sandbox environment for a notebook.
+
+    The environment is looked up by `sandbox_env_key` and created with uv on a
+    cache miss. After use, the cache is trimmed to `max_size` by evicting the
+    least recently used environments, except those this process has used.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+        cache_dir (str, optional): The directory holding the environments.
+            Defaults to `$MARIMO_EXTRA_SANDBOX_CACHE_DIR` or
+            `~/.cache/marimo_extra/sandbox`.
+        max_size (int | str, optional): The size cap of the cache, e.g. "5G".
+            Defaults to `$MARIMO_EXTRA_SANDBOX_CACHE_SIZE` or "5G".
+
+    Returns:
+        str | None: The path to the environment's Python interpreter, or None
+            if uv is not available or the environment could not be created.
+    """
+    if shutil.which("uv") is None:
+        logger.warning("[yellow]Warning:[end] [italic]uv[end] not found, sandbox environments will not be cached")
+        return None
+
+    if cache_dir is None:
+        cache_dir = default_cache_dir("sandbox", SANDBOX_CACHE_DIR_ENV)
+    if max_size is None:
+        max_size = os.environ.get(SANDBOX_CACHE_SIZE_ENV, default_sandbox_cache_size)
+
+    key = sandbox_env_key(notebook_path)
+    env_dir = os.path.join(cache_dir, key)
+    with _used_keys_lock:
+        _used_keys.add(key)
+
+    if os.path.exists(_env_python(env_dir)):
+        logger.info(f"[green]Reusing[end] sandbox environment [blue]{key}[end] for {notebook_path}")
+    else:
+        logger.info(f"[yellow]Creating[end] sandbox environment [blue]{key}[end] for {notebook_path}")
+        dependencies = _script_dependencies(read_script_metadata(notebook_path))
+        if not _create_env(env_dir, dependencies):
+            return None
+
+    touch_entry(env_dir)
+    with _used_keys_lock:
+        keep = list(_used_keys)
+    for evicted in lru_evict(cache_dir, parse_size(max_size), keep=keep):
+        logger.info(f"Evicted sandbox environment [blue]{os.path.basename(evicted)}[end]")
+    return _env_python(env_dir)
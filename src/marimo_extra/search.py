@@ -0,0 +1,122 @@
+import os
+import re
+import json
+import math
+from bisect import bisect_left
+from marimo_extra.transport import read_text
+
+# Runtime part: queries the search index written by the build (see
+# `marimo_extra.search_index`), also in the browser (Pyodide).
+
+_camel = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_word = re.compile(r"[^\W_]+")
+
+# Matches of a query word that are only a prefix of the indexed term count less
+prefix_weight = 0.5
+
+def tokenize(text: str) -> list[str]:
+    """
+    Splits a text into lowercase search terms.
+
+    Identifiers are split at underscores and camel case, e.g. "read_csv" and
+    "readCsv" both give ["read", "csv"]. Single letters are dropped.
+    """
+    return [word for word in _word.findall(_camel.sub(" ", text).casefold()) if len(word) > 1 or word.isdigit()]
+
+class SearchIndex:
+    """
+    An inverted index over the notebooks of a site.
+
+    `terms` is sorted, so all terms starting with a query word are found by
+    bisection. `postings[i]` lists the documents containing `terms[i]` as
+    flat (document number, weight) pairs.
+    """
+    __slots__ = ("docs", "terms", "postings")
+
+    def __init__(self, docs: list[str], terms: list[str], postings: list[list[int]]):
+        self.docs = docs
+        self.terms = terms
+        self.postings = postings
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SearchIndex":
+        return cls(data["docs"], data["terms"], data["postings"])
+
+    def _term_scores(self, word: str) -> dict[int, float]:
+        """
+        Scores the documents containing a term that starts with `word`.
+        """
+        scores = {}
+        start = bisect_left(self.terms, word)
+        end = bisect_left(self.terms, word + "\U0010ffff", start)
+        for i in range(start, end):
+            postings = self.postings[i]
+            idf = math.log(1 + len(self.docs) / (len(postings) // 2))
+            weight = idf if self.terms[i] == word else idf * prefix_weight
+            for j in range(0, len(postings), 2):
+                doc, count = postings[j], postings[j + 1]
+                score = weight * (1 + math.log(count))
+                if score > scores.get(doc, 0.0):
+                    scores[doc] = score
+        return scores
+
+    def search(self, query: str, limit: int=None) -> list[str]:
+        """
+        Finds the documents containing every word of a query, best first.
+
+        Each word also matches the terms it is a prefix of, so results appear
+        while the last word is still being typed.
+
+        Args:
+            query (str): The search text.
+            limit (int, optional): The maximum number of results. Defaults to all.
+
+        Returns:
+            list[str]: The matching documents (HTML paths), ranked by relevance.
+        """
+        scores = None
+        for word in dict.fromkeys(tokenize(query)):
+            word_scores = self._term_scores(word)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {doc: score + word_scores[doc] for doc, score in scores.items() if doc in word_scores}
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        ranked = sorted(scores, key=lambda doc: (-scores[doc], doc))
+        return [self.docs[doc] for doc in ranked[:limit]]
+
+_search_index_cache = {}
+
+def load_search_index(path: str) -> SearchIndex | None:
+    """
+    Loads a search index file, reading it only once per session.
+
+    Local files are read again when their modification time changes; remote
+    files are read once, and a missing remote file is not requested again.
+
+    Args:
+        path (str): The path or URL of the search index file.
+
+    Returns:
+        SearchIndex | None: The index, or None if the file is not available.
+    """
+    version = None
+    if not path.startswith(("http://", "https://")):
+        if not os.path.exists(path):
+            return None
+        version = os.stat(path).st_mtime_ns
+
+    cached = _search_index_cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    try:
+        index = SearchIndex.from_dict(json.loads(read_text(path)))
+    except Exception:
+        # Missing, unreadable or from an incompatible version
+        index = None
+    _search_index_cache[path] = (version, index)
+    return index
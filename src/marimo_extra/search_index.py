@@ -0,0 +1,134 @@
+import os
+import ast
+import json
+import inspect
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from marimo_extra.index_model import NotebookIndex
+from marimo_extra.nb_metadata import _is_md_call, _static_text, _heading, parallel_threshold
+from marimo_extra.search import tokenize
+from marimo_extra.log import get_logger
+
+logger = get_logger(__name__)
+
+# The search index is published next to the index CSV file
+search_index_name = "search_index.json"
+
+# How much one occurrence of a term counts, by where it occurs
+term_weights = {
+    "name": 8,      # Name and Tags columns of the index
+    "heading": 4,   # markdown headings
+    "text": 1,      # markdown text
+    "code": 1,      # identifiers, imported modules
+}
+
+# Identifiers every marimo notebook has
+_boilerplate = set(tokenize("marimo mo app cell generated name main"))
+
+def _code_identifiers(node) -> list[str]:
+    if isinstance(node, ast.Name):
+        return [node.id]
+    if isinstance(node, ast.Attribute):
+        return [node.attr]
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and node.name != "_":
+        return [node.name]
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        names = [alias.name for alias in node.names]
+        return names + [node.module] if isinstance(node, ast.ImportFrom) and node.module else names
+    return []
+
+def notebook_terms(notebook_path: str) -> dict[str, int]:
+    """
+    Extracts the weighted search terms of a notebook's source, without running it.
+
+    Markdown text and headings of `mo.md(...)` calls and the identifiers of
+    the code are tokenized (see `marimo_extra.search.tokenize`) and counted
+    with the weights in `term_weights`.
+
+    Args:
+        notebook_path (str): The path to the notebook file.
+
+    Returns:
+        dict[str, int]: The weighted count of every term.
+    """
+    with open(notebook_path, encoding="utf-8") as f:
+        source = f.read()
+    try:
+        tree = ast.parse(source, filename=notebook_path)
+    except SyntaxError:
+        return {}
+
+    terms = Counter()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and _is_md_call(node) and node.args:
+            text = _static_text(node.args[0])
+            if text is None:
+                continue
+            text = inspect.cleandoc(text)
+            for match in _heading.finditer(text):
+                for term in tokenize(match.group("text")):
+                    terms[term] += term_weights["heading"]
+            for term in tokenize(text):
+                terms[term] += term_weights["text"]
+        else:
+            for identifier in _code_identifiers(node):
+                for term in tokenize(identifier):
+                    if term not in _boilerplate:
+                        terms[term] += term_weights["code"]
+    return dict(terms)
+
+def build_search_index(index_csv_path: str="public/index.csv", output: str=None, workers: int=None) -> bool:
+    """
+    Writes the full-text search index of the notebooks listed in an index CSV file.
+
+    The notebooks are parsed in worker processes when there are enough of
+    them. The index maps every term, in sorted order, to the notebooks (by
+    HTML path) containing it and a weight, so `ui.Gallery` can search names,
+    tags, headings, text and code of all notebooks with one download and
+    prefix lookups by bisection (see `marimo_extra.search.SearchIndex`).
+
+    Args:
+        index_csv_path (str): The path to the "index.csv" file. Defaults to "public/index.csv".
+        output (str, optional): The path to the search index. Defaults to
+            "search_index.json" next to the index CSV file.
+        workers (int, optional): The number of worker processes. Defaults to
+            the number of CPUs.
+
+    Returns:
+        bool: True if the search index was written, False otherwise.
+    """
+    if not os.path.exists(index_csv_path):
+        logger.warning(f"No index.csv file found at {index_csv_path}. Search index will be skipped.")
+        return False
+    if output is None:
+        output = os.path.join(os.path.dirname(index_csv_path), search_index_name)
+
+    records = [record for record in NotebookIndex.from_csv(index_csv_path) if os.path.exists(record.NB_Path)]
+    paths = [record.NB_Path for record in records]
+    if len(paths) >= parallel_threshold and (workers is None or workers > 1):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(notebook_terms, paths, chunksize=4))
+    else:
+        parsed = [notebook_terms(path) for path in paths]
+
+    postings = {}
+    for doc, (record, terms) in enumerate(zip(records, parsed)):
+        terms = Counter(terms)
+        for term in tokenize(f"{record.Name} {record.Tags}"):
+            terms[term] += term_weights["name"]
+        for term, count in terms.items():
+            postings.setdefault(term, []).extend([doc, count])
+
+    terms = sorted(postings)
+    index = {
+        "docs": [record.HTML_Path for record in records],
+        "terms": terms,
+        "postings": [postings[term] for term in terms],
+    }
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    tmp_path = output + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp_path, output)
+    logger.info(f"[green]Indexed[end] {len(terms)} terms of {len(records)} notebooks to [blue]{output}[end]")
+    return True
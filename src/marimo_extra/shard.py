@@ -0,0 +1,70 @@
+import os
+import heapq
+from marimo_extra.resources import load_history
+
+SHARD_ENV = "MARIMO_EXTRA_SHARD"
+
+# Assumed export time of a notebook when no notebook of the index was ever exported here
+default_export_seconds = 1.0
+
+def parse_shard(shard: str) -> tuple[int, int]:
+    """
+    Parses a shard given as "i/n", e.g. "2/4" for the second of four shards.
+
+    Returns:
+        tuple[int, int]: The shard number (starting at 1) and the number of shards.
+    """
+    number, _, count = str(shard).partition("/")
+    try:
+        number, count = int(number), int(count)
+    except ValueError:
+        raise ValueError(f"Shard must be given as 'i/n', got '{shard}'") from None
+    if not 1 <= number <= count:
+        raise ValueError(f"Shard {number}/{count} is out of range, it must be between 1/{count} and {count}/{count}")
+    return number, count
+
+def current_shard(shard: str=None) -> tuple[int, int] | None:
+    """
+    Returns the shard this build exports, from `shard` or the
+    `MARIMO_EXTRA_SHARD` environment variable, None for a full build.
+    """
+    if shard is None:
+        shard = os.environ.get(SHARD_ENV) or None
+    return None if shard is None else parse_shard(shard)
+
+def shard_rows(rows: list[tuple[str, str, str]], shard: tuple[int, int], history: dict=None) -> list[tuple[str, str, str]]:
+    """
+    Selects the index rows one shard of a build exports.
+
+    Rows are assigned longest first to the shard with the least total export
+    time so far, using the durations recorded by past builds (see
+    `run_exports`); rows never exported count as the median duration. Ties
+    are broken by notebook and HTML path, so every runner computes the same
+    split from the same index and export history.
+
+    Args:
+        rows (list[tuple[str, str, str]]): The (notebook path, HTML path,
+            notebook type) rows of the index (see `read_index_rows`).
+        shard (tuple[int, int]): The shard number (starting at 1) and the
+            number of shards (see `parse_shard`).
+        history (dict, optional): The export history. Defaults to `load_history()`.
+
+    Returns:
+        list[tuple[str, str, str]]: The rows of the shard, in index order.
+    """
+    number, count = shard
+    history = load_history() if history is None else history
+    seconds = [history.get(nb_path, {}).get("seconds") for nb_path, _, _ in rows]
+    known = sorted(value for value in seconds if value is not None)
+    default = known[len(known) // 2] if known else default_export_seconds
+    costs = [default if value is None else value for value in seconds]
+
+    order = sorted(range(len(rows)), key=lambda i: (-costs[i], rows[i][0], rows[i][1]))
+    loads = [(0.0, k) for k in range(count)]
+    assigned = []
+    for i in order:
+        load, k = heapq.heappop(loads)
+        if k == number - 1:
+            assigned.append(i)
+        heapq.heappush(loads, (load + costs[i], k))
+    return [rows[i] for i in sorted(assigned)]
@@ -0,0 +1,191 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Runtime part: every remote read of the runtime modules goes through here,
+# also in the browser (Pyodide). `requests` is optional: it is not a runtime
+# dependency, and is never used in the browser.
+
+# Seconds to wait for a connection and for the response
+request_timeout = (5, 30)
+
+# Concurrent requests of `prefetch`, also the size of the connection pool
+prefetch_workers = 8
+
+_in_browser = sys.platform == "emscripten"
+
+_session = None
+_session_lock = threading.Lock()
+
+# Responses fetched ahead by `prefetch`, by URL; a read takes its response out
+_prefetched = {}
+_prefetched_lock = threading.Lock()
+
+def is_remote(path: str) -> bool:
+    return str(path).startswith(("http://", "https://"))
+
+def _get_session():
+    """
+    Returns the shared `requests` session, None if requests is not installed.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            try:
+                import requests
+                from requests.adapters import HTTPAdapter
+            except ImportError:
+                _session = False
+            else:
+                _session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=prefetch_workers, pool_maxsize=prefetch_workers)
+                _session.mount("http://", adapter)
+                _session.mount("https://", adapter)
+    return _session or None
+
+def _browser_fetch(url: str) -> bytes:
+    """
+    Downloads a URL synchronously in the browser, like `pyodide.http.open_url`
+    but keeping binary files intact.
+    """
+    from js import XMLHttpRequest
+
+    request = XMLHttpRequest.new()
+    request.open("GET", url, False)
+    # Synchronous binary requests are allowed in web workers, where marimo runs Pyodide
+    request.responseType = "arraybuffer"
+    request.send(None)
+    if not 200 <= request.status < 300:
+        raise OSError(f"Cannot fetch {url}: HTTP {request.status}")
+    return bytes(request.response.to_py())
+
+def _fetch(url: str) -> bytes:
+    """
+    Downloads a URL, raising OSError if it is not available.
+    """
+    if _in_browser:
+        return _browser_fetch(url)
+
+    session = _get_session()
+    if session is not None:
+        import requests
+        try:
+            response = session.get(url, timeout=request_timeout)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise OSError(f"Cannot fetch {url}: {e}") from e
+        return response.content
+
+    from urllib.request import urlopen
+    with urlopen(url, timeout=request_timeout[1]) as response:
+        return response.read()
+
+def _take_prefetched(url: str) -> bytes | None:
+    with _prefetched_lock:
+        result = _prefetched.pop(url, None)
+    if result is None:
+        return None
+    if hasattr(result, "done"):
+        if result.exception() is not None:
+            return None
+        return result.result()
+    return result
+
+def read_bytes(path: str) -> bytes:
+    """
+    Reads a file from a local path or a URL.
+
+    Args:
+        path (str): The path or URL.
+
+    Returns:
+        bytes: The contents.
+    """
+    path = str(path)
+    if not is_remote(path):
+        with open(path, "rb") as f:
+            return f.read()
+    data = _take_prefetched(path)
+    return _fetch(path) if data is None else data
+
+def read_text(path: str) -> str:
+    """
+    Reads a text file from a local path or a URL, keeping its line endings.
+    """
+    path = str(path)
+    if not is_remote(path):
+        with open(path, encoding="utf-8", newline="") as f:
+            return f.read()
+    return read_bytes(path).decode("utf-8")
+
+def exists(path: str) -> bool:
+    """
+    Checks whether a local path or a URL is available.
+
+    A URL is requested with HEAD natively. In the browser it is downloaded,
+    and the download is kept for the next read of it.
+    """
+    path = str(path)
+    if not is_remote(path):
+        return os.path.exists(path)
+    with _prefetched_lock:
+        pending = _prefetched.get(path)
+    if pending is not None:
+        if not hasattr(pending, "done"):
+            return True
+        if pending.exception() is None:
+            return True
+    if _in_browser:
+        try:
+            data = _fetch(path)
+        except Exception:
+            return False
+        with _prefetched_lock:
+            _prefetched[path] = data
+        return True
+
+    session = _get_session()
+    if session is not None:
+        import requests
+        try:
+            response = session.head(path, timeout=request_timeout, allow_redirects=True)
+        except requests.exceptions.RequestException:
+            return False
+        return response.status_code == 200
+
+    from urllib.request import Request, urlopen
+    try:
+        with urlopen(Request(path, method="HEAD"), timeout=request_timeout[1]) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+_prefetch_pool = None
+
+def prefetch(paths: list[str]):
+    """
+    Starts downloading several URLs concurrently, without waiting for them.
+
+    The next `read_bytes`, `read_text` or `exists` of a URL uses its
+    download; the downloads share the pooled session. Local paths and URLs
+    already fetched ahead are skipped. Does nothing in the browser: the
+    synchronous reads there cannot wait for a download on the event loop,
+    the preload hints of the page (see `inject_preload_hints`) fetch the
+    files ahead instead.
+
+    Args:
+        paths (list[str]): The paths or URLs.
+    """
+    global _prefetch_pool
+    if _in_browser:
+        return
+    urls = [str(path) for path in dict.fromkeys(paths) if is_remote(path)]
+    with _prefetched_lock:
+        urls = [url for url in urls if url not in _prefetched]
+        if not urls:
+            return
+        if _prefetch_pool is None:
+            _prefetch_pool = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="marimo_extra_prefetch")
+        for url in urls:
+            _prefetched[url] = _prefetch_pool.submit(_fetch, url)
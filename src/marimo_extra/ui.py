@@ -1,5 +1,7 @@
+import os
 import marimo as mo
 from marimo_extra.utils import index_csv_to_dict
+from marimo_extra.gallery import load_gallery_html
 
 color = {
     "light_gray": "#CCCCCC",
@@ -62,7 +64,7 @@ def card(
     return _card
 
 
-def Gallery(data: list[dict] , max_column=2 , v_gap=2, h_gap=2, orientation = "vertical"):
+def Gallery(data: list[dict] , max_column=2 , v_gap=2, h_gap=2, orientation = "vertical", prerendered=True):
     """
     A function to generate a gallery view of cards based on the given data.
 
@@ -74,7 +76,8 @@ def Gallery(data: list[dict] , max_column=2 , v_gap=2, h_gap=2, orientation = "v
     - link: The link of the card.
 
     It will display a search box and an orientation box above the gallery view.
-    The search box allows users to search for cards by name, and the orientation
+    The search box allows users to search for cards by name, tags and notebook
+    content (with the search index of the build), and the orientation
     box allows users to change the orientation of the cards.
 
     The gallery view will be updated based on the search query and the orientation.
@@ -84,6 +87,10 @@ def Gallery(data: list[dict] , max_column=2 , v_gap=2, h_gap=2, orientation = "v
     If the search query is not empty, but there is no matching card, it will
     display a "No results" message.
 
+    Until the search query or the orientation changes, the vertical view is
+    the gallery prerendered by the build (`public/gallery.html`) when it is
+    available, so the cards need not be built in Python first.
+
     Parameters
     ----------
     data : list[dict]
@@ -100,6 +107,9 @@ def Gallery(data: list[dict] , max_column=2 , v_gap=2, h_gap=2, orientation = "v
     orientation : str
         The orientation of the cards in the gallery view. Can be "vertical",
         "horizontal", or "mixed". Defaults to "vertical".
+    prerendered : bool
+        Whether the initial vertical view uses the gallery prerendered by
+        the build. Defaults to True.
 
     Returns
     -------
@@ -171,7 +181,11 @@ def Gallery(data: list[dict] , max_column=2 , v_gap=2, h_gap=2, orientation = "v
             mo.output.append( mo.vstack(_view, gap=v_gap) )
 
     mo.output.append(controller)
-    _card_view(_get_cards(), orientation)
+    gallery = load_gallery_html(mo.notebook_location()) if prerendered and orientation == "vertical" else None
+    if gallery is not None:
+        mo.output.append(mo.Html(gallery))
+    else:
+        _card_view(_get_cards(), orientation)
 
 
 
@@ -203,3 +217,42 @@ def _get_cards(card_dict: list[dict]= index_csv_to_dict()):
 
 def frame(content, box_min_width=10, box_min_height=10, padding=5, border_width=2, border_radius=10 , border_type="solid", border_color="#CCCCCC", bg_color="", margin_size=10):
     return mo.Html( f"<div style='min-width: {box_min_width}px; min-height: {box_min_height}px; background-color: {bg_color}; border: {border_width}px {border_type} {border_color}; border-radius: {border_radius}px; padding: {padding}px;'> {content} </div>" )
+
+
+def nav_tree_menu(tree: dict, home_dir: str=None):
+    """
+    Render a navigation tree as nested accordions, e.g. for `mo.sidebar`.
+
+    Only the top-level groups are rendered with the page; the notebooks and
+    subgroups of a group are rendered when it is opened, so the sidebar does
+    not grow with the size of the site.
+
+    Parameters:
+        tree (dict): The root group (see `marimo_extra.nav.nav_tree`).
+        home_dir (str): The base directory or URL the links are joined to.
+            Defaults to the location of the current notebook.
+
+    Returns:
+        mo.Html: The navigation menu.
+    """
+    if tree is None:
+        return mo.md("No index.csv found")
+    if home_dir is None:
+        home_dir = str(mo.notebook_location())
+
+    def _group_view(group):
+        items = []
+        if group["entries"]:
+            links = {os.path.join(home_dir, link): name for name, link in group["entries"]}
+            items.append(mo.nav_menu(links, orientation="vertical"))
+        if group["groups"]:
+            items.append(_groups_view(group["groups"]))
+        return mo.vstack(items)
+
+    def _groups_view(groups):
+        return mo.accordion({
+            f"{group['name']} ({group['count']})": mo.lazy(lambda group=group: _group_view(group))
+            for group in groups
+        })
+
+    return _group_view(tree)
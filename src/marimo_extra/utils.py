@@ -1,29 +1,19 @@
 import os
-import pandas as pd
+import logging
 import marimo as mo
-import requests
-
-color = {
-    "[red]": "\033[31m",
-    "[green]": "\033[32m",
-    "[yellow]": "\033[33m",
-    "[blue]": "\033[34m",
-    "[magenta]": "\033[35m",
-    "[cyan]": "\033[36m",
-    "[white]": "\033[37m",
-    "[end]": "\033[0m",
-    "[bold]": "\033[1m",
-    "[underline]": "\033[4m",
-    "[italic]": "\033[3m",
-
-}
-
-def rich_print(message):
+from marimo_extra.log import get_logger
+from marimo_extra.index_model import NotebookIndex, load_index
+from marimo_extra.search import load_search_index
+from marimo_extra.nav import load_nav_tree
+import marimo_extra.transport as transport
+
+def rich_print(message, level: int=logging.INFO):
     """
     Prints a message with color and style formatting.
 
-    This function replaces color and style tags in the provided message
-    with terminal escape codes to print formatted text to the console.
+    The message is logged through the `marimo_extra` logger (see
+    `marimo_extra.log`), which replaces color and style tags with terminal
+    escape codes, or drops them when the output is not a terminal.
 
     Available color and style tags:
     - [red]: Red text
@@ -40,11 +30,9 @@ def rich_print(message):
 
     Args:
         message (str): The message containing color and style tags.
+        level (int, optional): The logging level of the message. Defaults to `logging.INFO`.
     """
-
-    for old, new in color.items():
-        message = message.replace(old, new)
-    print(message)
+    get_logger().log(level, message)
 
 
 def add_row_csv(out, new_row):
@@ -61,11 +49,8 @@ def add_row_csv(out, new_row):
     out.loc[len(out)] = new_row
     return out
 
-def _filter_out_data(notebooks: pd.DataFrame, filter_out_data: dict[list[str]]) -> pd.DataFrame:
-    filter_index = notebooks.index
-    for key, value in filter_out_data.items():
-        filter_index = filter_index[~notebooks[key].isin(value)]
-    return notebooks.loc[filter_index]
+def _filter_out_data(notebooks: NotebookIndex, filter_out_data: dict[list[str]]) -> NotebookIndex:
+    return notebooks.filter_out(filter_out_data)
 def index_csv_to_dict(
     home_dir: str = str(mo.notebook_location()),
     index_csv_path: str=os.path.join('public', 'index.csv'),
@@ -79,6 +64,7 @@ def index_csv_to_dict(
         "Name": ['Home']
         },
     search: str = "",
+    search_index_path: str=os.path.join('public', 'search_index.json'),
     ) -> list[dict]:
 
     """
@@ -86,8 +72,9 @@ def index_csv_to_dict(
 
     This function reads the specified index CSV file, filters out specified
     data, and converts the remaining data to a list of dictionaries with
-    specified key mappings. It also supports searching for specific entries
-    in the 'Name' column.
+    specified key mappings. It also supports searching the notebooks' names,
+    tags, text and code with the search index written by the build, or the
+    'Name' column when there is no search index.
 
     Args:
         home_dir (str): The base directory of the Marimo notebook.
@@ -99,8 +86,11 @@ def index_csv_to_dict(
             to 'link', 'Thumbnail' to 'thumbnail', and 'Tags' to 'content'.
         filter_out_data (dict): A dictionary specifying the data to filter out
             from the CSV. Defaults to filtering out rows with 'Name' equal to 'Home'.
-        search (str): A string to search for in the 'Name' column. If specified,
-            only rows containing this string in the 'Name' column will be included.
+        search (str): A string to search for. If specified, only matching rows
+            are included, best matches first.
+        search_index_path (str): The path to the search index relative to the
+            home directory, None to only search the 'Name' column. Defaults
+            to 'public/search_index.json'.
 
     Returns:
         list[dict]: A list of dictionaries containing the filtered and mapped data
@@ -114,12 +104,17 @@ def index_csv_to_dict(
     if not is_available(_index_csv_fullpath):
         return [dict(zip(index_to_dict_names.values() , ["No index.csv found","","",""]))]
 
-    notebooks = pd.read_csv(_index_csv_fullpath)
+    notebooks = load_index(_index_csv_fullpath)
     notebooks = _filter_out_data(notebooks, filter_out_data)
     if search != "":
-        notebooks = notebooks[notebooks["Name"].str.contains(search, case=False)]
-    notebooks = notebooks[index_to_dict_names.keys()].rename( columns = index_to_dict_names )
-    return notebooks.fillna("").to_dict('records')
+        search_index = None
+        if search_index_path is not None:
+            search_index = load_search_index(os.path.join(home_dir, search_index_path))
+        if search_index is not None:
+            notebooks = notebooks.select(search_index.search(search), column="HTML_Path")
+        else:
+            notebooks = notebooks.search(search, column="Name")
+    return notebooks.to_dicts(index_to_dict_names)
 
 def index_csv_to_nav_dict(
     home_dir: str = str(mo.notebook_location()),
@@ -166,30 +161,101 @@ def index_csv_to_nav_dict(
     if not is_available(path = _index_csv_fullpath):
         return {"#": "No index.csv found"}
 
-    _nb = pd.read_csv(_index_csv_fullpath)
-    _nb = _filter_out_data(_nb, filter_out_data)[index_names.values()]
-    _nb[index_names['link']] = _nb[index_names['link']].apply(lambda x: os.path.join(home_dir, x))#.replace(" ",""))
+    _nb = load_index(_index_csv_fullpath)
+    _nb = _filter_out_data(_nb, filter_out_data)
+    return _nb.to_nav_dict(home_dir, index_names)
+
+def index_csv_to_nav_tree(
+    home_dir: str = str(mo.notebook_location()),
+    nav_tree_path: str=os.path.join('public', 'nav_tree.json'),
+    index_csv_path: str=os.path.join('public', 'index.csv'),
+    group_by: str="directory",
+    filter_out_data= {
+        "Name": ['Home']
+        } ) -> dict | None:
+    """
+    Loads the navigation tree of the site, grouped by directory or tag.
+
+    The tree is precomputed by the build next to the index CSV file and read
+    once per session. Without it, the tree is built from the index CSV file.
+    Render it with `ui.nav_tree_menu`, which only renders the groups that
+    are opened.
+
+    Args:
+        home_dir (str): The base directory of the Marimo notebook.
+            Defaults to the directory of the current Marimo notebook.
+        nav_tree_path (str): The path to the navigation tree relative to the
+            home directory. Defaults to 'public/nav_tree.json'.
+        index_csv_path (str): The path to the index CSV file relative to
+            the home directory. Defaults to 'public/index.csv'.
+        group_by (str): "directory" or "tag". Defaults to "directory".
+        filter_out_data (dict): The rows left out when the tree is built from
+            the index CSV file. Defaults to filtering out rows with 'Name'
+            equal to 'Home'.
 
-    return dict( zip( _nb[index_names['link']], _nb[index_names['name']] ) )
+    Returns:
+        dict | None: The root group (see `marimo_extra.nav.nav_tree`), or None
+        if neither file is available.
+    """
+    return load_nav_tree(home_dir, nav_tree_path, index_csv_path, group_by, filter_out_data)
 
 
 def running_in_server():
     return str(mo.notebook_location())[:4] == "http"
 
 def is_available(path: str):
-    if running_in_server():
+    """
+    Checks whether a local file or a URL is available, e.g. the index CSV file.
+
+    URLs are checked through `marimo_extra.transport`: with a pooled,
+    timeout-bounded session natively, and with the fetch API in the browser.
+    """
+    if transport.exists(path):
+        return True
+    if transport.is_remote(path):
+        print(f"No index.csv found at {path}")
+    return False
+
+def prefetch_site_files(
+    home_dir: str = str(mo.notebook_location()),
+    paths: list[str] = [
+        os.path.join('public', 'index.csv'),
+        os.path.join('public', 'nav_tree.json'),
+        os.path.join('public', 'search_index.json'),
+        os.path.join('public', 'gallery.html'),
+    ],
+    thumbnails: bool = False,
+    ):
+    """
+    Starts downloading the site files the helpers read, concurrently.
+
+    When the site is served over HTTP, the index, the precomputed navigation
+    tree, search index and gallery are fetched ahead, so the helpers reading
+    them later (e.g. `index_csv_to_dict`, `index_csv_to_nav_tree`) do not
+    wait for one download after another. Does nothing for local files, and
+    in the browser, where the preload hints of the page fetch them ahead.
+
+    Args:
+        home_dir (str): The base directory or URL of the site.
+            Defaults to the directory of the current Marimo notebook.
+        paths (list[str]): The files to fetch, relative to the home directory.
+        thumbnails (bool): Whether the thumbnails of the index are fetched as
+            well, which waits for the index. Defaults to False.
+    """
+    home_dir = str(home_dir)
+    urls = [os.path.join(home_dir, path) for path in paths]
+    if transport._in_browser:
+        return
+    transport.prefetch(urls)
+    if thumbnails and transport.is_remote(home_dir):
         try:
-            response = requests.head(path)
-            if response.status_code != 200:
-                print(f"No index.csv found at {path}")
-                return False
-            else:
-                return True
-        except requests.exceptions.RequestException as err:
-            print("Error:", err)
-            return False
-    else:
-        return os.path.exists(path)
+            notebooks = load_index(os.path.join(home_dir, 'public', 'index.csv'))
+        except Exception:
+            return
+        transport.prefetch([
+            os.path.join(home_dir, record.Thumbnail.strip())
+            for record in notebooks if record.Thumbnail.strip() != "" and not record.Thumbnail.startswith("data:")
+        ])
 
 
 
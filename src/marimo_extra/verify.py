@@ -0,0 +1,199 @@
+import os
+import re
+import json
+import time
+import fnmatch
+import posixpath
+from html.parser import HTMLParser
+from urllib.parse import urlsplit, unquote
+from concurrent.futures import ProcessPoolExecutor
+from marimo_extra.index_model import NotebookIndex
+from marimo_extra.dependencies import notebook_data_dependencies
+from marimo_extra.marimo_publish import load_manifest, meta_dir, wasm_types
+from marimo_extra.preload import _site_path
+from marimo_extra.log import get_logger
+
+logger = get_logger(__name__)
+
+# Report of the last verification, next to the build report
+verify_report_path = os.path.join(".marimo_extra", "verify_report.json")
+
+# Below this many pages, starting worker processes costs more than it saves
+parallel_pages = 32
+
+# Pages are parsed in chunks of this many characters, so large pages are never held twice
+read_chunk_size = 1 << 20
+
+# Broken links reported per page and kind in the log; the report lists all of them
+log_limit = 20
+
+_url_attributes = {"href", "src", "poster", "data", "action"}
+_scheme = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.\-]*:")
+
+class _LinkParser(HTMLParser):
+    """
+    Collects the URLs in the attributes of an HTML page while it is fed.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.urls = []
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if value is None:
+                continue
+            if name in _url_attributes:
+                self.urls.append(value.strip())
+            elif name == "srcset":
+                self.urls += [candidate.split()[0] for candidate in value.split(",") if candidate.strip()]
+
+    handle_startendtag = handle_starttag
+
+def page_urls(path: str) -> list[str]:
+    """
+    Lists the URLs a page links to or loads, reading it in chunks.
+
+    Args:
+        path (str): The path to the HTML file.
+
+    Returns:
+        list[str]: The distinct URLs, in order of appearance.
+    """
+    parser = _LinkParser()
+    with open(path, encoding="utf-8", errors="replace") as f:
+        while chunk := f.read(read_chunk_size):
+            parser.feed(chunk)
+    parser.close()
+    return list(dict.fromkeys(parser.urls))
+
+def _target(url: str, page: str) -> str | None:
+    """
+    Resolves an internal URL of a page to a path relative to the site
+    directory, None for external URLs and fragments.
+    """
+    if url == "" or url.startswith(("#", "//")) or _scheme.match(url):
+        return None
+    path = unquote(urlsplit(url).path)
+    if path == "":
+        return None
+    if path.startswith("/"):
+        return posixpath.normpath(path.lstrip("/") or ".")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(page), path))
+
+def _site_files(output_dir: str) -> tuple[set[str], set[str]]:
+    """
+    Lists the files and directories of a site as paths relative to it, with "/".
+    """
+    files, dirs = set(), {"."}
+    for root, names, file_names in os.walk(output_dir):
+        relative = os.path.relpath(root, output_dir).replace(os.sep, "/")
+        prefix = "" if relative == "." else relative + "/"
+        dirs.update(prefix + name for name in names)
+        files.update(prefix + name for name in file_names)
+    return files, dirs
+
+def verify_site(output_dir: str="_site", index_csv_path: str="public/index.csv", ignore: list[str]=None, workers: int=None) -> dict:
+    """
+    Checks a built site for broken links and missing files, offline.
+
+    Checked are the `HTML_Path` and `Thumbnail` of every row of the index,
+    every internal `href`, `src` and `srcset` of every HTML page, and the
+    files in `public/` folders that the HTML-WASM notebooks read (see
+    `notebook_data_dependencies`). Pages are parsed in worker processes
+    when there are enough of them.
+
+    Args:
+        output_dir (str): The site directory. Defaults to "_site".
+        index_csv_path (str): The path to the "index.csv" file. Defaults to "public/index.csv".
+        ignore (list[str], optional): Patterns (`fnmatch`) of site paths that
+            are not reported when missing.
+        workers (int, optional): The number of worker processes. Defaults to
+            the number of CPUs.
+
+    Returns:
+        dict: The report. Its "broken" list has an entry per missing file with
+            the "page" (or index row) referring to it, the "kind" of reference
+            ("html_path", "thumbnail", "link" or "public"), the "url" as written
+            and the "target" in the site.
+    """
+    start = time.perf_counter()
+    ignore = ignore or []
+    files, dirs = _site_files(output_dir)
+
+    def exists(target):
+        if target.startswith("../") or target == "..":
+            return False
+        return target in files or (target in dirs and posixpath.join(target, "index.html") in files) \
+            or any(fnmatch.fnmatch(target, pattern) for pattern in ignore)
+
+    broken = []
+    if os.path.exists(index_csv_path):
+        for record in NotebookIndex.from_csv(index_csv_path):
+            page = f"{index_csv_path} ({record.Name})"
+            for kind, url in [("html_path", record.HTML_Path), ("thumbnail", record.Thumbnail.strip())]:
+                target = _target(url, "index.html")
+                if target is not None and not exists(target):
+                    broken.append({"page": page, "kind": kind, "url": url, "target": target})
+
+    pages = sorted(path for path in files if path.endswith((".html", ".htm")) and not path.startswith(meta_dir + "/"))
+    paths = [os.path.join(output_dir, page) for page in pages]
+    if len(paths) >= parallel_pages and (workers is None or workers > 1):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(page_urls, paths, chunksize=16))
+    else:
+        parsed = [page_urls(path) for path in paths]
+
+    links = 0
+    for page, urls in zip(pages, parsed):
+        for url in urls:
+            target = _target(url, page)
+            if target is None:
+                continue
+            links += 1
+            if not exists(target):
+                broken.append({"page": page, "kind": "link", "url": url, "target": target})
+
+    for html_path, entry in load_manifest(output_dir).items():
+        if entry["type"] not in wasm_types or not os.path.isfile(entry["notebook"]):
+            continue
+        for dependency in notebook_data_dependencies(entry["notebook"], include_dynamic=False):
+            site_path = _site_path(dependency, entry["notebook"], html_path)
+            if site_path is not None and not exists(site_path.replace(os.sep, "/")):
+                broken.append({"page": html_path, "kind": "public", "url": dependency, "target": site_path.replace(os.sep, "/")})
+
+    return {
+        "output_dir": output_dir,
+        "pages": len(pages),
+        "links": links,
+        "broken": broken,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+def verify_build(output_dir: str="_site", index_csv_path: str="public/index.csv", ignore: list[str]=None) -> bool:
+    """
+    Verifies a built site (see `verify_site`), logs the broken references and
+    writes the report to `.marimo_extra/verify_report.json`.
+
+    Returns:
+        bool: True if nothing is broken, False otherwise.
+    """
+    report = verify_site(output_dir, index_csv_path, ignore)
+    os.makedirs(os.path.dirname(verify_report_path), exist_ok=True)
+    with open(verify_report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+
+    counts = {}
+    for item in report["broken"]:
+        key = (item["page"], item["kind"])
+        counts[key] = counts.get(key, 0) + 1
+        if counts[key] <= log_limit:
+            logger.error(f"[red]Broken {item['kind']}[end] in {item['page']}: {item['url']} ([blue]{item['target']}[end] not found)")
+    for (page, kind), count in counts.items():
+        if count > log_limit:
+            logger.error(f"... {count - log_limit} more broken {kind} references in {page}")
+
+    if report["broken"]:
+        logger.error(f"[red]Verification failed[end]: {len(report['broken'])} broken references in {report['pages']} pages, see [blue]{verify_report_path}[end]")
+        return False
+    logger.info(f"[green]Verified[end] {report['links']} links in {report['pages']} pages in {report['seconds']:.2f}s")
+    return True
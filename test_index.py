@@ -67,9 +67,8 @@ def _(mo):
 @app.cell
 def _():
     import marimo as mo
-    import pandas as pd
     import os
-    return mo, os, pd
+    return mo, os
 
 
 if __name__ == "__main__":
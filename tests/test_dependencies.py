@@ -0,0 +1,79 @@
+import os
+import textwrap
+
+import pytest
+
+from marimo_extra.dependencies import notebook_data_dependencies
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for path in ["notebooks/public/penguins.csv", "notebooks/public/other.csv", "notebooks/public/logo.png", "notebooks/data/raw.csv"]:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(path)
+    return tmp_path
+
+def _dependencies(code: str, include_dynamic: bool=True) -> list[str]:
+    path = os.path.join("notebooks", "nb.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(textwrap.dedent(code))
+    return notebook_data_dependencies(path, include_dynamic)
+
+_penguins = [os.path.join("notebooks", "public", "penguins.csv")]
+_public = sorted(os.path.join("notebooks", "public", name) for name in ["penguins.csv", "other.csv", "logo.png"])
+
+@pytest.mark.parametrize("expression", [
+    'mo.notebook_location() / "public" / "penguins.csv"',
+    'mo.notebook_location() / "public/penguins.csv"',
+    'str(mo.notebook_location() / "public" / "penguins.csv")',
+    'os.path.join(mo.notebook_location(), "public", "penguins.csv")',
+    'f"{mo.notebook_location()}/public/penguins.csv"',
+    'Path(mo.notebook_location()) / "public" / "penguins.csv"',
+])
+def test_notebook_location_paths(project, expression):
+    assert _dependencies(f"df = pl.read_csv({expression})\n") == _penguins
+
+@pytest.mark.parametrize("expression", [
+    # Relative to the notebook
+    '"public/penguins.csv"',
+    # Relative to the project
+    '"notebooks/public/penguins.csv"',
+])
+def test_string_paths(project, expression):
+    assert _dependencies(f"df = pl.read_csv({expression})\n") == _penguins
+
+def test_string_paths_outside_public_are_ignored(project):
+    assert _dependencies('df = pl.read_csv("data/raw.csv")\n') == []
+
+def test_public_paths_inside_strings(project):
+    code = """
+    mo.md('<img src="public/logo.png" width="200">')
+    """
+    assert _dependencies(code) == [os.path.join("notebooks", "public", "logo.png")]
+
+def test_read_public(project):
+    assert _dependencies('df = me.read_public("penguins.csv", library="polars")\n') == _penguins
+
+def test_missing_files_are_ignored(project):
+    assert _dependencies('df = pl.read_csv(mo.notebook_location() / "public" / "missing.csv")\n') == []
+
+def test_dynamic_paths(project):
+    code = """
+    name = dropdown.value
+    df = pl.read_csv(mo.notebook_location() / "public" / name)
+    """
+    # Any file below the statically known directory
+    assert _dependencies(code) == _public
+    assert _dependencies(code, include_dynamic=False) == []
+
+def test_dynamic_paths_need_a_known_directory(project):
+    code = """
+    name = dropdown.value
+    df = pl.read_csv(mo.notebook_location() / name)
+    df = pl.read_csv(f"{mo.notebook_location()}/{name}")
+    """
+    assert _dependencies(code) == []
+
+def test_syntax_errors(project):
+    assert _dependencies("df = pl.read_csv(\n") == []
@@ -0,0 +1,149 @@
+import os
+import time
+
+import pytest
+
+import marimo_extra.export_cache as export_cache
+from marimo_extra.export_cache import export_cache_key, store, restore, contains, new_work_dir, cache_stats
+
+_notebook = """import marimo
+
+app = marimo.App()
+
+@app.cell
+def _():
+    import marimo as mo
+    return (mo,)
+
+@app.cell
+def _(mo):
+    data = open(mo.notebook_location() / "public" / "data.csv").read()
+    return (data,)
+"""
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv(export_cache.EXPORT_CACHE_DIR_ENV, str(tmp_path / "cache"))
+    monkeypatch.delenv(export_cache.EXPORT_CACHE_SIZE_ENV, raising=False)
+    # Entries used by other tests are not in use by this one
+    monkeypatch.setattr(export_cache, "_used_keys", set())
+    return tmp_path / "cache"
+
+@pytest.fixture
+def notebook(tmp_path):
+    (tmp_path / "notebooks" / "public").mkdir(parents=True)
+    (tmp_path / "notebooks" / "public" / "data.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+    (tmp_path / "notebooks" / "public" / "other.csv").write_text("c\n3\n", encoding="utf-8")
+    path = tmp_path / "notebooks" / "nb.py"
+    path.write_text(_notebook, encoding="utf-8")
+    return path
+
+def _export(output_name: str="nb.html", contents: str="<html></html>") -> str:
+    """
+    Writes the files of an export into a new work directory, like marimo would.
+    """
+    work_dir = new_work_dir()
+    with open(os.path.join(work_dir, output_name), "w", encoding="utf-8") as f:
+        f.write(contents)
+    os.makedirs(os.path.join(work_dir, "assets"))
+    with open(os.path.join(work_dir, "assets", "index.js"), "w", encoding="utf-8") as f:
+        f.write("// assets")
+    return work_dir
+
+def test_export_cache_key_is_stable(cache_dir, notebook):
+    assert export_cache_key(str(notebook), ["html"]) == export_cache_key(str(notebook), ["html"])
+
+def test_export_cache_key_changes_with_notebook(cache_dir, notebook):
+    key = export_cache_key(str(notebook), ["html"])
+    notebook.write_text(_notebook + "\n# changed\n", encoding="utf-8")
+    assert export_cache_key(str(notebook), ["html"]) != key
+
+def test_export_cache_key_changes_with_data_dependency(cache_dir, notebook):
+    key = export_cache_key(str(notebook), ["html"])
+    # Not read by the notebook
+    (notebook.parent / "public" / "other.csv").write_text("c\n4\n", encoding="utf-8")
+    assert export_cache_key(str(notebook), ["html"]) == key
+    (notebook.parent / "public" / "data.csv").write_text("a,b\n1,3\n", encoding="utf-8")
+    assert export_cache_key(str(notebook), ["html"]) != key
+
+def test_export_cache_key_changes_with_options(cache_dir, notebook):
+    keys = {
+        export_cache_key(str(notebook), ["html"]),
+        export_cache_key(str(notebook), ["html", "--no-include-code"]),
+        export_cache_key(str(notebook), ["html-wasm", "--mode", "run"]),
+        export_cache_key(str(notebook), ["html-wasm", "--mode", "edit"]),
+    }
+    assert len(keys) == 4
+
+def test_export_cache_key_covers_public_folder_when_copied(cache_dir, notebook):
+    key = export_cache_key(str(notebook), ["html-wasm"], copies_public=True)
+    (notebook.parent / "public" / "other.csv").write_text("c\n4\n", encoding="utf-8")
+    assert export_cache_key(str(notebook), ["html-wasm"], copies_public=True) != key
+
+def test_store_and_restore(cache_dir, tmp_path):
+    before = dict(export_cache.session_stats)
+    work_dir = _export(contents="<html>exported</html>")
+    assert not restore("key", str(tmp_path / "site" / "nb" / "nb.html"))
+
+    assert store("key", work_dir, "nb.html")
+    assert contains("key")
+    assert restore("key", str(tmp_path / "site" / "nb" / "nb.html"))
+
+    site = tmp_path / "site" / "nb"
+    assert (site / "nb.html").read_text(encoding="utf-8") == "<html>exported</html>"
+    assert (site / "assets" / "index.js").read_text(encoding="utf-8") == "// assets"
+    assert export_cache.session_stats["hits"] - before["hits"] == 1
+    assert export_cache.session_stats["misses"] - before["misses"] == 1
+    assert export_cache.session_stats["stores"] - before["stores"] == 1
+    assert cache_stats()["entries"] == 1
+
+def test_restored_files_are_replaced_not_modified(cache_dir, tmp_path):
+    assert store("key", _export(contents="<html>cached</html>"), "nb.html")
+    output = tmp_path / "site" / "nb.html"
+    assert restore("key", str(output))
+
+    # A later export of the same page must not write through a hardlink into the cache
+    assert store("other", _export(contents="<html>newer</html>"), "nb.html")
+    assert restore("other", str(output))
+
+    assert output.read_text(encoding="utf-8") == "<html>newer</html>"
+    assert (cache_dir / "key" / "output").read_text(encoding="utf-8") == "<html>cached</html>"
+
+def _age(entry, seconds: float):
+    # Marks an entry as last used `seconds` ago
+    marker = entry / ".last_used"
+    when = time.time() - seconds
+    os.utime(marker, (when, when))
+
+def test_store_evicts_least_recently_used(cache_dir, monkeypatch):
+    page = "x" * 1000
+    for i, key in enumerate(["old", "recent"]):
+        assert store(key, _export(contents=page), "nb.html")
+        _age(cache_dir / key, 100 - i)
+    # Stored by another build
+    export_cache._used_keys.clear()
+    # Room for two entries of a page and its assets
+    monkeypatch.setenv(export_cache.EXPORT_CACHE_SIZE_ENV, "2500")
+
+    assert store("new", _export(contents=page), "nb.html")
+
+    assert not contains("old")
+    assert contains("recent")
+    assert contains("new")
+
+def test_store_keeps_entries_in_use(cache_dir, tmp_path, monkeypatch):
+    page = "x" * 1000
+    for i, key in enumerate(["old", "recent"]):
+        assert store(key, _export(contents=page), "nb.html")
+        _age(cache_dir / key, 100 - i)
+    export_cache._used_keys.clear()
+    monkeypatch.setenv(export_cache.EXPORT_CACHE_SIZE_ENV, "2500")
+    # Restored by this build: it may still be placing it
+    assert restore("old", str(tmp_path / "site" / "nb.html"))
+    _age(cache_dir / "old", 100)
+
+    assert store("new", _export(contents=page), "nb.html")
+
+    assert contains("old")
+    assert not contains("recent")
+    assert contains("new")
@@ -0,0 +1,100 @@
+import os
+import re
+import json
+import base64
+import shutil
+import subprocess
+from urllib.parse import quote
+
+import pytest
+
+from marimo_extra.externalize import externalize_outputs, _decode_state
+
+def _encode(value) -> str:
+    return base64.b64encode(quote(json.dumps(value), safe="~()*!.'").encode()).decode()
+
+def _static_page(outputs: dict, files: dict=None) -> str:
+    # Laid out like marimo's `static_notebook_template`
+    state = {"cellIds": list(outputs), "cellOutputs": {cell_id: _encode(output) for cell_id, output in outputs.items()}, "cellConsoleOutputs": {}}
+    return (
+        "<html><head></head><body><div id=\"root\"></div>\n"
+        "<script data-marimo=\"true\">\n"
+        "    window.__MARIMO_STATIC__ = {};\n"
+        "    window.__MARIMO_STATIC__.version = \"0.11.5\";\n"
+        f"    window.__MARIMO_STATIC__.notebookState = {json.dumps(state)};\n"
+        "    window.__MARIMO_STATIC__.assetUrl = \"https://cdn.jsdelivr.net/npm/@marimo-team/frontend@0.11.5/dist\";\n"
+        f"    window.__MARIMO_STATIC__.files = {json.dumps(files or {})};\n"
+        "</script></body></html>"
+    )
+
+def _cell_outputs(page_path: str) -> dict:
+    with open(page_path, encoding="utf-8") as f:
+        page = f.read()
+    match = re.search(r"window\.__MARIMO_STATIC__\.notebookState = ", page)
+    state = json.JSONDecoder().raw_decode(page, match.end())[0]
+    return {cell_id: _decode_state(value)[0] for cell_id, value in state["cellOutputs"].items()}
+
+def _data_uri(mime: str, data: bytes) -> str:
+    return f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
+def test_externalize_outputs(tmp_path):
+    image = b"\x89PNG" + os.urandom(64 * 1024)
+    rows = b"a,b\n" + b"1,2\n" * 20000
+    outputs = {
+        "Hbol": {"channel": "output", "mimetype": "text/html", "data": f"<img src='{_data_uri('image/png', image)}' />"},
+        "MJUe": {"channel": "output", "mimetype": "text/html", "data": f"<marimo-table data-data='&quot;{_data_uri('text/csv', rows)}&quot;'></marimo-table>"},
+        "vblA": {"channel": "output", "mimetype": "application/vnd.marimo+mimebundle", "data": {"image/png": _data_uri("image/png", image), "text/plain": "figure"}},
+        "bkHC": {"channel": "output", "mimetype": "text/html", "data": f"<img src='{_data_uri('image/png', b'tiny')}' />"},
+        "lEQa": {"channel": "output", "mimetype": "text/html", "data": "<vega-chart data-spec='{&quot;data&quot;: {&quot;url&quot;: &quot;./@file/80000-chart.csv&quot;}}'></vega-chart>"},
+    }
+    files = {"/@file/80000-chart.csv": _data_uri("text/csv", rows)}
+    page_path = tmp_path / "notebooks" / "page.html"
+    page_path.parent.mkdir()
+    page_path.write_text(_static_page(outputs, files), encoding="utf-8")
+
+    written = externalize_outputs(str(page_path), str(tmp_path))
+
+    assert len(written) == 2
+    image_asset, rows_asset = sorted(written, key=lambda path: path.endswith(".csv"))
+    assert (tmp_path / image_asset).read_bytes() == image
+    assert (tmp_path / rows_asset).read_bytes() == rows
+    cells = _cell_outputs(str(page_path))
+    assert cells["Hbol"]["data"] == f"<img loading=lazy src='../{image_asset}' />"
+    assert f"&quot;../{rows_asset}&quot;" in cells["MJUe"]["data"]
+    assert cells["vblA"]["data"]["image/png"] == f"../{image_asset}"
+    assert cells["bkHC"] == outputs["bkHC"]
+    assert f"&quot;../{rows_asset}&quot;" in cells["lEQa"]["data"]
+    assert "/@file/80000-chart.csv" not in page_path.read_text(encoding="utf-8")
+
+    page = page_path.read_text(encoding="utf-8")
+    assert externalize_outputs(str(page_path), str(tmp_path)) == []
+    assert page_path.read_text(encoding="utf-8") == page
+
+def test_externalize_outputs_without_static_state(tmp_path):
+    page_path = tmp_path / "page.html"
+    page_path.write_text(f"<img src='{_data_uri('image/png', os.urandom(64 * 1024))}'>", encoding="utf-8")
+    assert externalize_outputs(str(page_path), str(tmp_path)) == []
+
+@pytest.mark.skipif(shutil.which("marimo") is None, reason="marimo is not installed")
+def test_externalize_outputs_of_marimo_export(tmp_path):
+    notebook = tmp_path / "notebook.py"
+    notebook.write_text(
+        "import marimo\n"
+        "app = marimo.App()\n\n"
+        "@app.cell\n"
+        "def _():\n"
+        "    import os\n"
+        "    import marimo as mo\n"
+        "    mo.image(b'\\x89PNG\\r\\n\\x1a\\n' + os.urandom(100_000))\n"
+        "    return\n",
+        encoding="utf-8",
+    )
+    page_path = tmp_path / "site" / "notebook.html"
+    subprocess.run(["marimo", "export", "html", str(notebook), "-o", str(page_path)], check=True, capture_output=True)
+    size = page_path.stat().st_size
+
+    written = externalize_outputs(str(page_path), str(tmp_path / "site"))
+
+    assert len(written) == 1 and written[0].endswith(".png")
+    assert page_path.stat().st_size < size - 100_000
+    assert any(f"loading=lazy src='{written[0]}'" in output["data"] for output in _cell_outputs(str(page_path)).values())
@@ -0,0 +1,140 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import marimo_extra.marimo_publish as marimo_publish
+from marimo_extra.marimo_publish import publish_site, load_manifest, _swap_dirs
+from marimo_extra.marimo_web import walk_files
+
+_notebook = """import marimo
+
+app = marimo.App()
+
+@app.cell
+def _():
+    x = {value}
+    return (x,)
+"""
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """
+    A project with two notebooks in its index, exported by a stub that
+    records its calls and fails for the notebooks in `project.failing`.
+    """
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "notebooks").mkdir()
+    for name in ["a", "b"]:
+        (tmp_path / "notebooks" / f"{name}.py").write_text(_notebook.format(value=1), encoding="utf-8")
+    (tmp_path / "public").mkdir()
+    (tmp_path / "public" / "index.csv").write_text(
+        "Name,NB_Path,HTML_Path,Type,Thumbnail,Tags\n"
+        "A,notebooks/a.py,notebooks/a.html,html,,\n"
+        "B,notebooks/b.py,notebooks/b.html,html,,\n",
+        encoding="utf-8",
+    )
+
+    calls = []
+    failing = set()
+
+    def export_notebook(notebook_path, notebook_type, html_output_path, output_dir, **options):
+        calls.append(notebook_path)
+        if notebook_path in failing:
+            return False
+        output = os.path.join(output_dir, html_output_path)
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(notebook_path, encoding="utf-8") as source, open(output, "w", encoding="utf-8") as f:
+            f.write(f"<html>{source.read()}</html>")
+        # Shared by every export, like marimo's assets
+        os.makedirs(os.path.join(output_dir, "assets"), exist_ok=True)
+        with open(os.path.join(output_dir, "assets", "index.js"), "w", encoding="utf-8") as f:
+            f.write("// assets")
+        return True
+
+    monkeypatch.setattr(marimo_publish, "export_notebook", export_notebook)
+    return SimpleNamespace(dir=tmp_path, calls=calls, failing=failing)
+
+def _publish() -> bool:
+    return publish_site(index_csv_path=os.path.join("public", "index.csv"), output_dir="_site", workers=1)
+
+def test_publish_site(project):
+    assert _publish()
+
+    site = project.dir / "_site"
+    assert sorted(project.calls) == ["notebooks/a.py", "notebooks/b.py"]
+    assert "x = 1" in (site / "notebooks" / "a.html").read_text(encoding="utf-8")
+    assert (site / "assets" / "index.js").exists()
+    assert set(load_manifest("_site")) == {"notebooks/a.html", "notebooks/b.html"}
+    assert not (project.dir / "_site.staging").exists()
+
+def test_publish_site_reuses_unchanged_notebooks(project):
+    assert _publish()
+    inode = os.stat(project.dir / "_site" / "notebooks" / "a.html").st_ino
+    project.calls.clear()
+
+    assert _publish()
+
+    assert project.calls == []
+    site = project.dir / "_site"
+    # Hardlinked from the previous site
+    assert os.stat(site / "notebooks" / "a.html").st_ino == inode
+    assert (site / "assets" / "index.js").exists()
+    assert set(load_manifest("_site")) == {"notebooks/a.html", "notebooks/b.html"}
+
+def test_publish_site_rebuilds_changed_notebooks(project):
+    assert _publish()
+    key = load_manifest("_site")["notebooks/a.html"]["key"]
+    project.calls.clear()
+    (project.dir / "notebooks" / "a.py").write_text(_notebook.format(value=2), encoding="utf-8")
+
+    assert _publish()
+
+    assert project.calls == ["notebooks/a.py"]
+    assert "x = 2" in (project.dir / "_site" / "notebooks" / "a.html").read_text(encoding="utf-8")
+    assert load_manifest("_site")["notebooks/a.html"]["key"] != key
+
+def test_publish_site_without_incremental_exports_all(project):
+    assert _publish()
+    project.calls.clear()
+
+    assert publish_site(index_csv_path=os.path.join("public", "index.csv"), output_dir="_site", incremental=False, workers=1)
+
+    assert sorted(project.calls) == ["notebooks/a.py", "notebooks/b.py"]
+
+def test_publish_site_keeps_previous_site_on_failure(project):
+    assert _publish()
+    site = project.dir / "_site"
+    before = {path: (site / path).read_bytes() for path in walk_files(str(site))}
+    (project.dir / "notebooks" / "a.py").write_text(_notebook.format(value=2), encoding="utf-8")
+    project.failing.add("notebooks/a.py")
+
+    assert not _publish()
+
+    assert {path: (site / path).read_bytes() for path in walk_files(str(site))} == before
+    assert not (project.dir / "_site.staging").exists()
+    report = marimo_publish.load_build_report()
+    assert {item["notebook"]: item["status"] for item in report["notebooks"]} == {"notebooks/a.py": "failed", "notebooks/b.py": "reused"}
+
+def test_publish_site_failure_without_previous_site(project):
+    project.failing.add("notebooks/b.py")
+
+    assert not _publish()
+
+    assert not (project.dir / "_site").exists()
+    assert not (project.dir / "_site.staging").exists()
+
+@pytest.mark.parametrize("exchange", [True, False])
+def test_swap_dirs(tmp_path, monkeypatch, exchange):
+    if not exchange:
+        # As on platforms without renameat2
+        monkeypatch.setattr(marimo_publish, "_exchange_dirs", lambda a, b: False)
+    (tmp_path / "_site").mkdir()
+    (tmp_path / "_site" / "old.html").write_text("old", encoding="utf-8")
+    (tmp_path / "_site.staging").mkdir()
+    (tmp_path / "_site.staging" / "new.html").write_text("new", encoding="utf-8")
+
+    _swap_dirs(str(tmp_path / "_site.staging"), str(tmp_path / "_site"))
+
+    assert sorted(os.listdir(tmp_path)) == ["_site"]
+    assert os.listdir(tmp_path / "_site") == ["new.html"]
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from marimo_extra.shard import shard_rows, parse_shard, current_shard, SHARD_ENV
+
+def _rows(count: int) -> list[tuple[str, str, str]]:
+    return [(f"notebooks/nb{i}.py", f"notebooks/nb{i}.html", "html") for i in range(count)]
+
+def _history(rows, seed: int, known: float=1.0) -> dict:
+    generator = random.Random(seed)
+    return {nb_path: {"seconds": generator.choice([0.5, 1.0, 1.0, 7.25, 30.0])} for nb_path, _, _ in rows if generator.random() < known}
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 8])
+@pytest.mark.parametrize("known", [0.0, 0.5, 1.0])
+def test_shards_are_disjoint_and_cover_the_index(count, known):
+    rows = _rows(23)
+    history = _history(rows, seed=count, known=known)
+
+    shards = [shard_rows(rows, (number, count), history) for number in range(1, count + 1)]
+
+    exported = [row for shard in shards for row in shard]
+    assert len(exported) == len(set(exported))
+    assert sorted(exported) == sorted(rows)
+    # In index order
+    for shard in shards:
+        assert shard == [row for row in rows if row in shard]
+
+def test_shards_are_balanced_by_export_time():
+    rows = _rows(4)
+    history = {"notebooks/nb0.py": {"seconds": 30.0}, "notebooks/nb1.py": {"seconds": 10.0}, "notebooks/nb2.py": {"seconds": 10.0}, "notebooks/nb3.py": {"seconds": 10.0}}
+
+    assert shard_rows(rows, (1, 2), history) == rows[:1]
+    assert shard_rows(rows, (2, 2), history) == rows[1:]
+
+def test_shards_do_not_depend_on_the_index_order():
+    rows = _rows(17)
+    history = _history(rows, seed=1)
+    shuffled = list(rows)
+    random.Random(2).shuffle(shuffled)
+
+    for number in range(1, 4):
+        assert sorted(shard_rows(rows, (number, 3), history)) == sorted(shard_rows(shuffled, (number, 3), history))
+
+@pytest.mark.parametrize("shard", ["0/2", "3/2", "2", "a/b"])
+def test_parse_shard_rejects_invalid_shards(shard):
+    with pytest.raises(ValueError):
+        parse_shard(shard)
+
+def test_current_shard(monkeypatch):
+    monkeypatch.delenv(SHARD_ENV, raising=False)
+    assert current_shard() is None
+    monkeypatch.setenv(SHARD_ENV, "2/4")
+    assert current_shard() == (2, 4)
+    assert current_shard("1/3") == (1, 3)
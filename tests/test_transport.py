@@ -0,0 +1,109 @@
+import sys
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from marimo_extra import transport
+
+class _Handler(BaseHTTPRequestHandler):
+    files = {"/data.csv": b"a,b\r\n1,2\r\n", "/slow.txt": b"slow"}
+
+    def _respond(self, body: bool):
+        self.server.requests.append((self.command, self.path))
+        if self.path == "/slow.txt":
+            time.sleep(1)
+        data = self.files.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if body:
+            self.wfile.write(data)
+
+    def do_GET(self):
+        self._respond(True)
+
+    def do_HEAD(self):
+        self._respond(False)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield httpd, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture(params=["requests", "urllib"])
+def client(request, monkeypatch):
+    if request.param == "requests":
+        pytest.importorskip("requests")
+    else:
+        # An import of a module set to None raises ImportError
+        monkeypatch.setitem(sys.modules, "requests", None)
+    monkeypatch.setattr(transport, "_session", None)
+    monkeypatch.setattr(transport, "_prefetched", {})
+    yield request.param
+
+def test_read_bytes(server, client):
+    httpd, url = server
+    assert transport.read_bytes(f"{url}/data.csv") == b"a,b\r\n1,2\r\n"
+    assert (transport._get_session() is None) == (client == "urllib")
+    with pytest.raises(OSError):
+        transport.read_bytes(f"{url}/missing.csv")
+
+def test_read_text(server, client, tmp_path):
+    httpd, url = server
+    assert transport.read_text(f"{url}/data.csv") == "a,b\r\n1,2\r\n"
+    path = tmp_path / "data.csv"
+    path.write_bytes(b"a,b\r\n1,2\r\n")
+    assert transport.read_text(str(path)) == "a,b\r\n1,2\r\n"
+
+def test_exists(server, client, tmp_path):
+    httpd, url = server
+    assert transport.exists(f"{url}/data.csv")
+    assert not transport.exists(f"{url}/missing.csv")
+    assert ("HEAD", "/data.csv") in httpd.requests
+    assert transport.exists(str(tmp_path))
+    assert not transport.exists(str(tmp_path / "missing.csv"))
+
+def test_timeout(server, client, monkeypatch):
+    httpd, url = server
+    monkeypatch.setattr(transport, "request_timeout", (1, 0.2))
+    start = time.perf_counter()
+    with pytest.raises(OSError):
+        transport.read_bytes(f"{url}/slow.txt")
+    assert time.perf_counter() - start < 0.9
+
+def test_prefetch(server, client):
+    httpd, url = server
+    transport.prefetch([f"{url}/data.csv", f"{url}/data.csv", f"{url}/missing.csv", "public/index.csv"])
+    for future in list(transport._prefetched.values()):
+        future.exception()
+    assert sorted(httpd.requests) == [("GET", "/data.csv"), ("GET", "/missing.csv")]
+
+    assert transport.exists(f"{url}/data.csv")
+    assert transport.read_bytes(f"{url}/data.csv") == b"a,b\r\n1,2\r\n"
+    assert len(httpd.requests) == 2
+    # A download is used once, the next read fetches the URL again
+    assert transport.read_bytes(f"{url}/data.csv") == b"a,b\r\n1,2\r\n"
+    assert len(httpd.requests) == 3
+    # A failed download is not reused
+    assert not transport.exists(f"{url}/missing.csv")
+    assert httpd.requests[-1] == ("HEAD", "/missing.csv")
+
+def test_prefetch_in_browser(server, client, monkeypatch):
+    httpd, url = server
+    monkeypatch.setattr(transport, "_in_browser", True)
+    transport.prefetch([f"{url}/data.csv"])
+    assert transport._prefetched == {}
+    assert httpd.requests == []